@@ -0,0 +1,113 @@
+# benchmarks/bench_driver_profiles.py
+"""
+Сравнение профилей Chrome WebDriver ("default" и "fast") на страницах товаров WB.
+
+Для каждой страницы измеряется время до готовности (driver.get + появление заголовка товара)
+и объём переданных данных по Performance API браузера.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_driver_profiles https://www.wildberries.ru/catalog/333634669/detail.aspx
+    python -m benchmarks.bench_driver_profiles --pages-dir recorded_pages --repeat 5
+
+Сохранённые страницы (--pages-dir, *.html) раздаются локальным http.server,
+чтобы результаты были воспроизводимы без доступа к WB.
+"""
+import argparse
+import functools
+import statistics
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from services.parser import DRIVER_PROFILES, get_chrome_driver
+
+# Селектор, по которому страница считается готовой (заголовок товара, как в parse_product)
+READY_SELECTOR = "h1[class*='productTitle'], h3[class*='productTitle'], .product-page__title"
+
+TRANSFERRED_BYTES_JS = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return entries.reduce((total, entry) => total + (entry.transferSize || 0), 0);
+"""
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: Path) -> ThreadingHTTPServer:
+    """Запускает http.server для сохранённых страниц в фоновом потоке."""
+    handler = functools.partial(_QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure_page(driver, url: str, ready_timeout: float) -> tuple[float, int]:
+    """Возвращает (время до готовности в секундах, переданные байты)."""
+    driver.get("about:blank")
+    start = time.perf_counter()
+    driver.get(url)
+    try:
+        WebDriverWait(driver, ready_timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, READY_SELECTOR))
+        )
+    except Exception:
+        print(f"⚠️ Заголовок не найден за {ready_timeout} сек.: {url}")
+    elapsed = time.perf_counter() - start
+    return elapsed, int(driver.execute_script(TRANSFERRED_BYTES_JS) or 0)
+
+
+def run_profile(profile: str, urls: list[str], repeat: int, ready_timeout: float) -> dict:
+    driver = get_chrome_driver(profile)
+    timings, transferred = [], []
+    try:
+        for url in urls:
+            for _ in range(repeat):
+                elapsed, size = measure_page(driver, url, ready_timeout)
+                timings.append(elapsed)
+                transferred.append(size)
+    finally:
+        driver.quit()
+    return {
+        "median_s": statistics.median(timings),
+        "max_s": max(timings),
+        "avg_kb": statistics.mean(transferred) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк профилей Chrome WebDriver")
+    parser.add_argument("urls", nargs="*", help="Ссылки на страницы товаров")
+    parser.add_argument("--pages-dir", type=Path, help="Каталог с сохранёнными страницами (*.html)")
+    parser.add_argument("--profiles", nargs="+", default=list(DRIVER_PROFILES), choices=DRIVER_PROFILES)
+    parser.add_argument("--repeat", type=int, default=3, help="Сколько раз загружать каждую страницу")
+    parser.add_argument("--ready-timeout", type=float, default=20)
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    server = None
+    if args.pages_dir:
+        server = serve_directory(args.pages_dir)
+        port = server.server_address[1]
+        urls += [f"http://127.0.0.1:{port}/{page.name}" for page in sorted(args.pages_dir.glob("*.html"))]
+    if not urls:
+        parser.error("Укажите ссылки на страницы или --pages-dir")
+
+    try:
+        print(f"{'профиль':<10}{'медиана, с':>12}{'макс, с':>10}{'передано, КБ':>15}")
+        for profile in args.profiles:
+            stats = run_profile(profile, urls, args.repeat, args.ready_timeout)
+            print(f"{profile:<10}{stats['median_s']:>12.2f}{stats['max_s']:>10.2f}{stats['avg_kb']:>15.0f}")
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_html_backends.py
+"""
+Сравнение движков разбора HTML на сохранённых страницах Ozon.
+
+Для каждого движка и каждой страницы измеряется время разбора, время работы экстракторов
+(характеристики, изображения, бренд) и пиковая память по tracemalloc.
+tracemalloc видит только память, выделенную через Python: для lxml и selectolax
+дерево в C-памяти не учитывается, поэтому их пик занижен.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_html_backends
+    python -m benchmarks.bench_html_backends pages/*.html --repeat 10
+"""
+import argparse
+import logging
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from services.html_backend import available_backends
+from services.ozon_page import OzonPage
+from services.parser_ozon import extract_all_characteristics, extract_brand, find_product_images
+
+DEFAULT_FIXTURES = [Path(__file__).resolve().parent.parent / "services" / "debug_ozon_category.html"]
+
+
+def run_extractors(page):
+    extract_all_characteristics(page)
+    find_product_images(page)
+    extract_brand(page)
+
+
+def bench(html: str, backend: str, repeat: int) -> dict:
+    parse_times, extract_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        page = OzonPage(html, backend)
+        parsed = time.perf_counter()
+        run_extractors(page)
+        parse_times.append(parsed - start)
+        extract_times.append(time.perf_counter() - parsed)
+        del page
+
+    tracemalloc.start()
+    page = OzonPage(html, backend)
+    run_extractors(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "parse_ms": statistics.median(parse_times) * 1000,
+        "extract_ms": statistics.median(extract_times) * 1000,
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк движков разбора HTML Ozon")
+    parser.add_argument("fixtures", nargs="*", type=Path, default=DEFAULT_FIXTURES, help="HTML-файлы страниц Ozon")
+    parser.add_argument("--backends", nargs="+", default=available_backends())
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Экстракторы подробно логируют найденные изображения — в бенчмарке это только шум
+    logging.disable(logging.INFO)
+
+    print(f"{'страница':<32}{'движок':<14}{'разбор, мс':>12}{'экстракция, мс':>16}{'пик, МБ':>10}")
+    for fixture in args.fixtures:
+        html = fixture.read_text(encoding="utf-8")
+        for backend in args.backends:
+            stats = bench(html, backend, args.repeat)
+            print(
+                f"{fixture.name[:31]:<32}{backend:<14}{stats['parse_ms']:>12.1f}"
+                f"{stats['extract_ms']:>16.1f}{stats['peak_mb']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
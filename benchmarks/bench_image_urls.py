@@ -0,0 +1,107 @@
+# benchmarks/bench_image_urls.py
+"""
+Микробенчмарк классификатора ссылок на изображения.
+
+Ссылки берутся из сохранённых страниц Ozon (атрибуты src/content и JSON) и размножаются
+вариантами размеров, чтобы получить несколько тысяч реалистичных адресов.
+"legacy" — прежние проверки подстроками (is_good_image_url + improve_image_quality +
+is_valid_product_image), "classifier" — один проход classify_image_urls без кэша и с кэшем.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_image_urls
+    python -m benchmarks.bench_image_urls pages/*.html --repeat 20
+"""
+import argparse
+import re
+import statistics
+import time
+from pathlib import Path
+
+from services.image_urls import classify_image_url, classify_image_urls
+
+DEFAULT_FIXTURES = [Path(__file__).resolve().parent.parent / "services" / "debug_ozon_category.html"]
+URL_RE = re.compile(r"https?://[^\s\"'<>()\\]+")
+SIZES = ["wc50", "wc100", "wc250", "wc500", "wc1000", "w200", "ww100"]
+
+
+def collect_urls(fixtures: list[Path], target: int) -> list[str]:
+    base = set()
+    for fixture in fixtures:
+        base.update(URL_RE.findall(fixture.read_text(encoding="utf-8")))
+    urls = sorted(base)
+    variants = [re.sub(r"/(wc|ww|w)\d+/", f"/{size}/", url) for url in urls for size in SIZES]
+    urls += variants
+    return (urls * (target // max(len(urls), 1) + 1))[:target]
+
+
+# ---------- прежняя реализация (для сравнения) ----------
+
+LEGACY_BAD = ['/video', 'video-', 'video/', '/cover.', '/cover/', 'cover/wc', 'cover.jpg', '/logo', '/icon',
+              '/avatar', 'placeholder', 'blank', 'loading', '.mp4', '.webm', '.avi', 'wc50/', 'wc100/', 'wc200/',
+              'w50/', 'w100/']
+LEGACY_GOOD = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '/multimedia', '/ir.ozone.ru', 'ir-']
+LEGACY_SIZES = [('wc50', 'wc1000'), ('wc100', 'wc1000'), ('wc200', 'wc1000'), ('wc250', 'wc1000'),
+                ('wc300', 'wc1000'), ('wc400', 'wc1000'), ('wc500', 'wc1000'), ('wc600', 'wc1000'),
+                ('wc700', 'wc1000'), ('wc800', 'wc1000'), ('wc900', 'wc1000'), ('w50', 'w1000'),
+                ('w100', 'w1000'), ('w200', 'w1000'), ('w250', 'w1000'), ('w300', 'w1000'), ('w400', 'w1000'),
+                ('w500', 'w1000'), ('w600', 'w1000'), ('w700', 'w1000'), ('w800', 'w1000'), ('w900', 'w1000'),
+                ('ww50', 'wc1000'), ('ww100', 'wc1000'), ('ww200', 'wc1000')]
+LEGACY_VALID_BAD = ['video', 'cover', 'logo', 'icon', 'avatar', 'placeholder', 'wc50', 'wc100', 'w50/', 'w100/',
+                    '.mp4', '.webm']
+LEGACY_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
+
+
+def legacy(url: str):
+    if not url.startswith(('http://', 'https://', '//')):
+        return None
+    lower = url.lower()
+    if any(p in lower for p in LEGACY_BAD) or not any(p in lower for p in LEGACY_GOOD):
+        return None
+    improved = url
+    if 'ozone.ru' in url or '/ir-' in url:
+        for old, new in LEGACY_SIZES:
+            if old in improved:
+                improved = improved.replace(old, new)
+                break
+    improved_lower = improved.lower()
+    valid = (not any(p in improved_lower for p in LEGACY_VALID_BAD)
+             and any(ext in improved_lower for ext in LEGACY_EXTENSIONS))
+    return improved, valid
+
+
+def timed(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарк классификатора ссылок на изображения")
+    parser.add_argument("fixtures", nargs="*", type=Path, default=DEFAULT_FIXTURES)
+    parser.add_argument("--urls", type=int, default=5000, help="Сколько ссылок классифицировать за прогон")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    urls = collect_urls(args.fixtures, args.urls)
+    unique = len(set(urls))
+
+    def cold():
+        classify_image_url.cache_clear()
+        classify_image_urls(urls)
+
+    results = {
+        "legacy": timed(lambda: [legacy(url) for url in urls], args.repeat),
+        "classifier": timed(cold, args.repeat),
+        "classifier+cache": timed(lambda: classify_image_urls(urls), args.repeat),
+    }
+
+    print(f"ссылок: {len(urls)} (уникальных: {unique})")
+    for name, seconds in results.items():
+        print(f"{name:<18}{seconds * 1000:>10.2f} мс{seconds / len(urls) * 1e6:>10.2f} мкс/ссылка")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# benchmarks/bench_ozon_extraction.py
+"""
+Сколько обходов дерева и процессорного времени уходит на извлечение полей товара Ozon.
+
+"per-field" повторяет прежнюю схему: каждый экстрактор сам ищет meta-теги, блоки data-widget
+и заново декодирует JSON-LD. "page" — текущая схема с OzonPage, где всё это собирается
+за один обход при разборе страницы. Обходом считается каждый вызов select/select_one
+на корне документа. Время разбора HTML в обоих режимах одинаковое и не учитывается.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_ozon_extraction
+    python -m benchmarks.bench_ozon_extraction pages/*.html --repeat 20
+"""
+import argparse
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+
+from services.html_backend import HtmlNode, parse_html
+from services.ozon_page import OzonPage
+from services.parser_ozon import (
+    BRAND_SELECTORS,
+    DESCRIPTION_SELECTORS,
+    PRICE_SELECTORS,
+    TITLE_SELECTORS,
+    _first_text,
+    extract_all_characteristics,
+    extract_brand,
+    find_product_images,
+)
+
+DEFAULT_FIXTURES = [Path(__file__).resolve().parent.parent / "services" / "debug_ozon_category.html"]
+
+
+class CountingNode(HtmlNode):
+    """Корень документа, считающий обходы дерева."""
+
+    def __init__(self, node: HtmlNode):
+        self._node = node
+        self.traversals = 0
+
+    @property
+    def tag(self):
+        return self._node.tag
+
+    def select(self, css):
+        self.traversals += 1
+        return self._node.select(css)
+
+    def select_one(self, css):
+        self.traversals += 1
+        return self._node.select_one(css)
+
+    def attr(self, name):
+        return self._node.attr(name)
+
+    def text(self):
+        return self._node.text()
+
+
+def _as_css(selector) -> str:
+    if isinstance(selector, tuple):
+        widget, inner = selector
+        return f"[data-widget='{widget}']" + (f" {inner}" if inner else "")
+    return selector
+
+
+def extract_per_field(root: HtmlNode):
+    """Прежняя схема: отдельные обходы и повторный json.loads JSON-LD в каждом экстракторе."""
+    for selectors in (TITLE_SELECTORS, PRICE_SELECTORS, DESCRIPTION_SELECTORS, BRAND_SELECTORS):
+        for selector in selectors:
+            if root.select_one(_as_css(selector)):
+                break
+
+    root.select_one("div[data-widget='webShortCharacteristics']")
+    root.select_one("div[data-widget='webCharacteristics']")
+    for script in root.select("script[type='application/ld+json']"):
+        json.loads(script.text())
+
+    for selector in ("meta[property='og:image']", "meta[name='twitter:image']", "meta[itemprop='image']"):
+        root.select(selector)
+    for script in root.select("script[type='application/ld+json']"):
+        json.loads(script.text())
+    for selector in ("div[data-widget='webGallery'] img", "[data-widget*='Gallery'] img",
+                     "[data-widget*='Photo'] img", "div.gallery img", "div[class*='gallery'] img",
+                     "div[class*='photo'] img", "div[class*='Image'] img", "div[class*='image'] img",
+                     "picture img", "img[src*='multimedia']", "img[data-src*='multimedia']"):
+        root.select(selector)
+    root.select("div[data-index] img")
+    root.select("img")
+
+
+def extract_with_page(page: OzonPage):
+    for selectors in (TITLE_SELECTORS, PRICE_SELECTORS, DESCRIPTION_SELECTORS):
+        _first_text(page, selectors)
+    extract_brand(page)
+    extract_all_characteristics(page)
+    find_product_images(page)
+
+
+def bench(html: str, repeat: int) -> dict:
+    results = {}
+
+    root = CountingNode(parse_html(html))
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        extract_per_field(root)
+        timings.append(time.process_time() - start)
+    results["per-field"] = (root.traversals // repeat, statistics.median(timings))
+
+    parsed = parse_html(html)
+    timings = []
+    for _ in range(repeat):
+        root = CountingNode(parsed)
+        start = time.process_time()
+        # Индексация страницы входит в замер: она выполняется для каждой страницы
+        extract_with_page(OzonPage.from_root(root))
+        timings.append(time.process_time() - start)
+        traversals = root.traversals
+    results["page"] = (traversals, statistics.median(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Обходы дерева и CPU на извлечение полей товара Ozon")
+    parser.add_argument("fixtures", nargs="*", type=Path, default=DEFAULT_FIXTURES, help="HTML-файлы страниц Ozon")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    print(f"{'страница':<32}{'схема':<12}{'обходов':>9}{'CPU, мс':>10}")
+    for fixture in args.fixtures:
+        html = fixture.read_text(encoding="utf-8")
+        for mode, (traversals, cpu) in bench(html, args.repeat).items():
+            print(f"{fixture.name[:31]:<32}{mode:<12}{traversals:>9}{cpu * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
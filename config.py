@@ -20,8 +20,85 @@ POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 POSTGRES_HOST = os.getenv("POSTGRES_HOST")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", )
+# Генерация описаний: одна модель для бота и автопостинга, таймаут попытки (сек.) и повторы
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+# Лимиты аккаунта OpenAI (запросов и токенов в минуту) и одновременных запросов
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "200000"))
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "8"))
+# Кэш сгенерированных описаний (Redis + таблица generated_descriptions), секунды
+DESCRIPTION_CACHE_TTL = int(os.getenv("DESCRIPTION_CACHE_TTL", "604800"))
+# Сколько вариантов описания запрашивать за один вызов: остальные отдаются по «Сгенерировать ещё раз»
+DESCRIPTION_VARIANTS = int(os.getenv("DESCRIPTION_VARIANTS", "3"))
+# Потоковая генерация в боте: подпись превью дописывается по мере ответа, не чаще раза в N секунд
+DESCRIPTION_STREAMING = os.getenv("DESCRIPTION_STREAMING", "true").lower() == "true"
+DESCRIPTION_STREAM_EDIT_INTERVAL = float(os.getenv("DESCRIPTION_STREAM_EDIT_INTERVAL", "1.0"))
+# Пакетная генерация (дозаполнение пула): до скольких товаров в одном запросе и сколько секунд
+# максимум копить пакет — окно должно перекрывать парсинг нескольких карточек, иначе пакеты выходят по одному
+DESCRIPTION_BATCH_SIZE = int(os.getenv("DESCRIPTION_BATCH_SIZE", "5"))
+DESCRIPTION_BATCH_WINDOW = float(os.getenv("DESCRIPTION_BATCH_WINDOW", "30"))
 BITLY_ACCESS_TOKEN = os.getenv("BITLY_ACCESS_TOKEN")
 CUTTLY_API_KEY = os.getenv("CUTTLY_API_KEY")
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 
-ZENROWS_API_KEY = os.getenv("ZENROWS_API_KEY")
\ No newline at end of file
+ZENROWS_API_KEY = os.getenv("ZENROWS_API_KEY")
+
+# Пул Chrome WebDriver для парсера Wildberries
+CHROME_POOL_SIZE = int(os.getenv("CHROME_POOL_SIZE", "2"))
+CHROME_DRIVER_MAX_PAGES = int(os.getenv("CHROME_DRIVER_MAX_PAGES", "30"))
+CHROME_DRIVER_MAX_AGE_MINUTES = int(os.getenv("CHROME_DRIVER_MAX_AGE_MINUTES", "20"))
+# Сколько секунд ждать свободного драйвера, прежде чем сдаться
+CHROME_POOL_CHECKOUT_TIMEOUT = float(os.getenv("CHROME_POOL_CHECKOUT_TIMEOUT", "180"))
+# Профиль драйвера по умолчанию: "default" (страница целиком) или "fast" (без картинок, шрифтов и аналитики)
+WB_DRIVER_PROFILE = os.getenv("WB_DRIVER_PROFILE", "default")
+# Собирать товар WB из JSON ответов фронтенда (перехват сети Chrome); DOM-парсинг остаётся запасным
+WB_CAPTURE_JSON = os.getenv("WB_CAPTURE_JSON", "false").lower() == "true"
+
+# Выполнение парсеров вне event loop (таймауты в секундах)
+PARSER_HTTP_WORKERS = int(os.getenv("PARSER_HTTP_WORKERS", "4"))
+WB_PARSE_TIMEOUT = int(os.getenv("WB_PARSE_TIMEOUT", "120"))
+WB_CATALOG_TIMEOUT = int(os.getenv("WB_CATALOG_TIMEOUT", "120"))
+OZON_PARSE_TIMEOUT = int(os.getenv("OZON_PARSE_TIMEOUT", "240"))
+OZON_CATEGORY_TIMEOUT = int(os.getenv("OZON_CATEGORY_TIMEOUT", "300"))
+# Сколько раз прокручивать каталог WB в поисках новых карточек
+WB_CATALOG_MAX_SCROLLS = int(os.getenv("WB_CATALOG_MAX_SCROLLS", "5"))
+
+# Клиент ZenRows: одновременные запросы (лимит тарифа) и повторы
+ZENROWS_CONCURRENCY = int(os.getenv("ZENROWS_CONCURRENCY", "5"))
+ZENROWS_MAX_RETRIES = int(os.getenv("ZENROWS_MAX_RETRIES", "3"))
+ZENROWS_RETRY_BUDGET = int(os.getenv("ZENROWS_RETRY_BUDGET", "4"))  # повторов на одну задачу
+# Сколько секунд помнить режим ZenRows (basic/js/premium), которого хватило для шаблона URL
+ZENROWS_TIER_MEMORY_TTL = int(os.getenv("ZENROWS_TIER_MEMORY_TTL", "3600"))
+
+# Конвейер подготовки постов: воркеров на этапах парсинга и генерации, размер очередей между этапами
+PIPELINE_PARSE_CONCURRENCY = int(os.getenv("PIPELINE_PARSE_CONCURRENCY", "3"))
+PIPELINE_GENERATE_CONCURRENCY = int(os.getenv("PIPELINE_GENERATE_CONCURRENCY", "2"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+
+# Пул готовых постов для пустых слотов: сколько держать, сколько секунд пост свежий, период дозаполнения
+CANDIDATE_POOL_SIZE = int(os.getenv("CANDIDATE_POOL_SIZE", "3"))
+CANDIDATE_POOL_TTL = int(os.getenv("CANDIDATE_POOL_TTL", "10800"))
+CANDIDATE_POOL_REFILL_INTERVAL = int(os.getenv("CANDIDATE_POOL_REFILL_INTERVAL", "300"))
+
+# Через сколько дней автопостинг может снова опубликовать тот же товар
+REPOST_COOLDOWN_DAYS = int(os.getenv("REPOST_COOLDOWN_DAYS", "30"))
+
+# Дисковый кэш сырого HTML (ZenRows, Selenium): TTL в секундах, лимит размера в МБ.
+# HTML_CACHE_REPLAY=true — страницы берутся только из кэша, без сети (повторное извлечение)
+HTML_CACHE_DIR = os.getenv("HTML_CACHE_DIR", "cache/html")
+HTML_CACHE_TTL = int(os.getenv("HTML_CACHE_TTL", "1800"))
+HTML_CACHE_MAX_MB = int(os.getenv("HTML_CACHE_MAX_MB", "512"))
+HTML_CACHE_REPLAY = os.getenv("HTML_CACHE_REPLAY", "false").lower() == "true"
+
+# Движок разбора HTML Ozon: html.parser, lxml или selectolax (при отсутствии пакета — html.parser)
+OZON_HTML_BACKEND = os.getenv("OZON_HTML_BACKEND", "lxml")
+
+# Кэш спарсенных товаров в Redis (секунды)
+PRODUCT_CACHE_TTL = int(os.getenv("PRODUCT_CACHE_TTL", "21600"))
+PRODUCT_CACHE_NEGATIVE_TTL = int(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL", "600"))
+
+# Single-flight: один парсинг товара на все реплики бота (секунды)
+SINGLE_FLIGHT_LOCK_TTL = int(os.getenv("SINGLE_FLIGHT_LOCK_TTL", "300"))
+SINGLE_FLIGHT_WAIT_TIMEOUT = int(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT", "300"))
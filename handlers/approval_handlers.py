@@ -140,7 +140,7 @@ async def regenerate_text(callback: types.CallbackQuery, state: FSMContext):
                     return
 
         # ✅ Вместо удаления клавиатуры просто отправляем новое сообщение
-        await generate_ad_text(callback, state)
+        await generate_ad_text(callback, state, regenerate=True)
         logger.info(f"🔄 Текст поста {post.id} был обновлён.")
 
     except SQLAlchemyError as e:
@@ -1,5 +1,8 @@
 import logging
+import time
+
 from aiogram import Router
+from aiogram.exceptions import TelegramAPIError
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -9,7 +12,8 @@ from sqlalchemy.future import select
 # Импортируем функции клавиатур из keyboards.py
 from handlers.keyboards import generate_reply_main_menu, generate_full_action_keyboard
 from models.models import Post, User
-from services.content_generator import generate_product_description
+from config import DESCRIPTION_STREAM_EDIT_INTERVAL, DESCRIPTION_STREAMING
+from services.content_generator import generate_description_variants, stream_description_variants
 from services.database import async_session
 
 logger = logging.getLogger("callback_handlers")
@@ -20,9 +24,54 @@ class EditPostState(StatesGroup):
     waiting_for_text = State()
 
 
+def _publication_text(description: str, product_data: dict) -> str:
+    return (
+        f"✨ {description} ✨\n\n"
+        f"💰 Цена: {product_data['price']}\n"
+        f"📦 Заказывайте уже сейчас по ссылке: {product_data['url']}"
+    )
+
+
+async def _stream_preview(callback: CallbackQuery, product_data: dict, regenerate: bool) -> tuple[Message, list[str]]:
+    """
+    Сразу отправляет превью с фото и заглушкой, затем дописывает подпись по мере генерации
+    первого варианта (не чаще DESCRIPTION_STREAM_EDIT_INTERVAL — лимиты Telegram на редактирование).
+    Возвращает сообщение превью и все сгенерированные варианты.
+    """
+    preview = await callback.message.answer_photo(
+        photo=product_data["image_url"],
+        caption="⏳ Генерируем описание..."
+    )
+
+    texts: dict[int, str] = {}
+    last_edit = float("-inf")  # первый фрагмент показываем сразу, без ожидания интервала
+    async for index, text in stream_description_variants(
+        name=product_data["title"],
+        description=product_data["description"],
+        bypass_cache=regenerate
+    ):
+        texts[index] = texts.get(index, "") + text
+        if index == 0 and time.monotonic() - last_edit >= DESCRIPTION_STREAM_EDIT_INTERVAL:
+            last_edit = time.monotonic()
+            try:
+                await preview.edit_caption(caption=_publication_text(f"{texts[0].strip()} ▌", product_data))
+            except TelegramAPIError as e:
+                # Пропущенное промежуточное обновление не страшно: итоговая подпись придёт в конце
+                logger.debug(f"Промежуточное обновление превью пропущено: {e}")
+
+    variants = [texts[index].strip() for index in sorted(texts) if texts[index].strip()]
+    return preview, variants
+
+
 @router.callback_query(lambda c: c.data == "generate_text")
-async def generate_ad_text(callback: CallbackQuery, state: FSMContext):
-    """Генерация текста объявления."""
+async def generate_ad_text(callback: CallbackQuery, state: FSMContext, regenerate: bool = False):
+    """
+    Генерация текста объявления.
+    Один запрос к OpenAI возвращает несколько вариантов: первый показывается сразу,
+    остальные хранятся в FSM вместе с черновиком и отдаются при regenerate=True без запроса к OpenAI.
+    Когда варианты закончились, regenerate запрашивает новые в обход кэша описаний.
+    При DESCRIPTION_STREAMING превью с фото отправляется сразу, а подпись дописывается по мере генерации.
+    """
 
     user_id = callback.from_user.id
     username = callback.from_user.username or "unknown_user"
@@ -33,20 +82,29 @@ async def generate_ad_text(callback: CallbackQuery, state: FSMContext):
         return
 
     product_data = data["product_data"]
+    preview = None
 
     try:
-        publication_text = await generate_product_description(
-            name=product_data["title"],
-            description=product_data["description"]
-        )
-        publication_text = (
-            f"✨ {publication_text} ✨\n\n"
-            f"💰 Цена: {product_data['price']}\n"
-            f"📦 Заказывайте уже сейчас по ссылке: {product_data['url']}"
-        )
+        variants = data.get("description_variants") or []
+        if regenerate and variants:
+            logger.info(f"♻️ Берём сохранённый вариант описания, осталось: {len(variants) - 1}")
+        elif DESCRIPTION_STREAMING:
+            preview, variants = await _stream_preview(callback, product_data, regenerate)
+        else:
+            variants = await generate_description_variants(
+                name=product_data["title"],
+                description=product_data["description"],
+                bypass_cache=regenerate
+            )
+        if not variants:
+            raise ValueError("OpenAI вернул пустое описание")
+        publication_text, variants = variants[0], variants[1:]
+        await state.update_data(description_variants=variants)
+        publication_text = _publication_text(publication_text, product_data)
         product_data["generated_description"] = publication_text
     except Exception as e:
         logger.error(f"❌ Ошибка генерации текста: {e}", exc_info=True)
+        await _drop_preview(preview)
         await callback.message.answer(f"❌ Ошибка генерации описания: {e}")
         return
 
@@ -84,9 +142,22 @@ async def generate_ad_text(callback: CallbackQuery, state: FSMContext):
             logger.info(f"✅ Черновик поста сохранён: {post_id}")
     except Exception as e:
         logger.error(f"❌ Ошибка работы с БД: {e}", exc_info=True)
+        await _drop_preview(preview)
         await callback.message.answer("❌ Ошибка сохранения поста.")
         return
 
+    if preview is not None:
+        # Превью уже у пользователя: дописываем итоговый текст и добавляем клавиатуру
+        try:
+            await preview.edit_caption(
+                caption=publication_text,
+                reply_markup=generate_full_action_keyboard(post_id)
+            )
+            return
+        except TelegramAPIError as e:
+            logger.warning(f"⚠️ Не удалось обновить превью, отправляем пост заново: {e}")
+            await _drop_preview(preview)
+
     # ✅ Отправляем НОВОЕ сообщение вместо редактирования старого
     await callback.message.answer_photo(
         photo=product_data["image_url"],
@@ -95,6 +166,16 @@ async def generate_ad_text(callback: CallbackQuery, state: FSMContext):
     )
 
 
+async def _drop_preview(preview: Message | None):
+    """Удаляет незавершённое превью, если генерация или сохранение не удались."""
+    if preview is None:
+        return
+    try:
+        await preview.delete()
+    except TelegramAPIError as e:
+        logger.warning(f"⚠️ Не удалось удалить превью: {e}")
+
+
 @router.callback_query(lambda c: c.data.startswith("edit_post_text:"))
 async def edit_post_text(callback: CallbackQuery, state: FSMContext):
     """Обработчик редактирования текста поста."""
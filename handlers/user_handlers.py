@@ -1,11 +1,15 @@
-import re
+import asyncio
 from aiogram import Router
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 
 from handlers.keyboards import generate_generate_text_keyboard
-from services.parser import parse_product
-from services.parser_ozon import parse_ozon_with_zenrows_bs4
+from services.product_cache import (
+    WILDBERRIES_URL_PATTERN,
+    OZON_URL_PATTERN,
+    get_wb_product,
+    get_ozon_product,
+)
 from config import ZENROWS_API_KEY
 
 from logs import get_logger
@@ -14,10 +18,6 @@ logger = get_logger("user_handlers")
 
 router = Router()
 
-# Регулярные выражения для проверки ссылок
-WILDBERRIES_URL_PATTERN = re.compile(r"https?://(www\.)?wildberries\.\w{2,3}/catalog/\d+")
-OZON_URL_PATTERN = re.compile(r"https?://(www\.)?ozon\.ru/product/[^/]+-(\d+)/")
-
 
 @router.message()
 async def handle_user_message(message: Message, state: FSMContext):
@@ -58,20 +58,12 @@ async def handle_user_message(message: Message, state: FSMContext):
         await message.reply("🔄 Парсинг данных о товаре с Wildberries... Пожалуйста, подождите.")
 
         try:
-            product_data = parse_product(user_text)
-            if product_data:
-                # Преобразуем формат данных WB в общий формат
-                product_data = {
-                    "title": product_data.get("name", ""),
-                    "brand": "",  # WB парсер не возвращает бренд отдельно
-                    "price": product_data.get("price", ""),
-                    "description": product_data.get("description", ""),
-                    "characteristics": {},  # WB парсер не возвращает характеристики отдельно
-                    "image_url": product_data.get("image_url", ""),
-                    "all_images": [product_data.get("image_url", "")] if product_data.get("image_url") else [],
-                    "url": product_data.get("url", user_text),
-                    "source": "wildberries"
-                }
+            # Товар берётся из кэша или парсится в пуле парсеров (сразу в общем формате)
+            product_data = await get_wb_product(user_text)
+        except asyncio.TimeoutError:
+            logger.error(f"⏰ Таймаут парсинга Wildberries: {user_text}")
+            await message.reply("⏰ Страница товара загружается слишком долго. Попробуйте позже.")
+            return
         except Exception as e:
             logger.error(f"❌ Ошибка парсинга Wildberries: {e}")
             await message.reply(f"❌ Ошибка парсинга Wildberries: {e}")
@@ -82,7 +74,11 @@ async def handle_user_message(message: Message, state: FSMContext):
         await message.reply("🔄 Парсинг данных о товаре с Ozon... Пожалуйста, подождите.")
 
         try:
-            product_data = parse_ozon_with_zenrows_bs4(user_text, ZENROWS_API_KEY)
+            product_data = await get_ozon_product(user_text, ZENROWS_API_KEY)
+        except asyncio.TimeoutError:
+            logger.error(f"⏰ Таймаут парсинга Ozon: {user_text}")
+            await message.reply("⏰ Страница товара загружается слишком долго. Попробуйте позже.")
+            return
         except Exception as e:
             logger.error(f"❌ Ошибка парсинга Ozon: {e}")
             await message.reply(f"❌ Ошибка парсинга Ozon: {e}")
@@ -103,8 +99,8 @@ async def handle_user_message(message: Message, state: FSMContext):
     # Логируем полученные данные
     logger.info(f"✅ Получены данные товара: {product_data['title'][:50]}... из {product_data['source']}")
 
-    # Сохраняем данные в FSMContext в едином формате
-    await state.update_data(product_data=product_data)
+    # Сохраняем данные в FSMContext в едином формате; варианты описания прошлого товара сбрасываем
+    await state.update_data(product_data=product_data, description_variants=[])
 
     # Генерируем клавиатуру для дальнейших действий
     keyboard = generate_generate_text_keyboard()
@@ -7,7 +7,12 @@ from config import TELEGRAM_TOKEN, SENTRY_DSN
 from handlers import register_all_handlers
 from services.cleanup import schedule_cleanup
 from services.metrics import start_prometheus_server
+from services.parser import driver_pool
+from services.parse_executor import shutdown_parser_executors
 from services.redis_client import init_redis, close_redis
+from services.published_index import warm_published_index
+from services.zenrows_client import close_zenrows_client
+from services.openai_client import close_openai_client
 from services.scheduler import scheduler
 from services.telethon_client import start_client, stop_client  # 📌 Добавляем Telethon
 
@@ -46,6 +51,11 @@ async def main():
             logger.error("❌ Не удалось подключиться к Redis. Завершение работы.")
             return
 
+        try:
+            await warm_published_index()
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось загрузить индекс опубликованных товаров: {e}")
+
         storage = RedisStorage(redis)
         dp = Dispatcher(storage=storage)
         register_all_handlers(dp)
@@ -68,6 +78,10 @@ async def main():
         await stop_client()
 
         await close_redis()
+        await close_zenrows_client()
+        await close_openai_client()
+        shutdown_parser_executors()
+        await asyncio.to_thread(driver_pool.close)
         logger.info("🔴 Программа завершена.")
 
 
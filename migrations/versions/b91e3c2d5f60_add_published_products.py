@@ -0,0 +1,39 @@
+"""Add published_products
+
+Revision ID: b91e3c2d5f60
+Revises: 47d4c57f77e4
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b91e3c2d5f60'
+down_revision: Union[str, None] = '47d4c57f77e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'published_products',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('product_id', sa.String(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=True),
+        sa.Column('url', sa.String(), nullable=True),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source', 'product_id', name='uq_published_products_source_product'),
+    )
+    op.create_index(op.f('ix_published_products_published_at'), 'published_products', ['published_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_published_products_published_at'), table_name='published_products')
+    op.drop_table('published_products')
@@ -0,0 +1,35 @@
+"""Add generated_descriptions
+
+Revision ID: d3f8a41c7e92
+Revises: b91e3c2d5f60
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f8a41c7e92'
+down_revision: Union[str, None] = 'b91e3c2d5f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'generated_descriptions',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.create_index(op.f('ix_generated_descriptions_created_at'), 'generated_descriptions', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_generated_descriptions_created_at'), table_name='generated_descriptions')
+    op.drop_table('generated_descriptions')
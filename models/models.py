@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Float, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Float, DateTime, BigInteger, UniqueConstraint
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
 from logs import get_logger
@@ -79,3 +79,33 @@ class ClickStat(Base):
     user_agent = Column(String, nullable=True)
 
     post = relationship("Post", back_populates="click_stats")
+
+
+# Товары, уже опубликованные автопостингом: не публикуем повторно до истечения cooldown
+class PublishedProduct(Base):
+    __tablename__ = "published_products"
+    __table_args__ = (UniqueConstraint("source", "product_id", name="uq_published_products_source_product"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String, nullable=False)  # wildberries / ozon
+    product_id = Column(String, nullable=False)  # ID товара на маркетплейсе
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=True)
+    url = Column(String, nullable=True)
+    published_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Последняя публикация
+
+    def __repr__(self):
+        return (f"<PublishedProduct(source='{self.source}', product_id='{self.product_id}', "
+                f"post_id={self.post_id}, published_at={self.published_at})>")
+
+
+# Кэш описаний от OpenAI: ключ — хэш модели, шаблона промпта и нормализованных данных товара
+class GeneratedDescription(Base):
+    __tablename__ = "generated_descriptions"
+
+    key = Column(String(64), primary_key=True)  # sha256 hex
+    model = Column(String, nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<GeneratedDescription(key='{self.key}', model='{self.model}', created_at={self.created_at})>"
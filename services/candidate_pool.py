@@ -0,0 +1,140 @@
+# services/candidate_pool.py
+"""
+Пул готовых к публикации постов для пустых слотов.
+
+Фоновый производитель заранее находит товары, проверяет изображения и генерирует описание,
+а готовый пост кладёт в Redis-список. В момент слота планировщик только достаёт пост из пула
+и публикует его — без поиска категории, парсинга и генерации на критическом пути.
+Пост старше CANDIDATE_POOL_TTL считается устаревшим (цена могла измениться) и выбрасывается.
+"""
+import asyncio
+import json
+import time
+
+from config import CANDIDATE_POOL_REFILL_INTERVAL, CANDIDATE_POOL_SIZE, CANDIDATE_POOL_TTL
+from services import redis_client
+from services.metrics import record_candidate_pool
+from services.published_index import ensure_published_index_warm
+from services.random_post_publisher import find_random_product, publish_prepared_post
+from logs import get_logger
+
+logger = get_logger("candidate_pool")
+
+POOL_KEY = "candidate_pool:posts"
+
+
+def _decode(raw: str) -> dict | None:
+    try:
+        return json.loads(raw)
+    except ValueError:
+        logger.warning("⚠️ Повреждённая запись в пуле кандидатов, пропускаем")
+        return None
+
+
+def _is_fresh(entry: dict, now: float) -> bool:
+    return now - entry.get("prepared_at", 0) <= CANDIDATE_POOL_TTL
+
+
+async def pool_entries() -> list[dict]:
+    """Записи пула от старых к новым (для метрик и дедупликации)."""
+    redis = redis_client.redis
+    if redis is None:
+        return []
+    return [entry for entry in map(_decode, await redis.lrange(POOL_KEY, 0, -1)) if entry]
+
+
+async def update_pool_metrics() -> int:
+    """Обновляет глубину и возраст пула; возвращает число свежих постов."""
+    now = time.time()
+    fresh = [entry for entry in await pool_entries() if _is_fresh(entry, now)]
+    oldest = now - min(entry["prepared_at"] for entry in fresh) if fresh else 0
+    record_candidate_pool(len(fresh), oldest)
+    return len(fresh)
+
+
+async def push_post(post_data: dict) -> bool:
+    """Кладёт подготовленный пост в пул. False — Redis недоступен или этот товар уже в пуле."""
+    redis = redis_client.redis
+    if redis is None:
+        return False
+
+    if any(entry["post"]["url"] == post_data["url"] for entry in await pool_entries()):
+        logger.info(f"ℹ️ Товар уже в пуле кандидатов: {post_data['url']}")
+        return False
+
+    await redis.rpush(POOL_KEY, json.dumps({"post": post_data, "prepared_at": time.time()}, ensure_ascii=False))
+    logger.info(f"📥 Пост добавлен в пул кандидатов: {post_data['title'][:50]}")
+    return True
+
+
+async def pop_post() -> dict | None:
+    """Достаёт самый старый свежий пост; устаревшие по дороге выбрасываются."""
+    redis = redis_client.redis
+    if redis is None:
+        return None
+
+    now = time.time()
+    while True:
+        raw = await redis.lpop(POOL_KEY)
+        if raw is None:
+            return None
+        entry = _decode(raw)
+        if entry is None:
+            continue
+        if _is_fresh(entry, now):
+            return entry["post"]
+        logger.info(f"🗑️ Пост в пуле устарел, выбрасываем: {entry['post']['url']}")
+
+
+async def refill_pool(size: int = CANDIDATE_POOL_SIZE) -> int:
+    """
+    Дополняет пул до size свежих постов; возвращает число добавленных.
+    Недостающие посты готовятся одним прогоном конвейера, описания к ним — пакетным запросом.
+    """
+    added = 0
+
+    async def sink(post_data: dict) -> bool:
+        nonlocal added
+        pushed = await push_post(post_data)
+        added += pushed
+        return pushed
+
+    while (fresh := await update_pool_metrics()) < size:
+        if not await find_random_product(sink, want=size - fresh):
+            logger.warning("⚠️ Не удалось подготовить кандидата для пула")
+            break
+    return added
+
+
+async def publish_from_pool() -> bool:
+    """Публикует пост из пула. False — пул пуст или все посты из него не удалось опубликовать."""
+    while (post_data := await pop_post()) is not None:
+        logger.info(f"📤 Публикуем пост из пула кандидатов: {post_data['title'][:50]}")
+        try:
+            published = await publish_prepared_post(post_data)
+        except Exception as e:
+            logger.error(f"❌ Ошибка публикации поста из пула: {e}", exc_info=True)
+            published = False
+        await update_pool_metrics()
+        if published:
+            return True
+    return False
+
+
+async def candidate_pool_loop():
+    """
+    Фоновый производитель: держит в пуле CANDIDATE_POOL_SIZE свежих постов.
+    Заодно возвращает быстрый путь индексу опубликованных товаров, если тот остыл.
+    """
+    while True:
+        try:
+            if redis_client.redis is not None:
+                if await ensure_published_index_warm():
+                    logger.info("📇 Индекс опубликованных товаров был холодным — загружен заново")
+                added = await refill_pool()
+                if added:
+                    logger.info(f"✅ В пул кандидатов добавлено постов: {added}")
+        except Exception as e:
+            logger.error(f"🚨 Ошибка в candidate_pool_loop: {e}", exc_info=True)
+
+        await asyncio.sleep(CANDIDATE_POOL_REFILL_INTERVAL)
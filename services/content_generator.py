@@ -1,66 +1,347 @@
-import openai
-from config import OPENAI_API_KEY
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from config import (
+    DESCRIPTION_BATCH_SIZE,
+    DESCRIPTION_BATCH_WINDOW,
+    DESCRIPTION_CACHE_TTL,
+    DESCRIPTION_VARIANTS,
+)
+from models.models import GeneratedDescription
+from services import database, redis_client
+from services.metrics import record_cache_access
+from services.openai_client import PRIORITY_BACKGROUND, PRIORITY_USER, openai_client
 from logs import get_logger
 
 logger = get_logger("content_generator")
 
-# Установите свой API-ключ OpenAI
-openai.api_key = OPENAI_API_KEY
+SYSTEM_PROMPT = "Ты помощник, который создает описания для интернет-магазинов."
+DESCRIPTION_PROMPT = (
+    "Создай привлекательное описание для продукта: {name}. "
+    "Характеристики: {description}. "
+    "Описание должно быть лаконичным, не длиннее 180 знаков и привлекательным для покупателей."
+)
+BATCH_PROMPT = (
+    "Создай привлекательное описание для каждого продукта из списка. "
+    "Каждое описание должно быть лаконичным, не длиннее 180 знаков и привлекательным для покупателей. "
+    'Ответь только JSON-объектом вида {{"descriptions": [{{"id": <id товара>, "text": "<описание>"}}]}} '
+    "без пояснений.\nТовары: {products}"
+)
+MAX_DESCRIPTION_LENGTH = 180
+ERROR_TEXT = "❌ Ошибка при генерации описания."
+
+
+def _description_messages(name: str, description: str) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": DESCRIPTION_PROMPT.format(name=name, description=description)}
+    ]
 
 
-async def generate_product_description(name: str, description: str) -> str:
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def description_cache_key(name: str, description: str, model: str | None = None) -> str:
     """
-    Генерация описания продукта на основе его данных (асинхронно).
-    :param name: Название продукта.
-    :param description: Описание продукта.
-    :return: Сгенерированный текст.
+    Ключ кэша описания: модель + шаблон промпта + нормализованные название и характеристики.
+    Смена модели или шаблона автоматически даёт новые ключи.
     """
-    prompt = (
-        f"Создай привлекательное описание для продукта: {name}. "
-        f"Характеристики: {description}. "
-        "Описание должно быть лаконичным, не длиннее 180 знаков и привлекательным для покупателей."
-    )
+    parts = (model or openai_client.model, SYSTEM_PROMPT, DESCRIPTION_PROMPT, _normalize(name), _normalize(description))
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def _redis_key(key: str) -> str:
+    return f"description:{key}"
 
+
+async def get_cached_description(key: str) -> str | None:
+    """Ищет описание в Redis, затем в Postgres (найденное там возвращается в Redis)."""
+    redis = redis_client.redis
+    if redis is not None:
+        try:
+            text = await redis.get(_redis_key(key))
+            if text is not None:
+                record_cache_access("description", hit=True)
+                return text
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка чтения кэша описаний из Redis: {e}")
+
+    text = None
     try:
-        # Для старой версии OpenAI используем ChatCompletion.acreate
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-4o-mini",  # или "gpt-3.5-turbo"
-            messages=[
-                {"role": "system", "content": "Ты помощник, который создает описания для интернет-магазинов."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=180,
-            temperature=0.7
-        )
+        since = datetime.now(timezone.utc) - timedelta(seconds=DESCRIPTION_CACHE_TTL)
+        async with database.async_session() as session:
+            row = (await session.execute(
+                select(GeneratedDescription).where(
+                    GeneratedDescription.key == key, GeneratedDescription.created_at >= since
+                )
+            )).scalar_one_or_none()
+        text = row.text if row is not None else None
+    except Exception as e:
+        logger.warning(f"⚠️ Ошибка чтения кэша описаний из БД: {e}")
 
-        # Доступ к сообщению в старой версии
-        return response.choices[0].message.content.strip()
+    record_cache_access("description", hit=text is not None)
+    if text is not None and redis is not None:
+        try:
+            await redis.set(_redis_key(key), text, ex=DESCRIPTION_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка записи кэша описаний в Redis: {e}")
+    return text
+
+
+async def store_description(key: str, text: str):
+    """Сохраняет описание в Redis и Postgres; ошибки кэша не мешают генерации."""
+    redis = redis_client.redis
+    if redis is not None:
+        try:
+            await redis.set(_redis_key(key), text, ex=DESCRIPTION_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка записи кэша описаний в Redis: {e}")
+
+    try:
+        async with database.async_session() as session:
+            row = await session.get(GeneratedDescription, key)
+            now = datetime.now(timezone.utc)
+            if row is None:
+                session.add(GeneratedDescription(key=key, model=openai_client.model, text=text, created_at=now))
+            else:
+                row.model, row.text, row.created_at = openai_client.model, text, now
+            await session.commit()
     except Exception as e:
-        logger.error(f"Ошибка: {e}")
-        return "❌ Ошибка при генерации описания."
+        logger.warning(f"⚠️ Ошибка записи кэша описаний в БД: {e}")
 
 
-def generate_product_description_sync(name: str, description: str) -> str:
-    """Синхронная версия для старой OpenAI"""
-    prompt = (
-        f"Создай привлекательное описание для продукта: {name}. "
-        f"Характеристики: {description}. "
-        "Описание должно быть лаконичным, не длиннее 180 знаков и привлекательным для покупателей."
-    )
+async def generate_description_variants(name: str, description: str, n: int = DESCRIPTION_VARIANTS,
+                                       bypass_cache: bool = False, priority: str = PRIORITY_USER) -> list[str]:
+    """
+    Генерирует n вариантов описания одним запросом к OpenAI.
+    Первый вариант кэшируется; из кэша возвращается один вариант без запроса к OpenAI.
+    При ошибке возвращается [ERROR_TEXT].
+    :param bypass_cache: Не брать описание из кэша («Сгенерировать ещё раз»).
+    :param priority: очередь лимитера OpenAI (фоновые задачи передают PRIORITY_BACKGROUND).
+    """
+    key = description_cache_key(name, description)
+    if not bypass_cache:
+        cached = await get_cached_description(key)
+        if cached is not None:
+            logger.info("💾 Описание товара взято из кэша")
+            return [cached]
 
     try:
-        # Синхронный вызов для старой версии
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",  # Используем более стабильную модель
-            messages=[
-                {"role": "system", "content": "Ты помощник, который создает описания для интернет-магазинов."},
-                {"role": "user", "content": prompt}
-            ],
+        variants = [text for text in await openai_client.chat_variants(
+            _description_messages(name, description),
+            n=n,
             max_tokens=180,
-            temperature=0.7
-        )
+            temperature=0.7,
+            endpoint="description",
+            priority=priority,
+        ) if text]
+        if not variants:
+            raise ValueError("OpenAI не вернул ни одного варианта описания")
+    except Exception as e:
+        logger.error(f"Ошибка: {e}")
+        return [ERROR_TEXT]
+
+    await store_description(key, variants[0])
+    return variants
+
+
+async def stream_description_variants(name: str, description: str, n: int = DESCRIPTION_VARIANTS,
+                                     bypass_cache: bool = False, priority: str = PRIORITY_USER):
+    """
+    Потоковая генерация n вариантов описания: выдаёт пары (номер варианта, фрагмент текста).
+    Описание из кэша выдаётся целиком одним фрагментом. Если запрос не удался до первого
+    фрагмента, выдаётся (0, ERROR_TEXT); ошибка посреди ответа пробрасывается.
+    Первый вариант после завершения кэшируется.
+    """
+    key = description_cache_key(name, description)
+    if not bypass_cache:
+        cached = await get_cached_description(key)
+        if cached is not None:
+            logger.info("💾 Описание товара взято из кэша")
+            yield 0, cached
+            return
 
-        return response.choices[0].message.content.strip()
+    texts: dict[int, str] = {}
+    try:
+        async for index, text in openai_client.chat_stream_variants(
+            _description_messages(name, description),
+            n=n,
+            max_tokens=180,
+            temperature=0.7,
+            endpoint="description_stream",
+            priority=priority,
+        ):
+            texts[index] = texts.get(index, "") + text
+            yield index, text
     except Exception as e:
         logger.error(f"Ошибка: {e}")
-        return f"❌ Ошибка при генерации описания: {e}"
\ No newline at end of file
+        if texts:
+            raise
+        yield 0, ERROR_TEXT
+        return
+
+    first = texts.get(0, "").strip()
+    if first:
+        await store_description(key, first)
+
+
+async def generate_product_description(name: str, description: str, bypass_cache: bool = False,
+                                       priority: str = PRIORITY_USER) -> str:
+    """
+    Генерация описания продукта на основе его данных (асинхронно).
+    Используется и ботом, и автопостингом; event loop не блокируется на запросе к OpenAI.
+    Готовые описания берутся из кэша; новое описание перезаписывает кэш.
+    :param name: Название продукта.
+    :param description: Описание продукта.
+    :param bypass_cache: Не брать описание из кэша («Сгенерировать ещё раз»).
+    :param priority: очередь лимитера OpenAI (фоновые задачи передают PRIORITY_BACKGROUND).
+    :return: Сгенерированный текст.
+    """
+    variants = await generate_description_variants(name, description, n=1, bypass_cache=bypass_cache,
+                                                   priority=priority)
+    return variants[0]
+
+
+def _shorten_description(text: str) -> str:
+    """Обрезает описание до MAX_DESCRIPTION_LENGTH знаков по границе слова."""
+    if len(text) <= MAX_DESCRIPTION_LENGTH:
+        return text
+    cut = text[:MAX_DESCRIPTION_LENGTH - 1].rsplit(" ", 1)[0].rstrip(" ,;:—-")
+    return f"{cut}…"
+
+
+def _parse_batch_response(raw: str, count: int) -> dict[int, str]:
+    """Разбирает JSON-ответ пакетного запроса; возвращает только описания, прошедшие проверку."""
+    raw = raw.strip()
+    if raw.startswith("```"):
+        raw = raw.strip("`").removeprefix("json").strip()
+    items = json.loads(raw).get("descriptions", [])
+
+    texts = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index, text = item.get("id"), item.get("text")
+        if not isinstance(index, int) or not 0 <= index < count or not isinstance(text, str):
+            continue
+        text = text.strip()
+        if text and len(text) <= MAX_DESCRIPTION_LENGTH:
+            texts[index] = text
+    return texts
+
+
+async def generate_product_descriptions(products: list[tuple[str, str]]) -> list[str]:
+    """
+    Пакетная генерация для фоновых задач: описания для нескольких товаров (название, характеристики)
+    одним запросом в фоновой очереди лимитера OpenAI.
+    Товары из кэша в запрос не попадают. Описания, которых нет в ответе или длиннее
+    MAX_DESCRIPTION_LENGTH знаков, генерируются по одному через generate_product_description;
+    слишком длинный результат повтора обрезается по границе слова.
+    :return: Описания в порядке products.
+    """
+    keys = [description_cache_key(name, description) for name, description in products]
+    results: list[str | None] = [await get_cached_description(key) for key in keys]
+    missing = [index for index, text in enumerate(results) if text is None]
+
+    if len(missing) > 1:
+        payload = [{"id": batch_id, "name": products[index][0], "description": products[index][1]}
+                   for batch_id, index in enumerate(missing)]
+        try:
+            raw = await openai_client.chat(
+                [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": BATCH_PROMPT.format(products=json.dumps(payload, ensure_ascii=False))},
+                ],
+                max_tokens=160 * len(missing) + 50,
+                temperature=0.7,
+                endpoint="description_batch",
+                priority=PRIORITY_BACKGROUND,
+            )
+            texts = _parse_batch_response(raw, len(missing))
+            logger.info(f"📦 Пакетная генерация: {len(texts)} из {len(missing)} описаний одним запросом")
+        except Exception as e:
+            logger.warning(f"⚠️ Пакетная генерация не удалась, генерируем по одному: {e}")
+            texts = {}
+
+        for batch_id, index in enumerate(missing):
+            if batch_id in texts:
+                results[index] = texts[batch_id]
+                await store_description(keys[index], texts[batch_id])
+
+    fallback = [index for index, text in enumerate(results) if text is None]
+    if fallback:
+        generated = await asyncio.gather(*(
+            generate_product_description(*products[index], priority=PRIORITY_BACKGROUND) for index in fallback
+        ))
+        for index, text in zip(fallback, generated):
+            if len(text) > MAX_DESCRIPTION_LENGTH:
+                text = _shorten_description(text)
+                await store_description(keys[index], text)
+            results[index] = text
+    return results
+
+
+class DescriptionBatcher:
+    """
+    Собирает одиночные запросы описаний в пакеты для generate_product_descriptions.
+
+    Пакет уходит, как только набралось max_size товаров, истекло окно window секунд
+    или вызван flush() (например, предыдущий этап конвейера больше ничего не выдаст).
+    Используется фоновым дозаполнением пула: один батчер на прогон конвейера,
+    max_size — сколько постов нужно, а окно — страховка на случай медленного парсинга.
+    """
+
+    def __init__(self, max_size: int = DESCRIPTION_BATCH_SIZE, window: float = DESCRIPTION_BATCH_WINDOW):
+        self.max_size = max(1, max_size)
+        self.window = window
+        self._pending: list[tuple[str, str, asyncio.Future]] = []
+        self._timer: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def generate(self, name: str, description: str) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((name, description, future))
+        if len(self._pending) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self._timer = None
+        self.flush()
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _run(batch: list[tuple[str, str, asyncio.Future]]):
+        # Отменённые ожидающие (конвейер уже набрал посты) в пакет не попадают
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        try:
+            texts = await generate_product_descriptions([(name, description) for name, description, _ in batch])
+        except Exception as e:
+            texts = [e] * len(batch)
+        for (_, _, future), text in zip(batch, texts):
+            if future.done():
+                continue
+            if isinstance(text, Exception):
+                future.set_exception(text)
+            else:
+                future.set_result(text)
+
@@ -0,0 +1,255 @@
+# services/driver_pool.py
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from services.metrics import DRIVER_POOL_RECYCLED, record_driver_checkout, set_driver_pool_size
+from logs import get_logger
+
+logger = get_logger("driver_pool")
+
+
+class PooledDriver:
+    """WebDriver из пула вместе с профилем, возрастом и числом обработанных страниц."""
+
+    def __init__(self, driver, profile: str = "default"):
+        self.driver = driver
+        self.profile = profile
+        self.created_at = time.monotonic()
+        self.pages = 0
+
+
+class DriverPool:
+    """
+    Ограниченный пул «тёплых» Chrome WebDriver.
+
+    Драйвер выдаётся через checkout()/checkin() (или контекстные менеджеры driver()/acquire()),
+    перед выдачей проверяется health-check'ом и пересоздаётся после max_pages страниц
+    или max_age_seconds секунд жизни.
+
+    factory(profile) создаёт драйвер нужного профиля; драйверы всех профилей делят общий
+    лимит size, а свободный драйвер другого профиля при нехватке места закрывается.
+
+    Асинхронные потребители (acquire) ждут свободного места на event loop, а не в потоке
+    executor'а: иначе ожидающие заняли бы все потоки и checkin было бы негде выполнить.
+    """
+
+    def __init__(self, factory, size: int, max_pages: int, max_age_seconds: float, name: str = "default",
+                 checkout_timeout: float = 180):
+        self.name = name
+        self._factory = factory
+        self._size = max(1, size)
+        self._max_pages = max_pages
+        self._max_age = max_age_seconds
+        self._idle: list[PooledDriver] = []
+        self._total = 0  # свободные + выданные + создающиеся
+        self._checkout_timeout = checkout_timeout
+        self._cond = threading.Condition()
+        self._async_waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._closed = False
+
+    # ---------- служебные методы ----------
+
+    def _update_metrics(self):
+        set_driver_pool_size(self.name, len(self._idle), self._total - len(self._idle))
+
+    def _expired_reason(self, item: PooledDriver) -> str | None:
+        if self._max_pages and item.pages >= self._max_pages:
+            return "pages"
+        if self._max_age and time.monotonic() - item.created_at >= self._max_age:
+            return "age"
+        return None
+
+    @staticmethod
+    def _is_healthy(item: PooledDriver) -> bool:
+        try:
+            return item.driver.execute_script("return 1") == 1
+        except Exception as e:
+            logger.warning(f"⚠️ Драйвер не прошёл health-check: {e}")
+            return False
+
+    def _destroy(self, item: PooledDriver, reason: str):
+        logger.debug(f"♻️ Закрываем драйвер пула '{self.name}' (причина: {reason}, страниц: {item.pages})")
+        DRIVER_POOL_RECYCLED.labels(pool=self.name, reason=reason).inc()
+        try:
+            item.driver.quit()
+        except Exception as e:
+            logger.debug(f"Ошибка при закрытии драйвера: {e}")
+
+    def _pop_idle(self, profile: str) -> PooledDriver | None:
+        for i in range(len(self._idle) - 1, -1, -1):
+            if self._idle[i].profile == profile:
+                return self._idle.pop(i)
+        return None
+
+    def _notify(self):
+        """Будит одного синхронного ожидающего и всех асинхронных (вызывается под self._cond)."""
+        self._cond.notify()
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def _release_slot(self):
+        with self._cond:
+            self._total -= 1
+            self._update_metrics()
+            self._notify()
+
+    def _return(self, item: PooledDriver, broken: bool) -> str | None:
+        """Кладёт драйвер в свободные; иначе возвращает причину, по которой его нужно закрыть."""
+        item.pages += 1
+        reason = "unhealthy" if broken else self._expired_reason(item)
+        with self._cond:
+            if not reason and not self._closed:
+                self._idle.append(item)
+                self._update_metrics()
+                self._notify()
+                return None
+        return reason or "shutdown"
+
+    def _discard(self, item: PooledDriver, reason: str):
+        self._destroy(item, reason)
+        self._release_slot()
+
+    def _checkin_nowait(self, item: PooledDriver, broken: bool = False):
+        """checkin из event loop: закрытие драйвера (блокирующий quit) уходит в executor."""
+        reason = self._return(item, broken)
+        if reason:
+            asyncio.get_running_loop().run_in_executor(None, self._discard, item, reason)
+
+    # ---------- публичный API ----------
+
+    def checkout(self, timeout: float | None = None, profile: str = "default") -> PooledDriver:
+        """
+        Выдаёт драйвер профиля profile, при необходимости запуская новый. Блокирует поток.
+        timeout=None — таймаут пула (checkout_timeout); timeout=0 — не ждать свободного места.
+        """
+        start = time.monotonic()
+        deadline = start + (self._checkout_timeout if timeout is None else timeout)
+
+        while True:
+            item = None
+            evicted = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError(f"Пул драйверов '{self.name}' закрыт")
+                    item = self._pop_idle(profile)
+                    if item is not None:
+                        break
+                    if self._total < self._size:
+                        self._total += 1
+                        break
+                    if self._idle:
+                        # Место занято свободным драйвером другого профиля — заменяем его
+                        evicted = self._idle.pop(0)
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Нет свободного драйвера в пуле '{self.name}' за {timeout} сек.")
+                    self._cond.wait(remaining)
+                self._update_metrics()
+
+            if evicted is not None:
+                self._destroy(evicted, "profile")
+
+            if item is not None:
+                reason = self._expired_reason(item) or (None if self._is_healthy(item) else "unhealthy")
+                if reason:
+                    self._destroy(item, reason)
+                    self._release_slot()
+                    continue
+                record_driver_checkout(self.name, hit=True, wait=time.monotonic() - start)
+                return item
+
+            try:
+                item = PooledDriver(self._factory(profile), profile)
+            except Exception:
+                self._release_slot()
+                raise
+            record_driver_checkout(self.name, hit=False, wait=time.monotonic() - start)
+            return item
+
+    def checkin(self, item: PooledDriver, broken: bool = False):
+        """Возвращает драйвер в пул; сломанные и отработавшие своё драйверы закрываются."""
+        reason = self._return(item, broken)
+        if reason:
+            self._discard(item, reason)
+
+    @contextmanager
+    def driver(self, timeout: float | None = None, profile: str = "default"):
+        """Синхронный контекстный менеджер: with pool.driver() as driver: ..."""
+        item = self.checkout(timeout, profile)
+        try:
+            yield item.driver
+        finally:
+            self.checkin(item)
+
+    @asynccontextmanager
+    async def acquire(self, timeout: float | None = None, profile: str = "default"):
+        """
+        Асинхронное получение драйвера: ожидание свободного места не блокирует event loop.
+        async with pool.acquire() as driver: ...
+
+        Если тело упало, отменено или вышло по таймауту, драйвер считается сломанным и закрывается:
+        поток парсера может всё ещё работать с ним (или закрывать его через on_cancel),
+        поэтому выдавать его следующему потребителю нельзя.
+        """
+        item = await self._checkout_async(timeout, profile)
+        broken = False
+        try:
+            yield item.driver
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            self._checkin_nowait(item, broken=broken)
+
+    async def _checkout_async(self, timeout: float | None, profile: str) -> PooledDriver:
+        # В executor уходит только checkout без ожидания (health-check, запуск Chrome);
+        # свободного места ждём здесь, на event loop, по сигналу от checkin/_release_slot.
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (self._checkout_timeout if timeout is None else timeout)
+        waiter = (loop, asyncio.Event())
+        with self._cond:
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                waiter[1].clear()
+                future = loop.run_in_executor(None, self.checkout, 0, profile)
+                try:
+                    return await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # Драйвер всё равно может быть выдан потоком — возвращаем его, чтобы не потерять место
+                    future.add_done_callback(
+                        lambda f: f.cancelled() or f.exception() or loop.call_soon_threadsafe(
+                            self._checkin_nowait, f.result()
+                        )
+                    )
+                    raise
+                except TimeoutError:
+                    pass
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"Нет свободного драйвера в пуле '{self.name}' за {timeout} сек.")
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+
+    def close(self):
+        """Закрывает все свободные драйверы; выданные закроются при возврате."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+            for loop, event in self._async_waiters:
+                loop.call_soon_threadsafe(event.set)
+        for item in idle:
+            self._destroy(item, "shutdown")
+            self._release_slot()
+        logger.info(f"🛑 Пул драйверов '{self.name}' закрыт")
@@ -0,0 +1,139 @@
+# services/html_backend.py
+"""
+Сменный движок разбора HTML для экстракторов Ozon.
+
+Экстракторы работают с небольшим интерфейсом узла (tag/select/select_one/attr/text),
+а сам разбор выполняет выбранный движок:
+    "html.parser" — BeautifulSoup со встроенным парсером Python (медленный, без зависимостей);
+    "lxml"        — BeautifulSoup с парсером lxml (нужен пакет lxml);
+    "selectolax"  — движок lexbor из selectolax (нужен пакет selectolax), самый быстрый.
+Если пакет движка не установлен, используется "html.parser".
+"""
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from bs4 import BeautifulSoup
+
+from config import OZON_HTML_BACKEND
+from logs import get_logger
+
+logger = get_logger("html_backend")
+
+try:
+    import lxml  # noqa: F401
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+
+class HtmlNode(ABC):
+    """Интерфейс узла документа, с которым работают экстракторы."""
+
+    __slots__ = ()
+
+    @property
+    @abstractmethod
+    def tag(self) -> str: ...
+
+    @abstractmethod
+    def select(self, css: str) -> list["HtmlNode"]: ...
+
+    @abstractmethod
+    def select_one(self, css: str) -> "HtmlNode | None": ...
+
+    @abstractmethod
+    def attr(self, name: str) -> str | None: ...
+
+    @abstractmethod
+    def text(self) -> str:
+        """Текст узла без пробелов по краям каждого фрагмента (как get_text(strip=True) в bs4)."""
+
+
+class SoupNode(HtmlNode):
+    __slots__ = ("_tag",)
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    @property
+    def tag(self):
+        return self._tag.name
+
+    def select(self, css):
+        return [SoupNode(tag) for tag in self._tag.select(css)]
+
+    def select_one(self, css):
+        tag = self._tag.select_one(css)
+        return SoupNode(tag) if tag is not None else None
+
+    def attr(self, name):
+        value = self._tag.get(name)
+        return " ".join(value) if isinstance(value, list) else value
+
+    def text(self):
+        return self._tag.get_text(strip=True)
+
+
+class LexborNode(HtmlNode):
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def tag(self):
+        return self._node.tag
+
+    def select(self, css):
+        return [LexborNode(node) for node in self._node.css(css)]
+
+    def select_one(self, css):
+        node = self._node.css_first(css)
+        return LexborNode(node) if node is not None else None
+
+    def attr(self, name):
+        return self._node.attributes.get(name)
+
+    def text(self):
+        return self._node.text(strip=True)
+
+
+def _parse_soup(features: str):
+    def parse(html: str) -> HtmlNode:
+        return SoupNode(BeautifulSoup(html, features))
+
+    return parse
+
+
+def _parse_lexbor(html: str) -> HtmlNode:
+    return LexborNode(LexborHTMLParser(html).root)
+
+
+BACKENDS = {
+    "html.parser": _parse_soup("html.parser"),
+    "lxml": _parse_soup("lxml"),
+    "selectolax": _parse_lexbor,
+}
+
+
+def available_backends() -> list[str]:
+    """Движки, пакеты которых установлены."""
+    installed = {"html.parser": True, "lxml": lxml is not None, "selectolax": LexborHTMLParser is not None}
+    return [name for name in BACKENDS if installed[name]]
+
+
+@lru_cache(maxsize=None)
+def _resolve(backend: str) -> str:
+    if backend not in available_backends():
+        logger.warning(f"⚠️ HTML-движок '{backend}' недоступен, используем html.parser")
+        return "html.parser"
+    return backend
+
+
+def parse_html(html: str, backend: str | None = None) -> HtmlNode:
+    """Разбирает HTML выбранным движком (по умолчанию — OZON_HTML_BACKEND)."""
+    return BACKENDS[_resolve(backend or OZON_HTML_BACKEND)](html)
@@ -0,0 +1,209 @@
+# services/html_cache.py
+"""
+Дисковый кэш сырого HTML загруженных страниц (ответы ZenRows, page_source Selenium).
+
+Ключ — нормализованный URL (без трекинговых параметров) и режим загрузки
+(zenrows-basic, zenrows-premium, selenium, ...). Страницы хранятся сжатыми:
+zstd, если установлен пакет zstandard, иначе gzip. Запись живёт HTML_CACHE_TTL секунд;
+когда кэш превышает HTML_CACHE_MAX_MB, удаляются давно не читавшиеся страницы (LRU по mtime).
+
+В режиме replay (HTML_CACHE_REPLAY=true) страницы берутся только из кэша без учёта TTL,
+а сеть не используется: так можно заново прогнать извлечение после правки селекторов.
+Копии страниц для открытия в браузере (replay/) входят в тот же лимит и удаляются первыми:
+они заново создаются из кэша при следующем replay.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import HTML_CACHE_DIR, HTML_CACHE_MAX_MB, HTML_CACHE_REPLAY, HTML_CACHE_TTL
+from services.metrics import record_html_cache
+from logs import get_logger
+
+logger = get_logger("html_cache")
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Параметры, которые не меняют содержимое страницы (трекинг переходов Ozon, utm-метки)
+TRACKING_PARAMS = {"at", "asb", "asb2", "avtc", "avte", "avts", "from", "sh"}
+
+# Запрещает странице из кэша любые сетевые запросы при открытии в браузере (replay)
+_OFFLINE_CSP = (
+    '<meta http-equiv="Content-Security-Policy" '
+    "content=\"default-src 'none'; style-src 'unsafe-inline'; img-src data:\">"
+)
+
+
+def normalize_url(url: str) -> str:
+    """URL без фрагмента, трекинговых параметров и завершающего слеша; параметры отсортированы."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    return urlunsplit((
+        parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", urlencode(query), ""
+    ))
+
+
+class _Gzip:
+    extension = ".gz"
+
+    @staticmethod
+    def compress(data: bytes) -> bytes:
+        return gzip.compress(data, compresslevel=6)
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return gzip.decompress(data)
+
+
+class _Zstd:
+    extension = ".zst"
+
+    @staticmethod
+    def compress(data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=6).compress(data)
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+class HtmlCache:
+    def __init__(self, directory: str, ttl: float, max_bytes: int, replay: bool = False, codec=None):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.replay = replay
+        available = [_Zstd, _Gzip] if zstandard else [_Gzip]
+        self.codec = codec or available[0]
+        # Читаем и файлы, записанные другим кодеком (например, до установки zstandard)
+        self._codecs = [self.codec] + [c for c in available if c is not self.codec]
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.replay or self.ttl > 0
+
+    @staticmethod
+    def key(url: str, mode: str) -> str:
+        return hashlib.sha256(f"{mode}|{normalize_url(url)}".encode()).hexdigest()
+
+    def _find(self, key: str):
+        for codec in self._codecs:
+            path = self.directory / f"{key}{codec.extension}"
+            if path.exists():
+                return path, codec
+        return None, None
+
+    def get(self, url: str, mode: str) -> str | None:
+        """HTML из кэша или None (нет записи, запись устарела или повреждена)."""
+        if not self.enabled:
+            return None
+
+        path, codec = self._find(self.key(url, mode))
+        if path is None:
+            record_html_cache(mode, "miss")
+            return None
+
+        try:
+            header, _, body = codec.decompress(path.read_bytes()).partition(b"\n")
+            fetched_at = json.loads(header)["fetched_at"]
+        except Exception as e:
+            logger.warning(f"⚠️ Повреждённая запись кэша HTML {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            record_html_cache(mode, "miss")
+            return None
+
+        if not self.replay and time.time() - fetched_at > self.ttl:
+            record_html_cache(mode, "expired")
+            return None
+
+        try:
+            os.utime(path)  # отметка последнего чтения для LRU
+        except OSError:
+            pass
+        record_html_cache(mode, "hit")
+        return body.decode("utf-8")
+
+    def put(self, url: str, mode: str, html: str):
+        """Сохраняет страницу. В режиме replay кэш только читается."""
+        if not self.enabled or self.replay or not html:
+            return
+
+        header = json.dumps({"url": url, "mode": mode, "fetched_at": time.time()}).encode()
+        data = self.codec.compress(header + b"\n" + html.encode("utf-8"))
+        self._write(self.directory / f"{self.key(url, mode)}{self.codec.extension}", data)
+
+    def _write(self, path: Path, data: bytes):
+        """Атомарно записывает файл кэша и учитывает его в размере; при превышении лимита чистит кэш."""
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if self._size is None:
+                self._size = sum(entry.stat().st_size for entry in self._entries())
+            previous = path.stat().st_size if path.exists() else 0
+            tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)  # читатели не увидят недописанный файл
+            self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+
+    def _entries(self):
+        entries = [
+            entry for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.endswith((_Gzip.extension, _Zstd.extension))
+        ]
+        replay_dir = self.directory / "replay"
+        if replay_dir.is_dir():
+            entries += [entry for entry in os.scandir(replay_dir) if entry.is_file() and entry.name.endswith(".html")]
+        return entries
+
+    def _evict(self, keep: Path | None = None):
+        """
+        Удаляет сначала копии для replay, затем давно не читавшиеся страницы,
+        пока кэш не станет меньше 90% лимита. Только что записанный файл keep не трогается.
+        """
+        entries = sorted(
+            self._entries(), key=lambda entry: (not entry.name.endswith(".html"), entry.stat().st_mtime)
+        )
+        target = self.max_bytes * 0.9
+        removed = 0
+        for entry in entries:
+            if self._size <= target:
+                break
+            if keep is not None and Path(entry.path) == keep:
+                continue
+            size = entry.stat().st_size
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                continue
+            self._size -= size
+            removed += 1
+        logger.info(f"🧹 Кэш HTML: удалено {removed} страниц, размер {self._size / 1024 / 1024:.1f} МБ")
+
+    def replay_uri(self, url: str, mode: str) -> str | None:
+        """
+        file:// ссылка на страницу из кэша для открытия в браузере (replay для Selenium).
+        В страницу добавляется CSP, запрещающий скрипты и сетевые запросы.
+        """
+        html = self.get(url, mode)
+        if html is None:
+            return None
+        path = self.directory / "replay" / f"{self.key(url, mode)}.html"
+        self._write(path, (_OFFLINE_CSP + html).encode("utf-8"))
+        return path.resolve().as_uri()
+
+
+html_cache = HtmlCache(HTML_CACHE_DIR, HTML_CACHE_TTL, HTML_CACHE_MAX_MB * 1024 * 1024, replay=HTML_CACHE_REPLAY)
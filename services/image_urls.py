@@ -0,0 +1,75 @@
+# services/image_urls.py
+"""
+Классификация и нормализация ссылок на изображения товаров (Ozon, WB).
+
+Одна функция за один проход по ссылке определяет, изображение ли это товара,
+годится ли оно для публикации, его качество и ссылку на максимальное разрешение.
+is_good_image_url, is_valid_product_image и improve_image_quality в parser_ozon —
+тонкие обёртки над ней, поэтому их правила совпадают.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+_SCHEME_RE = re.compile(r"^(?:https?:)?//", re.IGNORECASE)
+# Видео, обложки, логотипы и заглушки; слово не должно быть частью другого слова (silicone ≠ icon)
+_BAD_RE = re.compile(
+    r"(?<![a-z])(?:video|cover|logo|icon|avatar|placeholder|blank|loading)|\.(?:mp4|webm|avi)\b",
+    re.IGNORECASE,
+)
+_EXTENSION_RE = re.compile(r"\.(?:jpe?g|png|webp|gif)\b", re.IGNORECASE)
+# CDN Ozon, который отдаёт любое разрешение по сегменту размера в пути
+_OZON_CDN_RE = re.compile(r"ozone\.ru|/multimedia|/ir-", re.IGNORECASE)
+# Сегмент размера: /wc250/, /w100/, /ww50/
+_SIZE_RE = re.compile(r"/(wc|ww|w)(\d+)/", re.IGNORECASE)
+
+BEST_SIZE = 1000
+SMALL_SIZE = 200  # и меньше — миниатюры: отклоняются, даже если CDN отдаст их в большем размере
+
+TIER_SMALL = 0
+TIER_MEDIUM = 1
+TIER_LARGE = 2
+
+
+class ImageUrl(NamedTuple):
+    url: str          # исходная ссылка
+    best: str         # ссылка на максимальное разрешение (для CDN Ozon), иначе исходная
+    is_image: bool    # похоже на изображение товара: ссылка со схемой или //, не видео, не логотип,
+                      # не заглушка и не миниатюра
+    is_product: bool  # годится для публикации: изображение с расширением
+    tier: int         # качество best: TIER_SMALL (миниатюра) / TIER_MEDIUM / TIER_LARGE
+
+
+@lru_cache(maxsize=4096)
+def classify_image_url(url: str) -> ImageUrl:
+    if not url:
+        return ImageUrl(url or "", url or "", False, False, TIER_SMALL)
+
+    is_ozon = _OZON_CDN_RE.search(url) is not None
+    best = url
+    tier = TIER_LARGE  # без сегмента размера CDN отдаёт оригинал
+
+    size_match = _SIZE_RE.search(url)
+    if size_match:
+        size = int(size_match.group(2))
+        # Миниатюра остаётся миниатюрой: размер проверяется до переписывания на BEST_SIZE
+        thumbnail = size <= SMALL_SIZE
+        if is_ozon and size < BEST_SIZE:
+            prefix = "w" if size_match.group(1).lower() == "w" else "wc"
+            best = f"{url[:size_match.start()]}/{prefix}{BEST_SIZE}/{url[size_match.end():]}"
+            size = BEST_SIZE
+        tier = TIER_SMALL if thumbnail else TIER_MEDIUM if size < BEST_SIZE else TIER_LARGE
+
+    has_extension = _EXTENSION_RE.search(url) is not None
+    is_image = (
+        _SCHEME_RE.match(url) is not None
+        and _BAD_RE.search(url) is None
+        and (has_extension or is_ozon)
+        and tier != TIER_SMALL
+    )
+    return ImageUrl(url, best, is_image, is_image and has_extension, tier)
+
+
+def classify_image_urls(urls) -> list[ImageUrl]:
+    """Классифицирует пачку ссылок (повторяющиеся ссылки берутся из кэша)."""
+    return [classify_image_url(url) for url in urls]
@@ -173,6 +173,116 @@ CACHE_MISSES = Counter(
     ['cache_type']
 )
 
+# Метрики пула Chrome WebDriver
+DRIVER_POOL_SIZE = Gauge(
+    'chrome_driver_pool_size',
+    'Number of Chrome drivers in the pool',
+    ['pool', 'state']  # idle/busy
+)
+
+DRIVER_POOL_CHECKOUTS = Counter(
+    'chrome_driver_pool_checkouts_total',
+    'Driver checkouts from the pool',
+    ['pool', 'result']  # hit - тёплый драйвер, miss - запуск нового
+)
+
+DRIVER_POOL_WAIT = Histogram(
+    'chrome_driver_pool_wait_seconds',
+    'Time spent waiting for a free driver',
+    ['pool'],
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+
+DRIVER_POOL_RECYCLED = Counter(
+    'chrome_driver_pool_recycled_total',
+    'Drivers closed by the pool',
+    ['pool', 'reason']  # pages/age/unhealthy/shutdown
+)
+
+# Схлопывание одинаковых параллельных запросов (single-flight)
+SINGLE_FLIGHT_COALESCED = Counter(
+    'single_flight_coalesced_total',
+    'Requests that waited for an in-flight call instead of starting their own',
+    ['flight', 'scope']  # scope: local - в этом процессе, remote - на другой реплике
+)
+
+# Шаги ожидания готовности страниц в Selenium
+PAGE_READY_STEP = Histogram(
+    'page_ready_step_seconds',
+    'Time spent waiting for a page readiness step',
+    ['page', 'step', 'outcome'],  # outcome: ready/timeout
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0)
+)
+
+# Ступенчатая загрузка через ZenRows: расход кредитов и задержка по режимам
+ZENROWS_CREDITS = Counter(
+    'zenrows_credits_total',
+    'ZenRows credits spent on successful requests',
+    ['endpoint', 'tier']  # tier: basic/js/premium
+)
+
+ZENROWS_TIER_LATENCY = Histogram(
+    'zenrows_tier_fetch_seconds',
+    'ZenRows request latency per fetch tier',
+    ['endpoint', 'tier', 'outcome'],  # outcome: complete/incomplete/error
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 90.0)
+)
+
+# Этапы конвейера подготовки постов (discover/parse/generate/sink)
+PIPELINE_STAGE_LATENCY = Histogram(
+    'pipeline_stage_seconds',
+    'Time spent on one item in a post pipeline stage',
+    ['pipeline', 'stage', 'outcome'],  # outcome: ok/dropped/error
+    buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+)
+
+# Пул готовых постов для пустых слотов
+CANDIDATE_POOL_DEPTH = Gauge(
+    'candidate_pool_depth',
+    'Fresh prepared posts waiting in the candidate pool'
+)
+
+CANDIDATE_POOL_OLDEST_AGE = Gauge(
+    'candidate_pool_oldest_age_seconds',
+    'Age of the oldest fresh post in the candidate pool'
+)
+
+# Товары, пропущенные автопостингом как недавно опубликованные
+REPOST_SKIPPED = Counter(
+    'repost_skipped_total',
+    'Candidates skipped because the product was published within the cooldown',
+    ['source']
+)
+
+# Дисковый кэш сырого HTML
+HTML_CACHE_REQUESTS = Counter(
+    'html_cache_requests_total',
+    'Raw HTML cache lookups',
+    ['mode', 'result']  # result: hit/miss/expired
+)
+
+# Запросы к OpenAI: задержка, токены и ожидание в лимитере RPM/TPM
+OPENAI_LATENCY = Histogram(
+    'openai_request_seconds',
+    'OpenAI request latency',
+    ['endpoint', 'priority', 'outcome'],  # priority: user/background
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0)
+)
+
+OPENAI_TOKENS = Histogram(
+    'openai_request_tokens',
+    'Tokens used by one OpenAI request',
+    ['endpoint', 'kind'],  # kind: prompt/completion
+    buckets=(25, 50, 100, 200, 400, 800, 1600, 3200)
+)
+
+OPENAI_LIMITER_WAIT = Histogram(
+    'openai_limiter_wait_seconds',
+    'Time a request waited for the OpenAI rate limiter',
+    ['priority'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+)
+
 
 # ========== ДЕКОРАТОРЫ ==========
 
@@ -363,6 +473,66 @@ def record_cache_access(cache_type: str, hit: bool):
         CACHE_MISSES.labels(cache_type=cache_type).inc()
 
 
+def record_driver_checkout(pool: str, hit: bool, wait: float):
+    """Записывает выдачу драйвера из пула"""
+    DRIVER_POOL_CHECKOUTS.labels(pool=pool, result="hit" if hit else "miss").inc()
+    DRIVER_POOL_WAIT.labels(pool=pool).observe(wait)
+
+
+def set_driver_pool_size(pool: str, idle: int, busy: int):
+    """Обновляет текущий размер пула драйверов"""
+    DRIVER_POOL_SIZE.labels(pool=pool, state="idle").set(idle)
+    DRIVER_POOL_SIZE.labels(pool=pool, state="busy").set(busy)
+
+
+def record_page_step(page: str, step: str, outcome: str, duration: float):
+    """Записывает длительность шага ожидания готовности страницы"""
+    PAGE_READY_STEP.labels(page=page, step=step, outcome=outcome).observe(duration)
+
+
+def record_zenrows_fetch(endpoint: str, tier: str, outcome: str, credits: int, duration: float):
+    """Записывает запрос ZenRows в одном из режимов ступенчатой загрузки"""
+    if credits:
+        ZENROWS_CREDITS.labels(endpoint=endpoint, tier=tier).inc(credits)
+    ZENROWS_TIER_LATENCY.labels(endpoint=endpoint, tier=tier, outcome=outcome).observe(duration)
+
+
+def record_pipeline_stage(pipeline: str, stage: str, outcome: str, duration: float):
+    """Записывает обработку элемента этапом конвейера"""
+    PIPELINE_STAGE_LATENCY.labels(pipeline=pipeline, stage=stage, outcome=outcome).observe(duration)
+
+
+def record_candidate_pool(depth: int, oldest_age: float):
+    """Обновляет глубину пула готовых постов и возраст самого старого"""
+    CANDIDATE_POOL_DEPTH.set(depth)
+    CANDIDATE_POOL_OLDEST_AGE.set(oldest_age)
+
+
+def record_repost_skipped(source: str):
+    """Записывает пропуск недавно опубликованного товара"""
+    REPOST_SKIPPED.labels(source=source).inc()
+
+
+def record_html_cache(mode: str, result: str):
+    """Записывает обращение к дисковому кэшу HTML"""
+    HTML_CACHE_REQUESTS.labels(mode=mode, result=result).inc()
+
+
+def record_openai_request(endpoint: str, priority: str, outcome: str, duration: float,
+                          prompt_tokens: int | None = None, completion_tokens: int | None = None):
+    """Записывает запрос к OpenAI: задержку и, если известны, токены запроса и ответа"""
+    OPENAI_LATENCY.labels(endpoint=endpoint, priority=priority, outcome=outcome).observe(duration)
+    if prompt_tokens is not None:
+        OPENAI_TOKENS.labels(endpoint=endpoint, kind="prompt").observe(prompt_tokens)
+    if completion_tokens is not None:
+        OPENAI_TOKENS.labels(endpoint=endpoint, kind="completion").observe(completion_tokens)
+
+
+def record_openai_wait(priority: str, wait: float):
+    """Записывает ожидание запроса к OpenAI в лимитере"""
+    OPENAI_LIMITER_WAIT.labels(priority=priority).observe(wait)
+
+
 # ========== ИНИЦИАЛИЗАЦИЯ ==========
 
 def start_prometheus_server(port: int = 8000):
@@ -0,0 +1,316 @@
+# services/openai_client.py
+import asyncio
+import heapq
+import itertools
+import time
+
+import aiohttp
+import openai
+
+from config import (
+    OPENAI_API_KEY,
+    OPENAI_CONCURRENCY,
+    OPENAI_MAX_RETRIES,
+    OPENAI_MODEL,
+    OPENAI_RPM,
+    OPENAI_TIMEOUT,
+    OPENAI_TPM,
+)
+from services.metrics import record_api_call, record_openai_request, record_openai_wait
+from services.zenrows_client import backoff_delay
+from logs import get_logger
+
+logger = get_logger("openai_client")
+
+# Ошибки, после которых имеет смысл повторить запрос (таймаут, rate limit, сбой на стороне OpenAI)
+RETRYABLE_ERRORS = (
+    openai.error.Timeout,
+    openai.error.TryAgain,
+    openai.error.APIConnectionError,
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError,
+    openai.error.APIError,
+)
+
+# Очереди лимитера: запросы пользователей бота обслуживаются раньше фоновых (автопостинг, пул)
+PRIORITY_USER = "user"
+PRIORITY_BACKGROUND = "background"
+_PRIORITY_ORDER = {PRIORITY_USER: 0, PRIORITY_BACKGROUND: 1}
+
+
+class OpenAIRequestError(Exception):
+    """Запрос к OpenAI не удался после всех попыток."""
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """Грубая оценка токенов промпта (кириллица — около 2 символов на токен)."""
+    return sum(len(message["content"]) // 2 + 4 for message in messages)
+
+
+class RateLimiter:
+    """
+    Лимитер запросов к OpenAI: два token bucket (запросы и токены в минуту) и лимит одновременных запросов.
+
+    Ожидающие выстраиваются в очередь по приоритету, внутри приоритета — по порядку прихода:
+    фоновый запрос не обгонит пользовательский, даже если для него уже хватает токенов.
+    Токены резервируются по оценке и уточняются по usage из ответа (release).
+    """
+
+    def __init__(self, rpm: int, tpm: int, concurrency: int):
+        self.rpm = max(1, rpm)
+        self.tpm = max(1, tpm)
+        self.concurrency = max(1, concurrency)
+        self._reset(None)
+
+    def _reset(self, loop):
+        self._loop = loop
+        self._requests = float(self.rpm)
+        self._tokens = float(self.tpm)
+        self._updated = time.monotonic()
+        self._active = 0
+        self._waiters: list[tuple[int, int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int, priority: str = PRIORITY_BACKGROUND) -> int:
+        """
+        Ждёт своей очереди и резервирует запрос и tokens токенов.
+        :return: сколько токенов зарезервировано (передаётся в release).
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._reset(loop)
+
+        # Запрос больше всего ведра иначе не прошёл бы никогда
+        tokens = min(tokens, self.tpm)
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (_PRIORITY_ORDER.get(priority, 1), next(self._seq), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(tokens)  # место выдано, но ожидающий уже отменён
+            self._dispatch()
+            raise
+        return tokens
+
+    def release(self, reserved: int, used: int | None = None):
+        """Освобождает место; used — фактический расход токенов по ответу OpenAI."""
+        self._active -= 1
+        if used is not None:
+            self._tokens = min(self.tpm, self._tokens + reserved - used)
+        self._dispatch()
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill()
+
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._active >= self.concurrency:
+                return  # следующий release снова вызовет _dispatch
+            if self._requests < 1 or self._tokens < tokens:
+                delay = max((1 - self._requests) * 60 / self.rpm, (tokens - self._tokens) * 60 / self.tpm)
+                self._timer = self._loop.call_later(max(delay, 0.01), self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._requests -= 1
+            self._tokens -= tokens
+            self._active += 1
+            future.set_result(None)
+
+
+def _usage(response) -> tuple[int | None, int | None]:
+    usage = getattr(response, "usage", None)
+    prompt, completion = getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+    if isinstance(prompt, int) and isinstance(completion, int):
+        return prompt, completion
+    return None, None
+
+
+class OpenAIClient:
+    """
+    Асинхронный клиент OpenAI с общим keep-alive пулом соединений.
+
+    Все запросы идут через ChatCompletion.acreate на общей aiohttp-сессии (openai.aiosession),
+    ожидание ответа и пауза между повторами не блокируют event loop.
+    Перед каждой попыткой запрос проходит лимитер RPM/TPM, поэтому всплеск нажатий
+    не превращается в 429 от OpenAI, а запросы пользователей идут раньше фоновых.
+    Отмена корутины (например, конвейером) прерывает и сам HTTP-запрос.
+    """
+
+    def __init__(self, api_key: str, model: str, timeout: float = OPENAI_TIMEOUT,
+                 max_retries: int = OPENAI_MAX_RETRIES, limiter: RateLimiter | None = None):
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = limiter or RateLimiter(OPENAI_RPM, OPENAI_TPM, OPENAI_CONCURRENCY)
+        self._session: aiohttp.ClientSession | None = None
+        self._loop = None
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # Сессия привязана к event loop, поэтому создаётся при первом запросе
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.limiter.concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+        return self._session
+
+    async def chat(self, messages: list[dict], *, max_tokens: int, temperature: float = 0.7,
+                   endpoint: str = "chat", priority: str = PRIORITY_BACKGROUND) -> str:
+        """Отправляет диалог в ChatCompletion и возвращает текст ответа (см. chat_variants)."""
+        variants = await self.chat_variants(messages, n=1, max_tokens=max_tokens, temperature=temperature,
+                                            endpoint=endpoint, priority=priority)
+        return variants[0]
+
+    async def chat_variants(self, messages: list[dict], *, n: int, max_tokens: int, temperature: float = 0.7,
+                            endpoint: str = "chat", priority: str = PRIORITY_BACKGROUND) -> list[str]:
+        """
+        Запрашивает n вариантов ответа одним запросом (параметр n) и возвращает их тексты.
+
+        :param max_tokens: лимит на каждый вариант.
+        :param endpoint: метка запроса в метриках (description, ...).
+        :param priority: очередь лимитера — PRIORITY_USER или PRIORITY_BACKGROUND.
+        :raises OpenAIRequestError: если все попытки неудачны по таймауту или временной ошибке.
+        Прочие ошибки OpenAI (ключ, некорректный запрос) пробрасываются сразу, без повторов.
+        """
+        # ContextVar: значение действует только в текущей задаче, поэтому ставится на каждый запрос
+        openai.aiosession.set(self._ensure_session())
+        estimated = estimate_tokens(messages) + max_tokens * n
+        attempt = 0
+
+        while True:
+            attempt += 1
+            wait_start = time.monotonic()
+            reserved = await self.limiter.acquire(estimated, priority)
+            record_openai_wait(priority, time.monotonic() - wait_start)
+
+            start = time.monotonic()
+            rate_limited = False
+            used = None
+            try:
+                response = await asyncio.wait_for(
+                    openai.ChatCompletion.acreate(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        n=n,
+                        api_key=self.api_key,
+                        request_timeout=self.timeout,
+                    ),
+                    timeout=self.timeout,
+                )
+                texts = [choice.message.content.strip() for choice in response.choices]
+                prompt_tokens, completion_tokens = _usage(response)
+                if prompt_tokens is not None:
+                    used = prompt_tokens + completion_tokens
+                duration = time.monotonic() - start
+                record_api_call("openai", endpoint, "ok", duration)
+                record_openai_request(endpoint, priority, "ok", duration, prompt_tokens, completion_tokens)
+                return texts
+            except asyncio.TimeoutError:
+                record_api_call("openai", endpoint, "timeout", time.monotonic() - start)
+                record_openai_request(endpoint, priority, "timeout", time.monotonic() - start)
+                error = OpenAIRequestError(f"Таймаут запроса к OpenAI ({self.timeout} сек.)")
+                logger.warning(f"⏰ Таймаут OpenAI на попытке {attempt}")
+            except RETRYABLE_ERRORS as e:
+                record_api_call("openai", endpoint, type(e).__name__, time.monotonic() - start)
+                record_openai_request(endpoint, priority, "error", time.monotonic() - start)
+                error = OpenAIRequestError(f"Временная ошибка OpenAI: {e}")
+                rate_limited = isinstance(e, openai.error.RateLimitError)
+                logger.warning(f"⚠️ Ошибка OpenAI на попытке {attempt}: {e}")
+            except openai.error.OpenAIError as e:
+                record_api_call("openai", endpoint, type(e).__name__, time.monotonic() - start)
+                record_openai_request(endpoint, priority, "error", time.monotonic() - start)
+                raise
+            finally:
+                self.limiter.release(reserved, used)
+
+            if attempt > self.max_retries:
+                logger.error(f"❌ OpenAI: повторы исчерпаны после {attempt} попыток")
+                raise error
+
+            delay = backoff_delay(attempt, base=5.0 if rate_limited else 1.0)
+            logger.info(f"⏳ Ждем {delay:.1f} сек. перед следующей попыткой...")
+            await asyncio.sleep(delay)
+
+    async def chat_stream_variants(self, messages: list[dict], *, n: int, max_tokens: int, temperature: float = 0.7,
+                                   endpoint: str = "chat", priority: str = PRIORITY_BACKGROUND):
+        """
+        Потоковый вариант chat_variants: асинхронно выдаёт пары (номер варианта, фрагмент текста)
+        по мере генерации (stream=True).
+
+        Таймаут действует на ожидание каждого фрагмента. Повторов нет: часть текста уже показана
+        пользователю, поэтому при ошибке вызывающий сам решает, генерировать ли заново.
+        :raises OpenAIRequestError: таймаут ожидания фрагмента.
+        """
+        openai.aiosession.set(self._ensure_session())
+        reserved = await self.limiter.acquire(estimate_tokens(messages) + max_tokens * n, priority)
+        start = time.monotonic()
+        first_chunk = None
+        try:
+            stream = await asyncio.wait_for(
+                openai.ChatCompletion.acreate(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    n=n,
+                    stream=True,
+                    api_key=self.api_key,
+                    request_timeout=self.timeout,
+                ),
+                timeout=self.timeout,
+            )
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(stream), timeout=self.timeout)
+                except StopAsyncIteration:
+                    break
+                for choice in chunk["choices"]:
+                    text = choice["delta"].get("content")
+                    if text:
+                        if first_chunk is None:
+                            first_chunk = time.monotonic() - start
+                            logger.info(f"⚡ Первый фрагмент ответа OpenAI через {first_chunk:.2f} сек.")
+                        yield choice["index"], text
+        except asyncio.TimeoutError:
+            record_openai_request(endpoint, priority, "timeout", time.monotonic() - start)
+            raise OpenAIRequestError(f"Таймаут потокового ответа OpenAI ({self.timeout} сек.)")
+        except openai.error.OpenAIError:
+            record_openai_request(endpoint, priority, "error", time.monotonic() - start)
+            raise
+        finally:
+            self.limiter.release(reserved)
+
+        record_api_call("openai", endpoint, "ok", time.monotonic() - start)
+        record_openai_request(endpoint, priority, "ok", time.monotonic() - start)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Общий клиент: бот и автопостинг генерируют описания одной моделью через один пул соединений и лимитер
+openai_client = OpenAIClient(OPENAI_API_KEY, OPENAI_MODEL)
+
+
+async def close_openai_client():
+    await openai_client.close()
+    logger.info("🛑 Клиент OpenAI закрыт")
@@ -0,0 +1,73 @@
+# services/ozon_page.py
+import json
+from collections import defaultdict
+
+from services.html_backend import HtmlNode, parse_html
+from logs import get_logger
+
+logger = get_logger("ozon_page")
+
+# Всё, что экстракторы берут не из вёрстки, а из служебных блоков, собирается за один обход дерева
+_INDEX_SELECTOR = "meta[content], script[type='application/ld+json'], [data-widget]"
+
+
+class OzonPage:
+    """
+    Страница Ozon, разобранная один раз.
+
+    При создании за один обход дерева собираются meta-теги (OpenGraph, twitter, itemprop),
+    JSON-LD (уже декодированный) и блоки data-widget. Экстракторы полей читают их отсюда,
+    а к дереву обращаются только за вёрсткой, которой нет в этих блоках.
+    """
+
+    def __init__(self, html: str, backend: str | None = None):
+        self._index(parse_html(html, backend))
+
+    @classmethod
+    def from_root(cls, root: HtmlNode) -> "OzonPage":
+        """Страница по уже разобранному дереву."""
+        page = cls.__new__(cls)
+        page._index(root)
+        return page
+
+    def _index(self, root: HtmlNode):
+        self.root = root
+        self.meta: dict[str, list[str]] = defaultdict(list)
+        self.json_ld: list[dict] = []
+        self.widgets: dict[str, list[HtmlNode]] = defaultdict(list)
+
+        for node in root.select(_INDEX_SELECTOR):
+            widget = node.attr("data-widget")
+            if widget:
+                self.widgets[widget].append(node)
+
+            if node.tag == "meta":
+                key = node.attr("property") or node.attr("name") or node.attr("itemprop")
+                if key:
+                    self.meta[key].append(node.attr("content"))
+            elif node.tag == "script":
+                self._add_json_ld(node.text())
+
+    def _add_json_ld(self, text: str):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            logger.debug("Не удалось разобрать JSON-LD")
+            return
+        items = data if isinstance(data, list) else [data]
+        self.json_ld.extend(item for item in items if isinstance(item, dict))
+
+    def widget(self, name: str) -> HtmlNode | None:
+        """Первый блок data-widget с точным именем."""
+        nodes = self.widgets.get(name)
+        return nodes[0] if nodes else None
+
+    def widgets_containing(self, part: str) -> list[HtmlNode]:
+        """Блоки data-widget, имя которых содержит part (аналог [data-widget*='part'])."""
+        return [node for name, nodes in self.widgets.items() if part in name for node in nodes]
+
+    def select(self, css: str) -> list[HtmlNode]:
+        return self.root.select(css)
+
+    def select_one(self, css: str) -> HtmlNode | None:
+        return self.root.select_one(css)
@@ -0,0 +1,89 @@
+# services/page_readiness.py
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from services.metrics import record_page_step
+from services.parse_executor import check_cancelled
+from logs import get_logger
+
+logger = get_logger("page_readiness")
+
+# Количество загруженных ресурсов страницы (по Performance API)
+_RESOURCE_COUNT_JS = "return performance.getEntriesByType('resource').length;"
+
+
+# ---------- условия ожидания ----------
+
+def dom_ready(driver) -> bool:
+    """DOM построен (DOMContentLoaded) — страница готова к поиску элементов."""
+    return driver.execute_script("return document.readyState") in ("interactive", "complete")
+
+
+def any_element_present(selectors: list[str]):
+    """Появился хотя бы один элемент по любому из CSS-селекторов; возвращает первый найденный."""
+
+    def condition(driver):
+        for selector in selectors:
+            elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                return elements[0]
+        return False
+
+    return condition
+
+
+def network_idle(idle_seconds: float = 0.5):
+    """
+    Сеть «успокоилась»: за idle_seconds не появилось новых загруженных ресурсов.
+    Каждый вызов создаёт новое условие со своим состоянием.
+    """
+    state = {"count": None, "since": 0.0}
+
+    def condition(driver):
+        count = driver.execute_script(_RESOURCE_COUNT_JS)
+        now = time.monotonic()
+        if count != state["count"]:
+            state["count"], state["since"] = count, now
+            return False
+        return now - state["since"] >= idle_seconds
+
+    return condition
+
+
+# ---------- движок ожидания ----------
+
+class PageReadiness:
+    """
+    Ожидание готовности страницы по шагам вместо фиксированных пауз.
+
+    Каждый шаг ждёт условие (DOM, элемент, простой сети) не дольше своего бюджета
+    и записывает фактическое время в гистограмму page_ready_step_seconds.
+    Если бюджет исчерпан, шаг возвращает None, а парсинг продолжается.
+    """
+
+    def __init__(self, driver, page: str, poll_frequency: float = 0.1):
+        self.driver = driver
+        self.page = page
+        self.poll_frequency = poll_frequency
+
+    def step(self, name: str, condition, budget: float):
+        """Ждёт condition(driver) не дольше budget секунд. Возвращает результат условия или None."""
+
+        def cancellable(driver):
+            check_cancelled()
+            return condition(driver)
+
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, budget, poll_frequency=self.poll_frequency).until(cancellable)
+            outcome = "ready"
+        except TimeoutException:
+            result = None
+            outcome = "timeout"
+        elapsed = time.monotonic() - start
+        record_page_step(self.page, name, outcome, elapsed)
+        logger.debug(f"⏱️ Шаг '{name}' ({self.page}): {outcome} за {elapsed:.2f} сек.")
+        return result
@@ -0,0 +1,158 @@
+# services/parse_executor.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from config import CHROME_POOL_SIZE, PARSER_HTTP_WORKERS
+from logs import get_logger
+
+logger = get_logger("parse_executor")
+
+# Selenium-задачи: сам Chrome работает в отдельном процессе, а поток лишь ждёт ответы chromedriver,
+# поэтому пула потоков размером с пул драйверов достаточно
+CHROME_EXECUTOR = ThreadPoolExecutor(max_workers=CHROME_POOL_SIZE, thread_name_prefix="chrome-parser")
+# Потоковые каталоги: генератор сам берёт драйвер из пула и может ждать его в потоке,
+# поэтому у него свой пул — ожидающие каталоги не занимают потоки задач, держащих драйверы
+CATALOG_EXECUTOR = ThreadPoolExecutor(max_workers=CHROME_POOL_SIZE, thread_name_prefix="catalog-parser")
+# HTTP-задачи (ZenRows) и разбор HTML
+HTTP_EXECUTOR = ThreadPoolExecutor(max_workers=PARSER_HTTP_WORKERS, thread_name_prefix="http-parser")
+
+_EXECUTORS = {
+    "chrome": CHROME_EXECUTOR,
+    "catalog": CATALOG_EXECUTOR,
+    "http": HTTP_EXECUTOR,
+}
+
+_job_state = threading.local()
+
+# Маркер конца потока элементов iter_parser_job
+_DONE = object()
+
+
+class ParserJobCancelled(Exception):
+    """Задача парсинга отменена (таймаут или отмена вызывающей корутины)."""
+
+
+def check_cancelled():
+    """Прерывает текущую задачу парсинга, если её отменили. Вне задач ничего не делает."""
+    event = getattr(_job_state, "cancel_event", None)
+    if event is not None and event.is_set():
+        raise ParserJobCancelled("Задача парсинга отменена")
+
+
+def job_sleep(seconds: float):
+    """Аналог time.sleep, который прерывается при отмене задачи."""
+    event = getattr(_job_state, "cancel_event", None)
+    if event is None:
+        threading.Event().wait(seconds)
+        return
+    if event.wait(seconds):
+        raise ParserJobCancelled("Задача парсинга отменена")
+
+
+async def run_parser_job(func, *args, kind: str = "http", timeout: float | None = None, on_cancel=None, **kwargs):
+    """
+    Выполняет синхронную функцию парсинга в выделенном пуле, не блокируя event loop.
+
+    :param kind: "chrome" для Selenium, "catalog" для каталогов, которые сами берут драйвер,
+                 "http" для запросов и разбора HTML.
+    :param timeout: предельное время задачи в секундах; по истечении — asyncio.TimeoutError.
+    :param on_cancel: синхронный колбэк, прерывающий зависшую операцию (например, driver.quit).
+    """
+    cancel_event = threading.Event()
+
+    def runner():
+        _job_state.cancel_event = cancel_event
+        try:
+            check_cancelled()
+            return func(*args, **kwargs)
+        finally:
+            _job_state.cancel_event = None
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_EXECUTORS[kind], runner)
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+        cancel_event.set()
+        reason = "таймаут" if isinstance(e, asyncio.TimeoutError) else "отмена"
+        logger.warning(f"⏹️ Задача {getattr(func, '__name__', func)} ({kind}) прервана: {reason}")
+        if on_cancel is not None:
+            loop.run_in_executor(None, on_cancel)
+        raise
+
+
+async def iter_parser_job(func, *args, kind: str = "http", timeout: float | None = None, **kwargs):
+    """
+    Асинхронный итератор по синхронному генератору func(*args, **kwargs), выполняемому в пуле парсеров.
+
+    Элементы передаются потребителю по мере появления. Если потребитель прекратил итерацию
+    (break, aclose) или истёк timeout всей задачи, генератор останавливается в ближайшей
+    точке check_cancelled()/job_sleep() и закрывается (его finally освобождает ресурсы).
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancel_event = threading.Event()
+
+    def runner():
+        _job_state.cancel_event = cancel_event
+        error = None
+        try:
+            with closing(func(*args, **kwargs)) as items:
+                for item in items:
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+                    check_cancelled()
+        except Exception as e:  # в т.ч. ParserJobCancelled: потребитель отличит остановку по таймауту
+            error = e
+        finally:
+            _job_state.cancel_event = None
+            loop.call_soon_threadsafe(queue.put_nowait, (_DONE, error))
+
+    loop.run_in_executor(_EXECUTORS[kind], runner)
+    name = getattr(func, "__name__", func)
+    # Таймаут ограничивает работу генератора в потоке, а не время потребителя между элементами:
+    # по истечении генератор останавливается, уже выданные элементы потребитель дочитывает.
+    deadline = None if timeout is None else loop.time() + timeout
+    timed_out = False  # генератор остановлен таймером, а не завершился сам
+
+    def stop_producer():
+        nonlocal timed_out
+        timed_out = True
+        cancel_event.set()
+
+    stop_timer = None if timeout is None else loop.call_later(timeout, stop_producer)
+    try:
+        while True:
+            try:
+                item, error = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = None if deadline is None else deadline - loop.time()
+                try:
+                    if remaining is not None and remaining <= 0:
+                        raise asyncio.TimeoutError()  # буфер пуст, а генератор так и не завершился
+                    item, error = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    logger.warning(f"⏹️ Задача {name} ({kind}) прервана: таймаут")
+                    raise
+            if item is _DONE:
+                if isinstance(error, ParserJobCancelled):
+                    if timed_out:
+                        logger.warning(f"⏹️ Задача {name} ({kind}) прервана: таймаут")
+                        raise asyncio.TimeoutError()
+                    return
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        cancel_event.set()
+        if stop_timer is not None:
+            stop_timer.cancel()
+
+
+def shutdown_parser_executors():
+    """Останавливает пулы парсеров, отменяя ещё не начатые задачи."""
+    for executor in _EXECUTORS.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    logger.info("🛑 Пулы парсеров остановлены")
@@ -1,12 +1,29 @@
 # -*- coding: utf-8 -*-
 # parser.py
-import time
+import random
+import re
 import traceback
 
 from selenium.webdriver.common.by import By
 
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from config import (
+    CHROME_POOL_SIZE,
+    CHROME_DRIVER_MAX_PAGES,
+    CHROME_DRIVER_MAX_AGE_MINUTES,
+    CHROME_POOL_CHECKOUT_TIMEOUT,
+    WB_PARSE_TIMEOUT,
+    WB_CATALOG_TIMEOUT,
+    WB_DRIVER_PROFILE,
+    WB_CAPTURE_JSON,
+    WB_CATALOG_MAX_SCROLLS,
+)
+from services.driver_pool import DriverPool
+from services.html_cache import html_cache
+from services.page_readiness import PageReadiness, any_element_present, dom_ready, network_idle
+from services.parse_executor import ParserJobCancelled, iter_parser_job, run_parser_job, check_cancelled
+from services.wb_network import WbResponseCollector
 from logs import get_logger
 
 logger = get_logger("parser")
@@ -16,8 +33,26 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 
 
-def get_chrome_driver() -> webdriver.Chrome:
-    logger.info("🚗 Инициализация Chrome WebDriver...")
+# Профили драйвера: "default" грузит страницу целиком, "fast" — только то, что нужно селекторам
+DRIVER_PROFILES = ("default", "fast")
+
+# В профиле "fast" не загружаются картинки, шрифты, видео и сторонняя аналитика.
+# URL картинок селекторы берут из атрибута src, поэтому сами файлы не нужны.
+FAST_PROFILE_BLOCKED_URLS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.m3u8",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*mc.yandex.ru*", "*top-fwz1.mail.ru*", "*vk.com/rtrg*", "*facebook.net*",
+    "*criteo.com*", "*mediator.media*",
+]
+
+
+def get_chrome_driver(profile: str = "default") -> webdriver.Chrome:
+    if profile not in DRIVER_PROFILES:
+        raise ValueError(f"Неизвестный профиль драйвера: {profile}")
+
+    logger.info(f"🚗 Инициализация Chrome WebDriver (профиль: {profile})...")
     chrome_options = Options()
 
     chrome_options.add_argument("--headless=new")
@@ -31,11 +66,25 @@ def get_chrome_driver() -> webdriver.Chrome:
         "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
     )
 
+    if profile == "fast":
+        # eager: driver.get возвращается после DOMContentLoaded, не дожидаясь картинок и аналитики
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_experimental_option(
+            "prefs", {"profile.managed_default_content_settings.images": 2}
+        )
+
+    if WB_CAPTURE_JSON:
+        # performance-лог с событиями сети: из него берутся JSON карточки товара
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
     service = Service("/usr/bin/chromedriver")
     # service = Service("C:\\Users\\umita\\PycharmProjects\\scan_dir\\Downloads\\chromedriver-win64\\chromedriver.exe")
 
     try:
         driver = webdriver.Chrome(service=service, options=chrome_options)
+        if profile == "fast":
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": FAST_PROFILE_BLOCKED_URLS})
         logger.info("✅ Chrome WebDriver успешно инициализирован")
         return driver
     except Exception as e:
@@ -44,24 +93,105 @@ def get_chrome_driver() -> webdriver.Chrome:
         raise
 
 
-def parse_product(url: str) -> dict:
+WB_PRODUCT_ID_PATTERN = re.compile(r"/catalog/(\d+)")
+
+# Бюджеты шагов ожидания готовности страницы товара (секунды)
+READY_CONTENT_BUDGET = 15
+READY_SCROLL_BUDGET = 3
+READY_EXPAND_BUDGET = 3
+
+NAME_SELECTORS = [
+    "h3.mo-typography.productTitle--J2W7I",
+    "h1.productTitle--J2W7I",
+    "h3.productTitle--J2W7I",
+    "h1[data-link='text{:product^goodsName}']",
+    ".product-page__title",
+    "h1.product-page__title",
+    "[data-link*='goodsName']",
+    "h3[class*='productTitle']",
+    "h1[class*='productTitle']"
+]
+
+PRICE_SELECTORS = [
+    "ins.priceBlockFinalPrice--iToZR",
+    ".price-block__final-price",
+    "[data-link*='priceU']",
+    ".price",
+    ".product-page__price-block .price-block__final-price",
+    "ins.price"
+]
+
+CARD_SELECTORS = [
+    "a.product-card__link",
+    ".product-card a[href]",
+    "[data-link*='catalog'] a",
+    ".goods-tile a"
+]
+
+CARD_HREFS_JS = "return Array.from(document.querySelectorAll(arguments[0]), a => a.href);"
+
+# Общий пул драйверов: его ёмкость делят пользовательские ссылки и публикатор случайных товаров
+driver_pool = DriverPool(
+    get_chrome_driver,
+    size=CHROME_POOL_SIZE,
+    max_pages=CHROME_DRIVER_MAX_PAGES,
+    max_age_seconds=CHROME_DRIVER_MAX_AGE_MINUTES * 60,
+    checkout_timeout=CHROME_POOL_CHECKOUT_TIMEOUT,
+)
+
+
+def parse_product(url: str, driver: webdriver.Chrome = None, profile: str = WB_DRIVER_PROFILE) -> dict:
+    if driver is None:
+        with driver_pool.driver(profile=profile) as pooled_driver:
+            return parse_product(url, driver=pooled_driver)
+
     logger.info(f"🔍 Парсим товар WB: {url}")
-    driver = get_chrome_driver()
     try:
-        logger.debug(f"Открываем страницу: {url}")
-        driver.get(url)
-
-        # Попытка закрыть cookie-баннер
-        wait = WebDriverWait(driver, 20)
+        collector = None
+        page_url = url
+        if html_cache.replay:
+            # Повторное извлечение: страница открывается из кэша HTML, без обращения к WB
+            page_url = html_cache.replay_uri(url, "selenium")
+            if page_url is None:
+                logger.warning(f"⚠️ Страницы нет в кэше HTML (replay): {url}")
+                return None
+        else:
+            product_id = WB_PRODUCT_ID_PATTERN.search(url)
+            if WB_CAPTURE_JSON and product_id:
+                collector = WbResponseCollector(product_id.group(1))
+                collector.reset(driver)
+
+        logger.debug(f"Открываем страницу: {page_url}")
+        driver.get(page_url)
+        check_cancelled()
+
+        readiness = PageReadiness(driver, "wb_product")
+        readiness.step("dom", dom_ready, READY_CONTENT_BUDGET)
+
+        if collector is not None:
+            if readiness.step("json", collector, READY_CONTENT_BUDGET):
+                result = collector.build(url)
+                if result:
+                    html_cache.put(url, "selenium", driver.page_source)
+                    logger.info(f"✅ WB товар собран из JSON ответа: '{result['name'][:50]}...' | {result['price']}")
+                    return result
+            logger.info("ℹ️ JSON карточки не перехвачен, парсим DOM")
+
+        # Попытка закрыть cookie-баннер (у «тёплого» драйвера баннер обычно уже принят)
         try:
-            ok_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Окей')]")))
+            ok_button = WebDriverWait(driver, 3).until(
+                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Окей')]"))
+            )
             ok_button.click()
             logger.info("Cookie-баннер успешно закрыт.")
         except Exception:
             logger.debug("Cookie-баннер не найден или уже скрыт.")
 
-        time.sleep(5)  # Подождать, пока все прогрузится
-        logger.debug("Ожидание загрузки страницы (5 сек)")
+        # Ждём отрисовки карточки: название и цена появляются вместе с данными товара
+        readiness.step("title", any_element_present(NAME_SELECTORS), READY_CONTENT_BUDGET)
+        readiness.step("price", any_element_present(PRICE_SELECTORS), READY_SCROLL_BUDGET)
+        # Карточка уже отрисована: отсутствующий селектор не должен стоить полного таймаута
+        quick_wait = WebDriverWait(driver, 1)
 
         screenshot_path = "/mnt/data/wb_product_page.png"
         driver.save_screenshot(screenshot_path)
@@ -69,21 +199,10 @@ def parse_product(url: str) -> dict:
 
         try:
             logger.debug("Ищем название товара...")
-            name_selectors = [
-                "h3.mo-typography.productTitle--J2W7I",
-                "h1.productTitle--J2W7I",
-                "h3.productTitle--J2W7I",
-                "h1[data-link='text{:product^goodsName}']",
-                ".product-page__title",
-                "h1.product-page__title",
-                "[data-link*='goodsName']",
-                "h3[class*='productTitle']",
-                "h1[class*='productTitle']"
-            ]
             name = None
-            for selector in name_selectors:
+            for selector in NAME_SELECTORS:
                 try:
-                    name_element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+                    name_element = quick_wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
                     name = name_element.text.strip()
                     if name:
                         logger.info(f"✅ Название найдено (селектор: {selector}): {name[:50]}...")
@@ -100,7 +219,8 @@ def parse_product(url: str) -> dict:
             logger.error(f"❌ Ошибка при поиске названия: {e}")
 
         logger.debug("Извлекаем цену...")
-        price = extract_price(wait)
+        price = extract_price(quick_wait)
+        check_cancelled()
 
         # Описание - УЛУЧШЕННАЯ ВЕРСИЯ
         try:
@@ -108,7 +228,7 @@ def parse_product(url: str) -> dict:
 
             # Прокручиваем вниз для загрузки контента
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight / 2);")
-            time.sleep(2)
+            readiness.step("scroll", network_idle(), READY_SCROLL_BUDGET)
             logger.debug("Прокрутили страницу вниз для загрузки контента")
 
             # Ищем и кликаем на все возможные кнопки раскрытия
@@ -126,10 +246,9 @@ def parse_product(url: str) -> dict:
                     for button in buttons:
                         try:
                             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-                            time.sleep(0.5)
                             driver.execute_script("arguments[0].click();", button)
                             logger.info(f"✅ Кликнули по кнопке: {pattern}")
-                            time.sleep(2)
+                            readiness.step("expand", network_idle(), READY_EXPAND_BUDGET)
                         except:
                             pass
                 except:
@@ -137,7 +256,9 @@ def parse_product(url: str) -> dict:
 
             # Еще раз прокручиваем после кликов
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight / 2);")
-            time.sleep(2)
+            readiness.step("scroll", network_idle(), READY_SCROLL_BUDGET)
+            # Страница раскрыта полностью: сохраняем её для повторного извлечения без сети
+            html_cache.put(url, "selenium", driver.page_source)
 
             # РАСШИРЕННЫЙ список селекторов
             description_selectors = [
@@ -243,6 +364,7 @@ def parse_product(url: str) -> dict:
             logger.error(f"❌ Критическая ошибка при поиске описания: {e}")
             logger.error(f"Traceback:\n{traceback.format_exc()}")
 
+        check_cancelled()
         try:
             logger.debug("Ищем изображение товара...")
             img_selectors = [
@@ -257,7 +379,7 @@ def parse_product(url: str) -> dict:
             img_url = None
             for selector in img_selectors:
                 try:
-                    img_element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+                    img_element = quick_wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
                     img_url = img_element.get_attribute("src")
                     if img_url and "wbstatic" in img_url:
                         logger.info(f"✅ Изображение найдено (селектор: {selector}): {img_url[:100]}...")
@@ -284,28 +406,35 @@ def parse_product(url: str) -> dict:
         logger.info(f"✅ WB товар успешно спарсен: '{name[:50]}...' | {price}")
         return result
 
+    except ParserJobCancelled:
+        raise
     except Exception as e:
         logger.error(f"❌ Критическая ошибка парсинга товара {url}: {e}")
         logger.error(f"Traceback:\n{traceback.format_exc()}")
         return None
-    finally:
-        logger.debug("Закрываем WebDriver")
-        driver.quit()
+
+
+def unify_wb_product(product_data: dict, url: str) -> dict:
+    """Преобразует результат parse_product в общий формат товара (как у Ozon)."""
+    image_url = product_data.get("image_url", "")
+    return {
+        "title": product_data.get("name", ""),
+        # Бренд, характеристики и все фото есть только при сборе из JSON (WB_CAPTURE_JSON)
+        "brand": product_data.get("brand", ""),
+        "price": product_data.get("price", ""),
+        "description": product_data.get("description", ""),
+        "characteristics": product_data.get("characteristics", {}),
+        "image_url": image_url,
+        "all_images": product_data.get("all_images") or ([image_url] if image_url else []),
+        "url": product_data.get("url", url),
+        "source": "wildberries"
+    }
 
 
 def extract_price(wait) -> str:
     try:
         logger.debug("Извлекаем цену товара...")
-        price_selectors = [
-            "ins.priceBlockFinalPrice--iToZR",
-            ".price-block__final-price",
-            "[data-link*='priceU']",
-            ".price",
-            ".product-page__price-block .price-block__final-price",
-            "ins.price"
-        ]
-
-        for selector in price_selectors:
+        for selector in PRICE_SELECTORS:
             try:
                 price_element = wait.until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, selector))
@@ -325,59 +454,112 @@ def extract_price(wait) -> str:
         return "Цена отсутствует"
 
 
-def parse_promo_products(promo_url: str, limit: int = 20) -> list[str]:
+def iter_promo_products(
+    promo_url: str,
+    limit: int = 20,
+    driver: webdriver.Chrome = None,
+    profile: str = WB_DRIVER_PROFILE,
+    max_scrolls: int = WB_CATALOG_MAX_SCROLLS,
+):
+    """
+    Генератор ссылок на товары каталога WB: ссылки выдаются по мере прокрутки страницы.
+
+    Новые карточки после каждой прокрутки перемешиваются. Прокрутка прекращается, когда собрано
+    limit ссылок, новые карточки перестали появляться или потребитель закрыл генератор.
+    """
+    if driver is None:
+        with driver_pool.driver(profile=profile) as pooled_driver:
+            yield from iter_promo_products(promo_url, limit=limit, driver=pooled_driver, max_scrolls=max_scrolls)
+        return
+
     logger.info(f"🌐 Парсим каталог WB: {promo_url}")
-    driver = get_chrome_driver()
-    product_urls = []
+    seen = set()
     try:
         logger.debug(f"Открываем каталог: {promo_url}")
         driver.get(promo_url)
-        wait = WebDriverWait(driver, 20)
+        readiness = PageReadiness(driver, "wb_catalog")
 
         logger.debug("Ищем карточки товаров...")
-        card_selectors = [
-            "a.product-card__link",
-            ".product-card a[href]",
-            "[data-link*='catalog'] a",
-            ".goods-tile a"
-        ]
-
-        cards = []
-        for selector in card_selectors:
-            try:
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-                cards = driver.find_elements(By.CSS_SELECTOR, selector)
-                if cards:
-                    logger.info(f"✅ Найдено {len(cards)} карточек (селектор: {selector})")
-                    break
-                else:
-                    logger.debug(f"Селектор {selector} не дал результатов")
-            except:
-                logger.debug(f"Селектор {selector} не сработал")
-                continue
-
-        if not cards:
+        readiness.step("cards", any_element_present(CARD_SELECTORS), READY_CONTENT_BUDGET)
+        selector = next((s for s in CARD_SELECTORS if driver.find_elements(By.CSS_SELECTOR, s)), None)
+        if selector is None:
             logger.error("❌ Ни один селектор не нашёл карточки товаров!")
             driver.save_screenshot("wb_catalog_error.png")
             logger.info("📸 Скриншот сохранён: wb_catalog_error.png")
-            return product_urls
-
-        logger.debug(f"Извлекаем URLs из {len(cards)} карточек (лимит: {limit})...")
-        for card in cards[:limit]:
-            href = card.get_attribute("href")
-            if href and "/catalog/" in href:
-                product_urls.append(href)
-
-        logger.info(f"✅ WB каталог: собрано {len(product_urls)} URLs товаров")
-
+            return
+        logger.info(f"✅ Карточки товаров найдены (селектор: {selector})")
+
+        for scroll in range(max_scrolls + 1):
+            check_cancelled()
+            # Ссылки всех карточек за один запрос к браузеру
+            hrefs = driver.execute_script(CARD_HREFS_JS, selector) or []
+            batch = [href for href in dict.fromkeys(hrefs) if "/catalog/" in href and href not in seen]
+            batch = batch[:limit - len(seen)]
+            if not batch:
+                logger.debug(f"После прокрутки {scroll} новых карточек нет")
+                break
+
+            seen.update(batch)
+            random.shuffle(batch)
+            logger.debug(f"Прокрутка {scroll}: +{len(batch)} товаров (всего {len(seen)})")
+            yield from batch
+
+            if len(seen) >= limit:
+                break
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            readiness.step("scroll", network_idle(), READY_SCROLL_BUDGET)
+
+    except ParserJobCancelled:
+        raise
     except Exception as e:
         logger.error(f"❌ Ошибка при получении товаров с промо-страницы {promo_url}: {e}")
         logger.error(f"Traceback:\n{traceback.format_exc()}")
-    finally:
-        logger.debug("Закрываем WebDriver")
-        driver.quit()
 
-    return product_urls
+    logger.info(f"✅ WB каталог: собрано {len(seen)} URLs товаров")
+
+
+def parse_promo_products(
+    promo_url: str, limit: int = 20, driver: webdriver.Chrome = None, profile: str = WB_DRIVER_PROFILE
+) -> list[str]:
+    return list(iter_promo_products(promo_url, limit=limit, driver=driver, profile=profile))
+
+
+async def parse_product_async(
+    url: str, timeout: float = WB_PARSE_TIMEOUT, profile: str = WB_DRIVER_PROFILE
+) -> dict:
+    """Парсит товар WB в пуле парсеров, не блокируя event loop. По таймауту — asyncio.TimeoutError."""
+    async with driver_pool.acquire(profile=profile) as driver:
+        # driver.quit прерывает зависший запрос к странице при отмене задачи
+        return await run_parser_job(
+            parse_product, url, driver=driver, kind="chrome", timeout=timeout, on_cancel=driver.quit
+        )
+
+
+async def parse_promo_products_async(
+    promo_url: str, limit: int = 20, timeout: float = WB_CATALOG_TIMEOUT, profile: str = WB_DRIVER_PROFILE
+) -> list[str]:
+    """Асинхронная обёртка над parse_promo_products."""
+    async with driver_pool.acquire(profile=profile) as driver:
+        return await run_parser_job(
+            parse_promo_products, promo_url, limit=limit, driver=driver,
+            kind="chrome", timeout=timeout, on_cancel=driver.quit
+        )
+
+
+def iter_promo_products_async(
+    promo_url: str, limit: int = 20, timeout: float = WB_CATALOG_TIMEOUT, profile: str = WB_DRIVER_PROFILE
+):
+    """
+    Асинхронный итератор по ссылкам каталога (см. iter_promo_products): первый товар можно
+    парсить, пока каталог ещё прокручивается. Драйвер каталога берётся из пула внутри задачи
+    и возвращается, как только прокрутка закончена, не дожидаясь потребителя.
+    Задача идёт в отдельном пуле потоков "catalog": пока она ждёт свободный драйвер,
+    потоки пула "chrome" остаются задачам, которые драйверы уже держат.
+    Использовать через contextlib.aclosing, чтобы прокрутка остановилась при выходе из цикла.
+    """
+    return iter_parser_job(
+        iter_promo_products, promo_url, limit=limit, profile=profile, kind="catalog", timeout=timeout
+    )
 
 
 if __name__ == "__main__":
@@ -412,4 +594,5 @@ if __name__ == "__main__":
         else:
             print("❌ Товары не найдены")
 
+    driver_pool.close()
     print("\n🏁 Тестирование завершено!")
\ No newline at end of file
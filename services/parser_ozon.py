@@ -1,425 +1,241 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import asyncio
 import re
-import random
-import time
-from config import ZENROWS_API_KEY
+from functools import partial
+
+from config import ZENROWS_API_KEY, OZON_PARSE_TIMEOUT, OZON_CATEGORY_TIMEOUT
+from services.html_backend import parse_html
+from services.image_urls import TIER_LARGE, classify_image_url
+from services.ozon_page import OzonPage
+from services.zenrows_client import RetryBudget, ZenRowsClient, ZenRowsError, zenrows_client
+from services.zenrows_tiers import build_tiers, fetch_tiered
 from logs import get_logger
 
 logger = get_logger("parser_ozon")
 
 
-def make_request_with_retry(url, params, max_retries=3, timeout=60):
+def _iter_nodes(page: OzonPage, selectors: list):
     """
-    Выполняет HTTP запрос с повторными попытками при ошибках.
+    Узлы по списку селекторов в порядке приоритета.
+    Элемент-кортеж (имя data-widget, CSS внутри блока или None) ищется среди уже собранных
+    блоков страницы без обхода всего дерева.
     """
-    for attempt in range(1, max_retries + 1):
-        try:
-            logger.info(f"🔄 Попытка {attempt}/{max_retries} для запроса...")
-            response = requests.get(url, params=params, timeout=timeout)
-            response.raise_for_status()
-            logger.info(f"✅ Запрос выполнен успешно с попытки {attempt}")
-            return response
-
-        except requests.exceptions.Timeout:
-            logger.warning(f"⏰ Таймаут на попытке {attempt}/{max_retries}")
-            if attempt < max_retries:
-                wait_time = attempt * 2
-                logger.info(f"⏳ Ждем {wait_time} сек. перед следующей попыткой...")
-                time.sleep(wait_time)
-
-        except requests.exceptions.ConnectionError:
-            logger.warning(f"🔌 Ошибка соединения на попытке {attempt}/{max_retries}")
-            if attempt < max_retries:
-                wait_time = attempt * 3
-                logger.info(f"⏳ Ждем {wait_time} сек. перед переподключением...")
-                time.sleep(wait_time)
-
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:
-                logger.warning(f"⚠️ Rate limit на попытке {attempt}/{max_retries}")
-                if attempt < max_retries:
-                    wait_time = attempt * 5
-                    logger.info(f"⏳ Ждем {wait_time} сек. из-за rate limit...")
-                    time.sleep(wait_time)
-            else:
-                logger.error(f"❌ HTTP ошибка {e.response.status_code} на попытке {attempt}/{max_retries}")
-                if attempt < max_retries:
-                    time.sleep(2)
-
-        except Exception as e:
-            logger.error(f"❌ Неожиданная ошибка на попытке {attempt}/{max_retries}: {e}")
-            if attempt < max_retries:
-                time.sleep(2)
-
-    logger.error(f"❌ Все {max_retries} попытки неуспешны")
-    raise requests.RequestException(f"Не удалось выполнить запрос после {max_retries} попыток")
-
-
-def extract_all_characteristics(soup):
+    for selector in selectors:
+        if isinstance(selector, tuple):
+            widget_name, inner = selector
+            for widget in page.widgets.get(widget_name, ()):
+                node = widget.select_one(inner) if inner else widget
+                if node:
+                    yield node
+        else:
+            node = page.select_one(selector)
+            if node:
+                yield node
+
+
+def _first_text(page: OzonPage, selectors: list) -> str:
+    node = next(_iter_nodes(page, selectors), None)
+    return node.text() if node else ""
+
+
+def extract_all_characteristics(page: OzonPage):
     """Извлекает характеристики из всех возможных блоков"""
     characteristics = {}
 
     # Основные характеристики (короткие)
-    short_block = soup.find("div", {"data-widget": "webShortCharacteristics"})
+    short_block = page.widget("webShortCharacteristics")
     if short_block:
-        rows = short_block.find_all("div", class_="q6l_27")
+        rows = short_block.select("div.q6l_27")
         for row in rows:
-            key_elem = row.find("span", class_="tsBodyM")
-            value_elem = row.find("span", class_="tsBody400Small")
+            key_elem = row.select_one("span.tsBodyM")
+            value_elem = row.select_one("span.tsBody400Small")
             if key_elem and value_elem:
-                key = key_elem.get_text(strip=True)
-                value = value_elem.get_text(strip=True)
+                key = key_elem.text()
+                value = value_elem.text()
                 characteristics[key] = value
 
     # Полные характеристики (длинные)
-    full_block = soup.find("div", {"data-widget": "webCharacteristics"})
+    full_block = page.widget("webCharacteristics")
     if full_block:
-        char_rows = full_block.find_all("div", class_=re.compile(r".*characteristic.*|.*row.*"))
+        char_rows = full_block.select("div[class*='characteristic'], div[class*='row']")
         if not char_rows:
-            char_rows = full_block.find_all("tr")
+            char_rows = full_block.select("tr")
         if not char_rows:
-            char_rows = full_block.find_all("div", recursive=True)
+            char_rows = full_block.select("div")
 
         for row in char_rows:
-            key_elem = row.find("dt") or row.find("span", class_="tsBodyM") or row.find("div", class_=re.compile(
-                r".*key.*|.*name.*"))
-            value_elem = row.find("dd") or row.find("span", class_="tsBody400Small") or row.find("div",
-                                                                                                 class_=re.compile(
-                                                                                                     r".*value.*"))
+            key_elem = (row.select_one("dt") or row.select_one("span.tsBodyM")
+                        or row.select_one("div[class*='key'], div[class*='name']"))
+            value_elem = (row.select_one("dd") or row.select_one("span.tsBody400Small")
+                          or row.select_one("div[class*='value']"))
 
             if key_elem and value_elem:
-                key = key_elem.get_text(strip=True)
-                value = value_elem.get_text(strip=True)
+                key = key_elem.text()
+                value = value_elem.text()
                 if key and value and len(key) < 100:
                     characteristics[key] = value
 
-    # Пробуем найти характеристики в JSON-LD
-    scripts = soup.find_all("script", type="application/ld+json")
-    for script in scripts:
-        try:
-            data = json.loads(script.string)
-            if isinstance(data, dict) and "additionalProperty" in data:
-                for prop in data["additionalProperty"]:
-                    if "name" in prop and "value" in prop:
-                        characteristics[prop["name"]] = prop["value"]
-        except:
-            continue
+    # Характеристики из JSON-LD
+    for data in page.json_ld:
+        for prop in data.get("additionalProperty") or []:
+            if isinstance(prop, dict) and "name" in prop and "value" in prop:
+                characteristics[prop["name"]] = prop["value"]
 
     return characteristics
 
 
 def is_good_image_url(url: str) -> bool:
     """Проверяет, является ли URL хорошим изображением товара"""
-    if not url:
-        return False
-
-    # Убеждаемся, что URL начинается с http или //
-    if not url.startswith(('http://', 'https://', '//')):
-        return False
-
-    url_lower = url.lower()
-
-    # Исключаем плохие паттерны (более строгие проверки)
-    bad_patterns = [
-        '/video',  # Видео в пути
-        'video-',  # Видео префикс
-        'video/',  # Видео директория
-        '/cover.',  # Обложки видео
-        '/cover/',  # Обложки видео в пути
-        'cover/wc',  # Обложки с размером
-        'cover.jpg',  # Обложки jpg
-        '/logo',  # Логотипы
-        '/icon',  # Иконки
-        '/avatar',  # Аватары
-        'placeholder',  # Заглушки
-        'blank',  # Пустые изображения
-        'loading',  # Загрузочные изображения
-        '.mp4',  # Видео файлы
-        '.webm',  # Видео файлы
-        '.avi',  # Видео файлы
-        'wc50/',  # Очень маленькие
-        'wc100/',  # Маленькие
-        'wc200/',  # Маленькие
-        'w50/',  # Очень маленькие
-        'w100/',  # Маленькие
-    ]
-
-    for pattern in bad_patterns:
-        if pattern in url_lower:
-            return False
-
-    # Проверяем расширение или паттерн изображения
-    good_patterns = [
-        '.jpg', '.jpeg', '.png', '.webp', '.gif',
-        '/multimedia',  # Ozon multimedia CDN
-        '/ir.ozone.ru',  # Ozon image CDN
-        'ir-',  # Ozon image prefix
-    ]
-
-    return any(pattern in url_lower for pattern in good_patterns)
+    return classify_image_url(url).is_image
 
 
 def improve_image_quality(url: str) -> str:
     """Улучшает качество изображения заменой размеров"""
-    if not url:
-        return url
-
-    # Для Ozon изображений
-    if 'ozone.ru' in url or '/ir-' in url or 'ir.ozone.ru' in url:
-        # Заменяем все маленькие размеры на максимальные
-        sizes_to_replace = [
-            ('wc50', 'wc1000'),
-            ('wc100', 'wc1000'),
-            ('wc200', 'wc1000'),
-            ('wc250', 'wc1000'),
-            ('wc300', 'wc1000'),
-            ('wc400', 'wc1000'),
-            ('wc500', 'wc1000'),
-            ('wc600', 'wc1000'),
-            ('wc700', 'wc1000'),
-            ('wc800', 'wc1000'),
-            ('wc900', 'wc1000'),
-            ('w50', 'w1000'),
-            ('w100', 'w1000'),
-            ('w200', 'w1000'),
-            ('w250', 'w1000'),
-            ('w300', 'w1000'),
-            ('w400', 'w1000'),
-            ('w500', 'w1000'),
-            ('w600', 'w1000'),
-            ('w700', 'w1000'),
-            ('w800', 'w1000'),
-            ('w900', 'w1000'),
-            ('ww50', 'wc1000'),  # Еще один формат
-            ('ww100', 'wc1000'),
-            ('ww200', 'wc1000'),
-        ]
-
-        improved_url = url
-        for old_size, new_size in sizes_to_replace:
-            if old_size in improved_url:
-                improved_url = improved_url.replace(old_size, new_size)
-                break
-
-        return improved_url
-
-    return url
-
-
-def find_product_images(soup):
+    return classify_image_url(url).best
+
+
+def find_product_images(page: OzonPage):
     """Ищет изображения товара в разных местах, исключая видео-обложки"""
     image_urls = []
+    tiers = {}
     image_attributes = ['src', 'data-src', 'data-lazy-src', 'data-original', 'data-zoom-image', 'content']
 
-    # ПРИОРИТЕТ 1: Meta теги (обычно там качественные изображения)
-    meta_selectors = [
-        ("meta[property='og:image']", "content"),
-        ("meta[name='twitter:image']", "content"),
-        ("meta[itemprop='image']", "content"),
-    ]
-
-    for selector, attr in meta_selectors:
-        elements = soup.select(selector)
-        for element in elements:
-            url = element.get(attr)
-            if url and is_good_image_url(url):
-                improved = improve_image_quality(url)
-                if improved not in image_urls:
-                    image_urls.append(improved)
-                    logger.info(f"✅ Найдено в meta: {improved[:80]}...")
+    def add(url: str) -> bool:
+        info = classify_image_url(url)
+        if not info.is_image or info.best in tiers:
+            return False
+        tiers[info.best] = info.tier
+        image_urls.append(info.best)
+        return True
 
-    # ПРИОРИТЕТ 2: JSON-LD структуры
-    scripts = soup.find_all("script", type="application/ld+json")
-    for script in scripts:
-        try:
-            data = json.loads(script.string)
-            if isinstance(data, dict):
-                # Ищем image в разных местах
-                if "image" in data:
-                    if isinstance(data["image"], str):
-                        url = data["image"]
-                        if is_good_image_url(url):
-                            improved = improve_image_quality(url)
-                            if improved not in image_urls:
-                                image_urls.append(improved)
-                                logger.info(f"✅ Найдено в JSON-LD: {improved[:80]}...")
-                    elif isinstance(data["image"], list):
-                        for img in data["image"]:
-                            if isinstance(img, str) and is_good_image_url(img):
-                                improved = improve_image_quality(img)
-                                if improved not in image_urls:
-                                    image_urls.append(improved)
-                            elif isinstance(img, dict) and "url" in img:
-                                url = img["url"]
-                                if is_good_image_url(url):
-                                    improved = improve_image_quality(url)
-                                    if improved not in image_urls:
-                                        image_urls.append(improved)
-        except:
-            continue
+    def add_from_nodes(nodes, attributes, only_multimedia=False):
+        for node in nodes:
+            for attr in attributes:
+                src = node.attr(attr)
+                if src and (not only_multimedia or 'multimedia' in src):
+                    add(src)
 
-    # ПРИОРИТЕТ 3: Галереи изображений
-    gallery_selectors = [
-        "div[data-widget='webGallery'] img",
-        "[data-widget*='Gallery'] img",
-        "[data-widget*='Photo'] img",
-        "div.gallery img",
-        "div[class*='gallery'] img",
-        "div[class*='photo'] img",
-        "div[class*='Image'] img",
-        "div[class*='image'] img",
-        "picture img",
-        "img[src*='multimedia']",
-        "img[data-src*='multimedia']",
-    ]
+    # ПРИОРИТЕТ 1: Meta теги (обычно там качественные изображения)
+    for key in ("og:image", "twitter:image", "image"):
+        for url in page.meta.get(key, ()):
+            if add(url):
+                logger.info(f"✅ Найдено в meta: {image_urls[-1][:80]}...")
 
-    for selector in gallery_selectors:
-        elements = soup.select(selector)
-        for element in elements:
-            for attr in image_attributes:
-                src = element.get(attr)
-                if src and is_good_image_url(src):
-                    improved = improve_image_quality(src)
-                    if improved not in image_urls:
-                        image_urls.append(improved)
+    # ПРИОРИТЕТ 2: JSON-LD структуры
+    for data in page.json_ld:
+        image = data.get("image")
+        if isinstance(image, str):
+            if add(image):
+                logger.info(f"✅ Найдено в JSON-LD: {image_urls[-1][:80]}...")
+        elif isinstance(image, list):
+            for img in image:
+                if isinstance(img, str):
+                    add(img)
+                elif isinstance(img, dict) and isinstance(img.get("url"), str):
+                    add(img["url"])
+
+    # ПРИОРИТЕТ 3: Галереи изображений — сначала блоки data-widget, затем вёрстка одним обходом
+    for widget in page.widgets_containing("Gallery") + page.widgets_containing("Photo"):
+        add_from_nodes(widget.select("img"), image_attributes)
+
+    add_from_nodes(page.select(GALLERY_LAYOUT_SELECTOR), image_attributes)
 
     # ПРИОРИТЕТ 4: Поиск в div с data-index (карусель)
-    carousel_divs = soup.find_all("div", attrs={"data-index": True})
-    for div in carousel_divs:
-        imgs = div.find_all("img")
-        for img in imgs:
-            for attr in ['src', 'data-src', 'data-lazy-src']:
-                src = img.get(attr)
-                if src and is_good_image_url(src):
-                    improved = improve_image_quality(src)
-                    if improved not in image_urls:
-                        image_urls.append(improved)
+    add_from_nodes(page.select("div[data-index] img"), ['src', 'data-src', 'data-lazy-src'])
 
     # ПРИОРИТЕТ 5: Любые изображения с multimedia (последний шанс)
     if len(image_urls) < 3:  # Если мало изображений, ищем еще
-        all_imgs = soup.find_all('img')
-        for img in all_imgs:
-            for attr in image_attributes:
-                src = img.get(attr)
-                if src and 'multimedia' in src and is_good_image_url(src):
-                    improved = improve_image_quality(src)
-                    if improved not in image_urls:
-                        image_urls.append(improved)
+        add_from_nodes(page.select('img'), image_attributes, only_multimedia=True)
 
     # Финальная сортировка по качеству
     image_urls.sort(key=lambda x: (
-        'wc1000' in x or 'w1000' in x,  # Приоритет большим изображениям
+        tiers[x] == TIER_LARGE,  # Приоритет большим изображениям
         'multimedia' in x,  # Приоритет multimedia
-        not any(size in x for size in ['wc', 'w50', 'w100', 'w200'])  # Приоритет без маленьких размеров
+        tiers[x],  # Затем средние перед маленькими
     ), reverse=True)
 
     logger.info(f"📸 Найдено {len(image_urls)} изображений после обработки")
     return image_urls
 
 
-def extract_brand(soup):
+BRAND_SELECTORS = [
+    "a[href*='/brand/']",
+    "a.tsCompactControl500Medium[href*='/brand/']",
+    "div.container h2",
+    ("webBrand", None),
+    ".brand-name",
+    ("webProductBrand", None),
+    "h2.brand",
+    ".product-brand"
+]
+
+# Галереи в вёрстке (без data-widget): одна группа селекторов — один обход дерева
+GALLERY_LAYOUT_SELECTOR = ", ".join([
+    "div.gallery img",
+    "div[class*='gallery'] img",
+    "div[class*='photo'] img",
+    "div[class*='Image'] img",
+    "div[class*='image'] img",
+    "picture img",
+    "img[src*='multimedia']",
+    "img[data-src*='multimedia']",
+])
+
+TITLE_SELECTORS = [
+    "h1.zk4_27.tsHeadline550Medium",
+    ("webProductHeading", None),
+    "h1.product-title",
+    ".product-name h1",
+    "h1"
+]
+
+PRICE_SELECTORS = [
+    "span.y3k_27.ky2_27",
+    ".price-current",
+    ("webPrice", "span"),
+    ".product-price span",
+    ("webPrice", None)
+]
+
+DESCRIPTION_SELECTORS = [
+    ("webDescription", None),
+    ".product-description",
+    ".description-text",
+    ".product-summary"
+]
+
+
+def extract_brand(page: OzonPage):
     """Извлекает бренд товара"""
-    brand_selectors = [
-        "a[href*='/brand/']",
-        "a.tsCompactControl500Medium[href*='/brand/']",
-        "div.container h2",
-        "a[data-widget='webBrand']",
-        "span[data-widget='webBrand']",
-        ".brand-name",
-        "div[data-widget='webProductBrand']",
-        "h2.brand",
-        ".product-brand"
-    ]
-
-    for selector in brand_selectors:
-        brand_elem = soup.select_one(selector)
-        if brand_elem:
-            brand = brand_elem.get_text(strip=True)
-            if brand and len(brand) < 100:
-                return brand
+    for brand_elem in _iter_nodes(page, BRAND_SELECTORS):
+        brand = brand_elem.text()
+        if brand and len(brand) < 100:
+            return brand
 
     return ""
 
 
-def parse_ozon_with_zenrows_bs4(product_url: str, apikey: str = ZENROWS_API_KEY, max_retries: int = 3):
-    """Основная функция парсинга товара Ozon с retry механизмом"""
-    logger.info(f"🔄 Парсинг товара Ozon: {product_url}")
+# Режимы ZenRows по возрастанию стоимости; JS-рендеринг ждёт галерею или блоки выдачи
+PRODUCT_TIERS = build_tiers(wait_for="img[src*='multimedia']", wait=12000)
+CATEGORY_TIERS = build_tiers(wait_for="div[data-widget]", wait=10000)
 
-    endpoint = "https://api.zenrows.com/v1/"
-    params = {
-        "url": product_url,
-        "apikey": apikey,
-        "js_render": "true",
-        "premium_proxy": "true",
-        "wait": 12000,  # Увеличенное ожидание
-        "wait_for": "img[src*='multimedia']",  # Ждем загрузки multimedia изображений
-    }
 
+def extract_ozon_product(html: str, product_url: str) -> dict | None:
+    """Извлекает товар из HTML страницы Ozon. None — если не найдено подходящее изображение."""
     try:
-        response = make_request_with_retry(endpoint, params, max_retries=max_retries, timeout=60)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Название товара
-        title_selectors = [
-            "h1.zk4_27.tsHeadline550Medium",
-            "h1[data-widget='webProductHeading']",
-            "h1.product-title",
-            ".product-name h1",
-            "h1"
-        ]
-
-        title = ""
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem:
-                title = title_elem.get_text(strip=True)
-                break
-
-        # Бренд
-        brand = extract_brand(soup)
-
-        # Цена
-        price_selectors = [
-            "span.y3k_27.ky2_27",
-            ".price-current",
-            "[data-widget='webPrice'] span",
-            ".product-price span",
-            "span[data-widget='webPrice']"
-        ]
-
-        price = ""
-        for selector in price_selectors:
-            price_elem = soup.select_one(selector)
-            if price_elem:
-                price = price_elem.get_text(strip=True)
-                break
-
-        # Описание
-        desc_selectors = [
-            "div[data-widget='webDescription']",
-            ".product-description",
-            ".description-text",
-            ".product-summary"
-        ]
-
-        description = ""
-        for selector in desc_selectors:
-            desc_elem = soup.select_one(selector)
-            if desc_elem:
-                description = desc_elem.get_text(strip=True)
-                break
-
-        # Характеристики
-        characteristics = extract_all_characteristics(soup)
+        page = OzonPage(html)
+
+        title = _first_text(page, TITLE_SELECTORS)
+        brand = extract_brand(page)
+        price = _first_text(page, PRICE_SELECTORS)
+        description = _first_text(page, DESCRIPTION_SELECTORS)
+        characteristics = extract_all_characteristics(page)
 
         # Если описания нет, используем характеристики
         if not description and characteristics:
             description = "\n".join([f"{k}: {v}" for k, v in list(characteristics.items())[:10]])
 
         # УЛУЧШЕННЫЙ ПОИСК ИЗОБРАЖЕНИЙ
-        image_urls = find_product_images(soup)
+        image_urls = find_product_images(page)
 
         # Фильтруем только валидные изображения
         filtered_images = []
@@ -456,83 +272,121 @@ def parse_ozon_with_zenrows_bs4(product_url: str, apikey: str = ZENROWS_API_KEY,
             "source": "ozon"
         }
 
-    except requests.RequestException as e:
-        logger.error(f"❌ Ошибка при получении HTML от ZenRows: {e}")
-        return None
     except Exception as e:
         logger.error(f"❌ Неожиданная ошибка парсинга товара: {e}")
         return None
 
 
-def parse_ozon_category_products(category_url: str, limit: int = 20, max_retries: int = 2) -> list:
-    """
-    Парсит товары из категории Ozon с retry механизмом.
-    Возвращает список URL товаров.
-    """
-    logger.info(f"🔍 Парсинг категории Ozon: {category_url}")
+# Ссылка на товар в любом месте страницы: href, JSON состояния, data-атрибуты.
+# Путь обрывается на query-строке, как и раньше (split('?'), split('&'))
+_PRODUCT_LINK_RE = re.compile(r"/product/[^\"'\s?&<>\\]+")
+# Числовой ID товара в конце slug: /product/palto-dreamwhite-1567177548/
+_PRODUCT_ID_RE = re.compile(r"(\d+)/?$")
 
-    endpoint = "https://api.zenrows.com/v1/"
-    params = {
-        "url": category_url,
-        "apikey": ZENROWS_API_KEY,
-        "js_render": "true",
-        "premium_proxy": "true",
-        "wait": 10000,
-        "wait_for": "div[data-widget]",
-    }
 
-    try:
-        response = make_request_with_retry(endpoint, params, max_retries=max_retries, timeout=90)
-        html_content = response.text
-        soup = BeautifulSoup(html_content, "html.parser")
+def _product_key(path: str) -> str:
+    """Ключ для дедупликации: ID товара, а без него — путь без завершающего слеша."""
+    match = _PRODUCT_ID_RE.search(path)
+    return match.group(1) if match else path.rstrip("/")
 
-        logger.info(f"📄 Размер HTML: {len(html_content)} символов")
-        logger.info(f"🏷️ Найдено тегов 'a': {len(soup.find_all('a'))}")
 
-        product_urls = []
-
-        logger.info("🔍 Поиск товаров через regex...")
-
-        patterns = [
-            r'/product/[^"\s\'"]+',
-            r'https://www\.ozon\.ru/product/[^"\s]+',
-        ]
-
-        for i, pattern in enumerate(patterns, 1):
-            matches = re.findall(pattern, html_content)
-            logger.info(f"   Pattern {i}: найдено {len(matches)} совпадений")
+def _unique_product_urls(paths, limit: int) -> list:
+    """Собирает до limit ссылок с уникальными ID, не дочитывая поток путей дальше нужного."""
+    seen = set()
+    product_urls = []
+    for path in paths:
+        key = _product_key(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        product_urls.append(f"https://www.ozon.ru{path}")
+        if len(product_urls) >= limit:
+            break
+    return product_urls
 
-            for match in matches:
-                if match.startswith('/product/'):
-                    full_url = f"https://www.ozon.ru{match}"
-                else:
-                    full_url = match
 
-                full_url = full_url.split('?')[0].split('&')[0]
+def extract_ozon_category_urls(html_content: str, limit: int = 20) -> list:
+    """
+    Извлекает ссылки на товары из HTML категории Ozon.
 
-                if full_url not in product_urls and 'ozon.ru/product/' in full_url:
-                    product_urls.append(full_url)
+    Ссылки ищутся потоково по сырому HTML и поиск останавливается, как только набрано limit
+    уникальных товаров. Дерево документа строится, только если regex ничего не нашёл
+    (например, ссылки в href закодированы HTML-сущностями).
+    """
+    logger.info(f"📄 Размер HTML: {len(html_content)} символов")
+
+    product_urls = _unique_product_urls(
+        (match.group() for match in _PRODUCT_LINK_RE.finditer(html_content)), limit
+    )
+    if product_urls:
+        logger.info(f"🔍 Найдено {len(product_urls)} товаров в HTML категории")
+        return product_urls
+
+    logger.info("🔍 В HTML нет ссылок на товары, ищем в разобранном документе...")
+    hrefs = (node.attr("href") or "" for node in parse_html(html_content).select("a[href*='/product/']"))
+    product_urls = _unique_product_urls(
+        (match.group() for href in hrefs if (match := _PRODUCT_LINK_RE.search(href))), limit
+    )
+    logger.info(f"🏷️ Найдено {len(product_urls)} товаров в ссылках документа")
+    return product_urls
+
+
+def is_complete_ozon_product(product: dict | None) -> bool:
+    """Есть ли в товаре обязательные для поста поля: название, цена и изображение."""
+    return bool(
+        product
+        and product.get("title") not in (None, "", "Название отсутствует")
+        and product.get("price")
+        and product.get("image_url")
+    )
+
+
+async def parse_ozon_with_zenrows_bs4_async(product_url: str, apikey: str = ZENROWS_API_KEY,
+                                            timeout: float = OZON_PARSE_TIMEOUT):
+    """
+    Парсит товар Ozon: HTML запрашивается асинхронным клиентом ZenRows, разбор идёт в пуле парсеров.
+    Режим ZenRows повышается (basic → js → premium), пока не найдены название, цена и изображение.
+    По таймауту всей задачи — asyncio.TimeoutError.
+    """
+    logger.info(f"🔄 Парсинг товара Ozon: {product_url}")
+    client = zenrows_client if apikey == ZENROWS_API_KEY else ZenRowsClient(apikey, zenrows_client.concurrency)
 
-                if len(product_urls) >= limit:
-                    break
+    try:
+        async with asyncio.timeout(timeout):
+            return await fetch_tiered(client, product_url, PRODUCT_TIERS,
+                                      partial(extract_ozon_product, product_url=product_url),
+                                      is_complete_ozon_product, endpoint="product", timeout=60)
+    except ZenRowsError as e:
+        logger.error(f"❌ Ошибка при получении HTML от ZenRows: {e}")
+        return None
+    finally:
+        if client is not zenrows_client:
+            await client.close()
 
-            if len(product_urls) >= limit:
-                break
 
-        if product_urls:
-            logger.info(f"✅ Найдено {len(product_urls)} товаров в категории")
-            return product_urls[:limit]
-        else:
-            logger.warning("⚠️ Товары в категории не найдены, используем fallback URLs")
-            return get_fallback_ozon_urls()[:limit]
+async def parse_ozon_category_products_async(category_url: str, limit: int = 20,
+                                             timeout: float = OZON_CATEGORY_TIMEOUT) -> list:
+    """
+    Парсит товары из категории Ozon. Возвращает список URL товаров;
+    при ошибке или пустой категории — fallback URLs.
+    """
+    logger.info(f"🔍 Парсинг категории Ozon: {category_url}")
 
-    except requests.RequestException as e:
+    try:
+        async with asyncio.timeout(timeout):
+            product_urls = await fetch_tiered(zenrows_client, category_url, CATEGORY_TIERS,
+                                              partial(extract_ozon_category_urls, limit=limit),
+                                              bool, endpoint="category", timeout=90)
+    except ZenRowsError as e:
         logger.error(f"❌ Ошибка парсинга категории Ozon после всех попыток: {e}")
         logger.info("⚠️ Используем fallback URLs")
         return get_fallback_ozon_urls()[:limit]
-    except Exception as e:
-        logger.error(f"❌ Неожиданная ошибка парсинга категории: {e}")
-        return get_fallback_ozon_urls()[:limit]
+
+    if product_urls:
+        logger.info(f"✅ Найдено {len(product_urls)} товаров в категории")
+        return product_urls
+    logger.warning("⚠️ Товары в категории не найдены, используем fallback URLs")
+    return get_fallback_ozon_urls()[:limit]
 
 
 def get_fallback_ozon_urls() -> list:
@@ -546,18 +400,13 @@ def get_fallback_ozon_urls() -> list:
     ]
 
 
-def test_connection():
+async def test_connection():
     """Тестирует соединение с ZenRows API"""
     try:
         logger.info("🔍 Тестируем соединение с ZenRows...")
         test_url = "https://httpbin.org/ip"
 
-        params = {
-            "url": test_url,
-            "apikey": ZENROWS_API_KEY,
-        }
-
-        response = make_request_with_retry("https://api.zenrows.com/v1/", params, max_retries=2, timeout=30)
+        await zenrows_client.get({"url": test_url}, timeout=30, budget=RetryBudget(2), endpoint="test")
         logger.info("✅ Соединение с ZenRows работает")
         return True
 
@@ -568,35 +417,7 @@ def test_connection():
 
 def is_valid_product_image(image_url: str) -> bool:
     """Проверяет, является ли URL валидным изображением товара"""
-    if not image_url:
-        return False
-
-    # Список нежелательных паттернов (расширенный)
-    bad_patterns = [
-        'video',
-        'cover',
-        'logo',
-        'icon',
-        'avatar',
-        'placeholder',
-        'wc50',
-        'wc100',
-        'w50/',
-        'w100/',
-        '.mp4',
-        '.webm',
-    ]
-
-    image_lower = image_url.lower()
-    for pattern in bad_patterns:
-        if pattern in image_lower:
-            return False
-
-    # Проверяем, что это изображение
-    valid_extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
-    has_valid_extension = any(ext in image_lower for ext in valid_extensions)
-
-    return has_valid_extension
+    return classify_image_url(image_url).is_product
 
 
 # Пример использования
@@ -605,7 +426,13 @@ if __name__ == "__main__":
     test_url = "https://www.ozon.ru/product/tunika-larss-plyazhnaya-odezhda-1158405128/"
 
     logger.info(f"Тестируем парсинг: {test_url}")
-    product = parse_ozon_with_zenrows_bs4(test_url)
+    async def _run():
+        try:
+            return await parse_ozon_with_zenrows_bs4_async(test_url)
+        finally:
+            await zenrows_client.close()
+
+    product = asyncio.run(_run())
 
     if product:
         print("✅ Товар найден:", product['title'])
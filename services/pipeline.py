@@ -0,0 +1,170 @@
+# services/pipeline.py
+"""
+Конвейер подготовки постов: этапы, соединённые ограниченными очередями asyncio.
+
+Источник (discover) выдаёт кандидатов, каждый этап (parse, generate, ...) обрабатывает их
+своим числом воркеров и передаёт результат дальше, последний этап — приёмник (публикация,
+пул кандидатов, dry-run). Очереди между этапами ограничены, поэтому быстрый этап
+не убегает вперёд медленного (backpressure), а медленные этапы масштабируются отдельно.
+Когда приёмник принял нужное число элементов, все незавершённые задачи отменяются;
+уже начатые вызовы приёмника (например, публикация) дорабатывают до конца.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, NamedTuple
+
+from config import PIPELINE_QUEUE_SIZE
+from services.metrics import record_pipeline_stage
+from logs import get_logger
+
+logger = get_logger("pipeline")
+
+_END = object()
+
+
+class Stage(NamedTuple):
+    name: str
+    # Обработчик элемента: результат передаётся дальше, None отсеивает элемент.
+    # У приёмника (последнего этапа) результат — принят ли элемент (bool).
+    func: Callable[[Any], Awaitable]
+    concurrency: int = 1
+    # Вызывается, когда этап обработал все элементы и больше ничего не передаст дальше.
+    on_drain: Callable[[], None] | None = None
+
+
+class PipelineResult(NamedTuple):
+    fed: int        # сколько кандидатов выдал источник
+    delivered: int  # сколько элементов принял приёмник
+
+
+async def _iterate(items: Iterable):
+    for item in items:
+        yield item
+
+
+class _Run:
+    def __init__(self, name: str, want: int | None):
+        self.name = name
+        self.want = want
+        self.fed = 0
+        self.delivered = 0
+        self.done = asyncio.Event()
+        self.sink_calls: set[asyncio.Task] = set()  # начатые вызовы приёмника, их не отменяем
+
+    def satisfied(self) -> bool:
+        return self.done.is_set() or (self.want is not None and self.delivered >= self.want)
+
+    async def feed(self, source: AsyncIterable, queue: asyncio.Queue):
+        start = time.monotonic()
+        try:
+            async for item in source:
+                record_pipeline_stage(self.name, "discover", "ok", time.monotonic() - start)
+                self.fed += 1
+                await queue.put(item)
+                start = time.monotonic()
+        except Exception as e:
+            logger.error(f"❌ [{self.name}] Ошибка источника кандидатов: {e}")
+        await queue.put(_END)
+
+    async def stage(self, stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue | None):
+        await asyncio.gather(*(self.worker(stage, inbox, outbox) for _ in range(max(1, stage.concurrency))))
+        if stage.on_drain is not None:
+            stage.on_drain()
+        if outbox is not None:
+            await outbox.put(_END)
+
+    async def worker(self, stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue | None):
+        while True:
+            if self.satisfied():
+                return
+            item = await inbox.get()
+            if item is _END:
+                await inbox.put(_END)  # остальным воркерам этапа
+                return
+            if self.satisfied():
+                return
+
+            start = time.monotonic()
+            try:
+                if outbox is None:
+                    result = await self.sink(stage, item)
+                else:
+                    result = await stage.func(item)
+            except Exception as e:
+                record_pipeline_stage(self.name, stage.name, "error", time.monotonic() - start)
+                logger.error(f"❌ [{self.name}] Этап {stage.name} упал на элементе: {e}")
+                continue
+
+            accepted = bool(result) if outbox is None else result is not None
+            record_pipeline_stage(self.name, stage.name, "ok" if accepted else "dropped", time.monotonic() - start)
+            if not accepted:
+                continue
+            if outbox is not None:
+                await outbox.put(result)
+                continue
+
+            self.delivered += 1
+            if self.want is not None and self.delivered >= self.want:
+                self.done.set()
+
+    async def sink(self, stage: Stage, item):
+        # Отмена воркера не прерывает начатый вызов приёмника: run_pipeline дождётся его.
+        call = asyncio.create_task(stage.func(item))
+        self.sink_calls.add(call)
+        try:
+            result = await asyncio.shield(call)
+        except asyncio.CancelledError:
+            call.add_done_callback(self._count_late_sink_call)
+            raise
+        self.sink_calls.discard(call)
+        return result
+
+    def _count_late_sink_call(self, call: asyncio.Task):
+        if call.cancelled():
+            return
+        if call.exception() is not None:
+            logger.error(f"❌ [{self.name}] Приёмник упал на элементе: {call.exception()}")
+        elif call.result():
+            self.delivered += 1
+
+
+async def run_pipeline(
+    source: Iterable | AsyncIterable,
+    stages: list[Stage],
+    *,
+    want: int | None = 1,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    name: str = "pipeline",
+) -> PipelineResult:
+    """
+    Прогоняет кандидатов из source через этапы; последний этап — приёмник.
+    Останавливается, когда приёмник принял want элементов (None — обработать всё)
+    или когда кандидаты закончились. Исключение в этапе отсеивает только этот элемент.
+    Источник не закрывается: асинхронный генератор закрывает вызывающий (contextlib.aclosing).
+    """
+    run = _Run(name, want)
+    source = source if hasattr(source, "__anext__") else _iterate(source)
+    queues = [asyncio.Queue(maxsize=max(1, queue_size)) for _ in stages]
+
+    tasks = [asyncio.create_task(run.feed(source, queues[0]))]
+    for index, stage in enumerate(stages):
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        tasks.append(asyncio.create_task(run.stage(stage, queues[index], outbox)))
+    done_waiter = asyncio.create_task(run.done.wait())
+
+    try:
+        await asyncio.wait([done_waiter, tasks[-1]], return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        for call in run.sink_calls:  # отменили весь конвейер — начатые вызовы приёмника тоже
+            call.cancel()
+        raise
+    finally:
+        pending = [task for task in tasks + [done_waiter] if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if run.sink_calls:
+            await asyncio.gather(*run.sink_calls, return_exceptions=True)
+
+    logger.info(f"🏁 [{name}] Кандидатов: {run.fed}, принято приёмником: {run.delivered}")
+    return PipelineResult(run.fed, run.delivered)
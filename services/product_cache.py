@@ -0,0 +1,130 @@
+# services/product_cache.py
+import json
+import re
+
+from config import PRODUCT_CACHE_TTL, PRODUCT_CACHE_NEGATIVE_TTL, ZENROWS_API_KEY
+from services import redis_client
+from services.metrics import record_cache_access
+from services.parser import parse_product_async, unify_wb_product
+from services.parser_ozon import parse_ozon_with_zenrows_bs4_async
+from services.single_flight import SingleFlight
+from logs import get_logger
+
+logger = get_logger("product_cache")
+
+# Регулярные выражения ссылок на товары; последняя группа — ID товара на маркетплейсе
+WILDBERRIES_URL_PATTERN = re.compile(r"https?://(www\.)?wildberries\.\w{2,3}/catalog/(\d+)")
+OZON_URL_PATTERN = re.compile(r"https?://(www\.)?ozon\.ru/product/[^/]+-(\d+)/")
+
+# Маркер неудачного парсинга (негативное кэширование)
+_PARSE_FAILED = {"__parse_failed__": True}
+
+# Одновременные запросы одного товара (в т.ч. с разных реплик) ждут один парсинг
+product_flight = SingleFlight("product_parse")
+
+
+def extract_product_id(url: str) -> tuple[str, str] | None:
+    """Возвращает (источник, ID товара) по ссылке WB/Ozon или None."""
+    match = WILDBERRIES_URL_PATTERN.match(url)
+    if match:
+        return "wildberries", match.group(2)
+    match = OZON_URL_PATTERN.match(url)
+    if match:
+        return "ozon", match.group(2)
+    return None
+
+
+def product_cache_key(source: str, product_id: str) -> str:
+    return f"product:{source}:{product_id}"
+
+
+async def get_cached_product(source: str, product_id: str, record_metrics: bool = True) -> tuple[bool, dict | None]:
+    """
+    Ищет товар в кэше.
+    :param record_metrics: False для служебных опросов (ожидание результата другой реплики).
+    :return: (найден ли ключ, данные товара или None для закэшированной неудачи).
+    """
+    redis = redis_client.redis
+    if redis is None:
+        return False, None
+
+    try:
+        raw = await redis.get(product_cache_key(source, product_id))
+    except Exception as e:
+        logger.warning(f"⚠️ Ошибка чтения кэша товара {source}:{product_id}: {e}")
+        return False, None
+
+    if record_metrics:
+        record_cache_access(f"product_{source}", hit=raw is not None)
+    if raw is None:
+        return False, None
+
+    data = json.loads(raw)
+    if data == _PARSE_FAILED:
+        logger.info(f"🗃️ Кэш: товар {source}:{product_id} недавно не удалось спарсить")
+        return True, None
+    logger.info(f"🗃️ Кэш: товар {source}:{product_id} взят из кэша")
+    return True, data
+
+
+async def store_product(source: str, product_id: str, product: dict | None):
+    """Сохраняет товар в кэш; неудачный парсинг (None) кэшируется на меньший срок."""
+    redis = redis_client.redis
+    if redis is None:
+        return
+
+    if product is None:
+        value, ttl = _PARSE_FAILED, PRODUCT_CACHE_NEGATIVE_TTL
+    else:
+        value, ttl = product, PRODUCT_CACHE_TTL
+
+    try:
+        await redis.set(product_cache_key(source, product_id), json.dumps(value, ensure_ascii=False), ex=ttl)
+    except Exception as e:
+        logger.warning(f"⚠️ Ошибка записи кэша товара {source}:{product_id}: {e}")
+
+
+async def cached_product(url: str, parse) -> dict | None:
+    """
+    Возвращает товар из кэша или вызывает parse() (корутинную функцию без аргументов) и кэширует результат.
+    Одновременные промахи по одному товару схлопываются в один вызов parse().
+    Исключения parse() (например, таймаут) не кэшируются.
+    """
+    ident = extract_product_id(url)
+    if ident is None:
+        return await parse()
+
+    source, product_id = ident
+    found, product = await get_cached_product(source, product_id)
+    if not found:
+        async def parse_and_store():
+            result = await parse()
+            await store_product(source, product_id, result)
+            return result
+
+        async def fetch_remote():
+            return await get_cached_product(source, product_id, record_metrics=False)
+
+        product = await product_flight.do(f"{source}:{product_id}", parse_and_store, fetch_remote)
+
+    # Копия: ожидающие одного парсинга не должны делить изменяемый словарь
+    return dict(product, url=url) if product else None
+
+
+async def get_wb_product(url: str) -> dict | None:
+    """Товар Wildberries в общем формате: из кэша или через парсинг в пуле драйверов."""
+
+    async def parse():
+        product_data = await parse_product_async(url)
+        return unify_wb_product(product_data, url) if product_data else None
+
+    return await cached_product(url, parse)
+
+
+async def get_ozon_product(url: str, apikey: str = ZENROWS_API_KEY) -> dict | None:
+    """Товар Ozon: из кэша или через ZenRows."""
+
+    async def parse():
+        return await parse_ozon_with_zenrows_bs4_async(url, apikey)
+
+    return await cached_product(url, parse)
@@ -0,0 +1,153 @@
+# services/published_index.py
+"""
+Индекс уже опубликованных товаров (источник, ID товара на маркетплейсе).
+
+Источник правды — таблица published_products в Postgres, зеркало для быстрых проверок —
+sorted set в Redis (score — время последней публикации). Автопостинг проверяет индекс
+до парсинга, поэтому товар, опубликованный менее REPOST_COOLDOWN_DAYS дней назад,
+не стоит ни запроса к маркетплейсу, ни генерации описания.
+"""
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from config import REPOST_COOLDOWN_DAYS
+from models.models import PublishedProduct
+from services import database, redis_client
+from services.metrics import record_repost_skipped
+from services.product_cache import extract_product_id
+from logs import get_logger
+
+logger = get_logger("published_index")
+
+INDEX_KEY = "published_products"
+# Маркер: зеркало в Redis загружено из Postgres и ему можно верить без запроса к БД.
+# Живёт без TTL и снимается только при неудачной записи в индекс (см. record_published)
+WARM_KEY = "published_products:warm"
+
+
+def _member(source: str, product_id: str) -> str:
+    return f"{source}:{product_id}"
+
+
+def _timestamp(published_at: datetime) -> float:
+    # SQLite (тесты) возвращает naive datetime — время в БД всегда UTC
+    if published_at.tzinfo is None:
+        published_at = published_at.replace(tzinfo=timezone.utc)
+    return published_at.timestamp()
+
+
+def _cutoff() -> float:
+    return time.time() - REPOST_COOLDOWN_DAYS * 86400
+
+
+async def warm_published_index() -> int:
+    """Загружает в Redis товары, опубликованные в пределах cooldown. Возвращает их число."""
+    redis = redis_client.redis
+    if redis is None:
+        return 0
+
+    since = datetime.fromtimestamp(_cutoff(), timezone.utc)
+    async with database.async_session() as session:
+        rows = (await session.execute(
+            select(PublishedProduct).where(PublishedProduct.published_at >= since)
+        )).scalars().all()
+
+    if rows:
+        await redis.zadd(INDEX_KEY, {_member(row.source, row.product_id): _timestamp(row.published_at) for row in rows})
+    await redis.zremrangebyscore(INDEX_KEY, "-inf", _cutoff())
+    await redis.set(WARM_KEY, "1")
+    logger.info(f"📇 Индекс опубликованных товаров загружен в Redis: {len(rows)}")
+    return len(rows)
+
+
+async def ensure_published_index_warm() -> bool:
+    """
+    Загружает индекс заново, если отметки WARM_KEY нет (сбой записи, перезапуск Redis).
+    Возвращает True, если индекс пришлось загрузить.
+    """
+    redis = redis_client.redis
+    if redis is None or await redis.get(WARM_KEY):
+        return False
+    await warm_published_index()
+    return True
+
+
+async def _published_at_from_db(source: str, product_id: str) -> float | None:
+    async with database.async_session() as session:
+        row = (await session.execute(
+            select(PublishedProduct).where(
+                PublishedProduct.source == source, PublishedProduct.product_id == product_id
+            )
+        )).scalar_one_or_none()
+    return _timestamp(row.published_at) if row is not None else None
+
+
+async def is_recently_published(url: str) -> bool:
+    """Публиковался ли товар по ссылке в пределах cooldown. Ссылки без ID товара не проверяются."""
+    ident = extract_product_id(url)
+    if ident is None:
+        return False
+    source, product_id = ident
+
+    published_at = None
+    redis = redis_client.redis
+    try:
+        if redis is not None:
+            published_at = await redis.zscore(INDEX_KEY, _member(source, product_id))
+            if published_at is None and await redis.get(WARM_KEY):
+                return False
+        if published_at is None:
+            published_at = await _published_at_from_db(source, product_id)
+    except Exception as e:
+        # Индекс — оптимизация: при его недоступности товар просто проверяется обычным путём
+        logger.warning(f"⚠️ Не удалось проверить индекс опубликованных товаров: {e}")
+        return False
+
+    if published_at is not None and published_at >= _cutoff():
+        logger.info(f"⏭️ Товар {source}:{product_id} уже публиковался недавно, пропускаем")
+        record_repost_skipped(source)
+        return True
+    return False
+
+
+async def record_published(url: str, post_id: int | None = None):
+    """
+    Отмечает товар опубликованным: строка в Postgres (upsert) и запись в Redis.
+    Если запись в Redis не удалась, индекс перестаёт считаться загруженным до следующего прогрева
+    (ensure_published_index_warm из фонового цикла пула кандидатов).
+    """
+    ident = extract_product_id(url)
+    if ident is None:
+        return
+    source, product_id = ident
+    now = datetime.now(timezone.utc)
+
+    async with database.async_session() as session:
+        row = (await session.execute(
+            select(PublishedProduct).where(
+                PublishedProduct.source == source, PublishedProduct.product_id == product_id
+            )
+        )).scalar_one_or_none()
+        if row is None:
+            session.add(PublishedProduct(
+                source=source, product_id=product_id, post_id=post_id, url=url, published_at=now
+            ))
+        else:
+            row.post_id, row.url, row.published_at = post_id, url, now
+        await session.commit()
+
+    redis = redis_client.redis
+    if redis is not None:
+        try:
+            await redis.zadd(INDEX_KEY, {_member(source, product_id): now.timestamp()})
+            await redis.zremrangebyscore(INDEX_KEY, "-inf", _cutoff())
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось обновить индекс опубликованных товаров в Redis: {e}")
+            # Индекс без этого товара больше не полный: снимаем отметку, чтобы проверки шли в Postgres
+            try:
+                await redis.delete(WARM_KEY)
+            except Exception as e:
+                logger.warning(f"⚠️ Не удалось сбросить отметку загруженного индекса в Redis: {e}")
+    logger.info(f"📇 Товар {source}:{product_id} отмечен опубликованным")
@@ -2,16 +2,33 @@
 
 import random
 import traceback
+from contextlib import aclosing
+from functools import partial
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from config import CHANNEL_USERNAME, ZENROWS_API_KEY
-from services.parser import parse_product, parse_promo_products
-from services.parser_ozon import parse_ozon_with_zenrows_bs4, parse_ozon_category_products, is_valid_product_image
+from config import (
+    CHANNEL_USERNAME,
+    DESCRIPTION_BATCH_SIZE,
+    PIPELINE_GENERATE_CONCURRENCY,
+    PIPELINE_PARSE_CONCURRENCY,
+    ZENROWS_API_KEY,
+)
+from services.parser import parse_product_async, parse_promo_products_async, iter_promo_products_async
+from services.parser_ozon import (
+    parse_ozon_with_zenrows_bs4_async,
+    parse_ozon_category_products_async,
+    is_valid_product_image,
+    improve_image_quality,
+)
+from services.pipeline import PipelineResult, Stage, run_pipeline
+from services.product_cache import get_wb_product, get_ozon_product
+from services.published_index import is_recently_published, record_published
 from services.publisher import publish_to_channel
 from models.models import Post
 from services.database import async_session
-from services.content_generator import generate_product_description_sync
+from services.content_generator import DescriptionBatcher, generate_product_description
+from services.openai_client import PRIORITY_BACKGROUND
 from logs import get_logger
 
 from services.reaction_sender import send_reactions
@@ -44,54 +61,131 @@ def clean_ozon_price(price_str: str) -> str:
     return price
 
 
-async def parse_wildberries_products():
-    """Парсинг товаров с Wildberries"""
-    promo_url = random.choice(WILDBERRIES_PROMO_URLS)
-    logger.info(f"🔥 Получаем товары с Wildberries: {promo_url}")
+async def prepare_wb_candidate(product_url: str) -> dict | None:
+    """Парсит товар WB и возвращает его, если в нём есть всё для поста, иначе None."""
+    logger.info(f"📦 Пробуем WB товар: {product_url}")
+    product_data = await get_wb_product(product_url)
+    logger.info(f"📦 Парсинг WB товара завершён: {product_data}")
 
-    try:
-        products = parse_promo_products(promo_url, limit=50)
-        logger.info(f"📊 WB результат: получено {len(products)} URLs товаров")
+    if not product_data or not product_data.get("description") or not product_data.get("image_url"):
+        logger.warning(f"❌ Товар {product_url} неполный или недоступен, пропускаем.")
+        return None
+    return product_data
 
-        if not products:
-            logger.error("❌ WB вернул пустой список товаров!")
-            return False
 
-        random.shuffle(products)
-        logger.info(f"🎲 Перемешано {len(products)} товаров, начинаем парсинг...")
+async def prepare_ozon_candidate(product_url: str) -> dict | None:
+    """Парсит товар Ozon, проверяет обязательные поля и подбирает лучшее изображение; None — не подходит."""
+    logger.info(f"📦 Пробуем Ozon товар: {product_url}")
+    product_data = await get_ozon_product(product_url, ZENROWS_API_KEY)
+    logger.info(f"📦 Парсинг Ozon товара: {product_data.get('title', 'N/A') if product_data else 'None'}")
 
-        for i, product_url in enumerate(products, 1):
-            try:
-                logger.info(f"📦 [{i}/{len(products)}] Пробуем WB товар: {product_url}")
-                product_data = parse_product(product_url)
-                logger.info(f"📦 Парсинг WB товара завершён: {product_data}")
+    if not product_data:
+        logger.warning(f"❌ Товар Ozon {product_url} не спаршен, пропускаем.")
+        return None
 
-                if not product_data or not product_data.get("description") or not product_data.get("image_url"):
-                    logger.warning(f"❌ Товар {product_url} неполный или недоступен, пропускаем.")
-                    continue
+    # Дополнительная проверка обязательных полей
+    title = product_data.get("title", "").strip()
+    price = product_data.get("price", "").strip()
+    description = product_data.get("description", "").strip()
+    characteristics = product_data.get("characteristics", {})
 
-                unified_product_data = {
-                    "title": product_data.get("name", ""),
-                    "brand": "",
-                    "price": product_data.get("price", ""),
-                    "description": product_data.get("description", ""),
-                    "characteristics": {},
-                    "image_url": product_data.get("image_url", ""),
-                    "url": product_data.get("url", product_url),
-                    "source": "wildberries"
-                }
+    if not title or title == "Название отсутствует" or len(title) < 3:
+        logger.warning(f"❌ Ozon товар: некорректное название '{title}', пропускаем.")
+        return None
 
-                success = await process_and_publish_product(unified_product_data)
-                if success:
-                    logger.info(f"✅ WB товар успешно обработан и опубликован")
-                    return True
+    if not price:
+        logger.warning(f"❌ Ozon товар: отсутствует цена, пропускаем.")
+        return None
 
-            except Exception as e:
-                logger.error(f"❌ Ошибка обработки товара WB {product_url}: {e}")
-                logger.error(f"Traceback:\n{traceback.format_exc()}")
-                continue
+    # Если нет описания и характеристик, используем только название для генерации
+    if not description and not characteristics:
+        logger.info(
+            "⚠️ Ozon товар: отсутствует описание и характеристики, будем использовать только название для генерации"
+        )
+
+    image_url = product_data.get("image_url", "")
+
+    if not is_valid_product_image(image_url):
+        logger.warning("❌ Товар Ozon имеет некачественное изображение, пробуем альтернативы.")
+        logger.debug(f"   Проблемный URL изображения: {image_url}")
+
+        all_images = product_data.get("all_images", [])
+        valid_image_found = False
+
+        for img in all_images:
+            if is_valid_product_image(img):
+                product_data["image_url"] = img
+                logger.info(f"✅ Найдено альтернативное изображение: {img[:100]}...")
+                valid_image_found = True
+                break
+
+        if not valid_image_found:
+            logger.warning("❌ Не найдено подходящее изображение для товара, пропускаем.")
+            return None
+
+    image_url = product_data.get("image_url", "")
+    best_image_url = improve_image_quality(image_url)
+    if best_image_url != image_url:
+        product_data["image_url"] = best_image_url
+        logger.info(f"✅ Качество изображения улучшено: {best_image_url[:100]}...")
+
+    # ВАЖНО: помечаем источник перед обработкой
+    product_data["source"] = "ozon"
+    return product_data
 
-        logger.warning("❌ WB: все товары обработаны, но ни один не подошёл")
+
+async def skip_published(product_url: str) -> str | None:
+    """Отсеивает товары, опубликованные в пределах REPOST_COOLDOWN_DAYS, ещё до парсинга."""
+    return None if await is_recently_published(product_url) else product_url
+
+
+async def produce_post(candidates, prepare, source: str, sink, want: int = 1) -> PipelineResult:
+    """
+    Конвейер одного поста: кандидаты (discover) → отсев недавно опубликованных (dedup) →
+    парсинг и проверка изображения (parse) → генерация описания (generate) →
+    приёмник sink (публикация, пул кандидатов или dry-run).
+    Как только sink принял want постов, незавершённые парсинги и генерации отменяются.
+    При want > 1 (дозаполнение пула) описания генерируются пакетами: один запрос к OpenAI на несколько постов.
+    Пакет уходит, когда набралось want товаров (не больше DESCRIPTION_BATCH_SIZE) или парсинг закончился.
+    """
+    batcher = None
+    if want > 1:
+        batcher = DescriptionBatcher(max_size=min(want, DESCRIPTION_BATCH_SIZE))
+        generate = Stage("generate", partial(prepare_post, batcher=batcher), max(PIPELINE_GENERATE_CONCURRENCY, want))
+    else:
+        generate = Stage("generate", prepare_post, PIPELINE_GENERATE_CONCURRENCY)
+    stages = [
+        Stage("dedup", skip_published, PIPELINE_PARSE_CONCURRENCY),
+        Stage("parse", prepare, PIPELINE_PARSE_CONCURRENCY, on_drain=batcher.flush if batcher else None),
+        generate,
+        Stage("sink", sink),
+    ]
+    try:
+        return await run_pipeline(candidates, stages, want=want, name=source)
+    finally:
+        if batcher is not None:
+            batcher.flush()  # снимает таймер окна; отменённые ожидающие в запрос не попадут
+
+
+async def parse_wildberries_products(sink=None, want: int = 1):
+    """Парсинг товаров с Wildberries; sink — приёмник готовых постов (по умолчанию — публикация), want — сколько нужно"""
+    promo_url = random.choice(WILDBERRIES_PROMO_URLS)
+    logger.info(f"🔥 Получаем товары с Wildberries: {promo_url}")
+
+    try:
+        # Ссылки приходят по мере прокрутки каталога; закрытие итератора останавливает прокрутку
+        async with aclosing(iter_promo_products_async(promo_url, limit=50)) as products:
+            result = await produce_post(products, prepare_wb_candidate, "wildberries", sink or publish_prepared_post, want)
+
+        if result.delivered:
+            logger.info(f"✅ WB товар успешно обработан и опубликован")
+            return True
+
+        if not result.fed:
+            logger.error("❌ WB вернул пустой список товаров!")
+            return False
+
+        logger.warning(f"❌ WB: все товары ({result.fed}) обработаны, но ни один не подошёл")
         return False
 
     except Exception as e:
@@ -100,13 +194,13 @@ async def parse_wildberries_products():
         return False
 
 
-async def parse_ozon_products():
-    """Парсинг товаров с Ozon"""
+async def discover_ozon_candidates():
+    """Источник кандидатов Ozon: ссылки на товары случайной категории в случайном порядке."""
     category_url = random.choice(OZON_CATEGORY_URLS)
     logger.info(f"🔥 Получаем товары с Ozon: {category_url}")
 
     try:
-        products = parse_ozon_category_products(category_url, limit=20)
+        products = await parse_ozon_category_products_async(category_url, limit=20)
         logger.info(f"📊 Ozon результат: получено {len(products)} URLs товаров")
     except Exception as e:
         logger.error(f"❌ Ошибка парсинга категории Ozon: {e}")
@@ -115,84 +209,24 @@ async def parse_ozon_products():
         products = get_fallback_ozon_urls()
         logger.info(f"⚠️ Используем fallback URLs для Ozon: {len(products)} товаров")
 
-    if not products:
-        logger.error("❌ Ozon: список товаров пуст!")
-        return False
-
     random.shuffle(products)
     logger.info(f"🎲 Перемешано {len(products)} Ozon товаров, начинаем парсинг...")
+    for product_url in products:
+        yield product_url
 
-    for i, product_url in enumerate(products, 1):
-        try:
-            logger.info(f"📦 [{i}/{len(products)}] Пробуем Ozon товар: {product_url}")
-            product_data = parse_ozon_with_zenrows_bs4(product_url, ZENROWS_API_KEY)
-            logger.info(f"📦 Парсинг Ozon товара: {product_data.get('title', 'N/A') if product_data else 'None'}")
-
-            if not product_data:
-                logger.warning(f"❌ Товар Ozon {product_url} не спаршен, пропускаем.")
-                continue
-
-            # Дополнительная проверка обязательных полей
-            title = product_data.get("title", "").strip()
-            price = product_data.get("price", "").strip()
-            description = product_data.get("description", "").strip()
-            characteristics = product_data.get("characteristics", {})
-
-            if not title or title == "Название отсутствует" or len(title) < 3:
-                logger.warning(f"❌ Ozon товар: некорректное название '{title}', пропускаем.")
-                continue
-
-            if not price:
-                logger.warning(f"❌ Ozon товар: отсутствует цена, пропускаем.")
-                continue
 
-            # Если нет описания и характеристик, используем только название для генерации
-            if not description and not characteristics:
-                logger.info(
-                    "⚠️ Ozon товар: отсутствует описание и характеристики, будем использовать только название для генерации"
-                )
+async def parse_ozon_products(sink=None, want: int = 1):
+    """Парсинг товаров с Ozon; sink — приёмник готовых постов (по умолчанию — публикация), want — сколько нужно"""
+    async with aclosing(discover_ozon_candidates()) as products:
+        result = await produce_post(products, prepare_ozon_candidate, "ozon", sink or publish_prepared_post, want)
 
-            image_url = product_data.get("image_url", "")
+    if result.delivered:
+        logger.info(f"✅ Ozon товар успешно обработан и опубликован")
+        return True
 
-            if not is_valid_product_image(image_url):
-                logger.warning("❌ Товар Ozon имеет некачественное изображение, пробуем альтернативы.")
-                logger.debug(f"   Проблемный URL изображения: {image_url}")
-
-                all_images = product_data.get("all_images", [])
-                valid_image_found = False
-
-                for img in all_images:
-                    if is_valid_product_image(img):
-                        product_data["image_url"] = img
-                        logger.info(f"✅ Найдено альтернативное изображение: {img[:100]}...")
-                        valid_image_found = True
-                        break
-
-                if not valid_image_found:
-                    logger.warning("❌ Не найдено подходящее изображение для товара, пропускаем.")
-                    continue
-
-            image_url = product_data.get("image_url", "")
-            if image_url and any(
-                    sz in image_url for sz in ['wc50', 'wc100', 'wc200', 'wc250', 'wc300', 'wc400', 'wc500']):
-                logger.info("⚙️ Улучшаем качество изображения...")
-                for size in ['wc50', 'wc100', 'wc200', 'wc250', 'wc300', 'wc400', 'wc500']:
-                    image_url = image_url.replace(size, 'wc1000')
-                product_data["image_url"] = image_url
-                logger.info(f"✅ Качество улучшено: {image_url[:100]}...")
-
-            # ВАЖНО: помечаем источник перед обработкой
-            product_data["source"] = "ozon"
-
-            success = await process_and_publish_product(product_data)
-            if success:
-                logger.info(f"✅ Ozon товар успешно обработан и опубликован")
-                return True
-
-        except Exception as e:
-            logger.error(f"❌ Ошибка обработки товара Ozon {product_url}: {e}")
-            logger.error(f"Traceback:\n{traceback.format_exc()}")
-            continue
+    if not result.fed:
+        logger.error("❌ Ozon: список товаров пуст!")
+        return False
 
     logger.warning("❌ Ozon: все товары обработаны, но ни один не подошёл")
     return False
@@ -200,7 +234,19 @@ async def parse_ozon_products():
 
 async def publish_random_product(products_file: str = None):
     """Публикует случайный товар с Wildberries или Ozon с fallback логикой"""
+    success = await find_random_product(publish_prepared_post)
+    if not success:
+        logger.warning("❌ Нет доступных товаров для публикации из обоих источников.")
+    else:
+        logger.info("✅ Публикация товара успешно завершена!")
+    return success
 
+
+async def find_random_product(sink, want: int = 1) -> bool:
+    """
+    Готовит до want постов по товарам из случайного источника (при неудаче — из другого) и передаёт их в sink.
+    True — sink принял хотя бы один пост.
+    """
     source = random.choice(["wildberries", "ozon"])
     logger.info(f"🎲 Выбран источник: {source}")
 
@@ -209,32 +255,29 @@ async def publish_random_product(products_file: str = None):
     if source == "ozon":
         # Сначала пробуем Ozon
         logger.info("🔍 Пытаемся получить товар с Ozon...")
-        success = await parse_ozon_products()
+        success = await parse_ozon_products(sink, want)
 
         if not success:
             # Если Ozon не удался, переключаемся на Wildberries
             logger.warning("⚠️ Не удалось получить товар с Ozon, переключаемся на Wildberries...")
-            success = await parse_wildberries_products()
+            success = await parse_wildberries_products(sink, want)
 
             if not success:
                 logger.error("❌ Не удалось получить товар ни с Ozon, ни с Wildberries")
     else:
         # Сначала пробуем Wildberries
         logger.info("🔍 Пытаемся получить товар с Wildberries...")
-        success = await parse_wildberries_products()
+        success = await parse_wildberries_products(sink, want)
 
         if not success:
             # Если Wildberries не удался, переключаемся на Ozon
             logger.warning("⚠️ Не удалось получить товар с Wildberries, переключаемся на Ozon...")
-            success = await parse_ozon_products()
+            success = await parse_ozon_products(sink, want)
 
             if not success:
                 logger.error("❌ Не удалось получить товар ни с Wildberries, ни с Ozon")
 
-    if not success:
-        logger.warning("❌ Нет доступных товаров для публикации из обоих источников.")
-    else:
-        logger.info("✅ Публикация товара успешно завершена!")
+    return success
 
 
 async def process_and_publish_product(product_data: dict, publish: bool = True) -> bool:
@@ -243,131 +286,161 @@ async def process_and_publish_product(product_data: dict, publish: bool = True)
     но НЕ пишет в БД, НЕ публикует и НЕ ставит реакции — удобно для локальных прогонов.
     """
     try:
-        logger.info(f"🔧 Начинаем обработку товара: {product_data.get('title', 'N/A')[:50]}...")
+        post_data = await prepare_post(product_data)
+        if post_data is None:
+            return False
+        return await (publish_prepared_post if publish else dry_run_sink)(post_data)
 
-        # Проверяем основные поля для Ozon товаров
-        if product_data.get("source") == "ozon":
-            title = product_data.get("title", "").strip()
-            price = product_data.get("price", "").strip()
-            image_url = product_data.get("image_url", "")
+    except Exception as e:
+        logger.error(f"❌ Ошибка обработки товара: {repr(e)}")
+        logger.error(f"Traceback:\n{traceback.format_exc()}")
+        return False
 
-            # Если нет названия, цены или изображения - пропускаем товар
-            if not title or title == "Название отсутствует" or len(title) < 3:
-                logger.warning("❌ Ozon товар: отсутствует корректное название, пропускаем")
-                return False
 
-            if not price:
-                logger.warning("❌ Ozon товар: отсутствует цена, пропускаем")
-                return False
+async def dry_run_sink(post_data: dict) -> bool:
+    """Приёмник для локальных прогонов (publish=False): пост только логируется."""
+    logger.info("🧪 [DRY RUN] Пост сформирован (без публикации):")
+    logger.info(f"Заголовок: {post_data['title']}")
+    logger.info(f"Цена: {post_data['price']}")
+    logger.info(f"Ссылка: {post_data['url']}")
+    logger.info(f"Изображение: {post_data['image_url'][:120]}")
+    logger.debug(f"Текст:\n{post_data['description']}")
+    return True
 
-            if not image_url:
-                logger.warning("❌ Ozon товар: отсутствует изображение, пропускаем")
-                return False
 
+async def prepare_post(product_data: dict, batcher: DescriptionBatcher | None = None) -> dict | None:
+    """
+    Готовит пост по товару: валидации, генерация описания, форматирование цены.
+    Ничего не пишет в БД и не публикует. None — товар не годится для публикации.
+    batcher — описание генерируется в общем пакете с другими постами этого прогона.
+    """
+    logger.info(f"🔧 Начинаем обработку товара: {product_data.get('title', 'N/A')[:50]}...")
+
+    # Проверяем основные поля для Ozon товаров
+    if product_data.get("source") == "ozon":
+        title = product_data.get("title", "").strip()
+        price = product_data.get("price", "").strip()
         image_url = product_data.get("image_url", "")
+
+        # Если нет названия, цены или изображения - пропускаем товар
+        if not title or title == "Название отсутствует" or len(title) < 3:
+            logger.warning("❌ Ozon товар: отсутствует корректное название, пропускаем")
+            return None
+
+        if not price:
+            logger.warning("❌ Ozon товар: отсутствует цена, пропускаем")
+            return None
+
         if not image_url:
-            logger.error("❌ Нет изображения для публикации")
-            return False
+            logger.warning("❌ Ozon товар: отсутствует изображение, пропускаем")
+            return None
 
-        if not is_valid_product_image(image_url):
-            logger.error(f"❌ Изображение не прошло финальную проверку: {image_url}")
-            return False
+    image_url = product_data.get("image_url", "")
+    if not image_url:
+        logger.error("❌ Нет изображения для публикации")
+        return None
 
-        if product_data.get("characteristics"):
-            characteristics_text = "\n".join([f"{k}: {v}" for k, v in product_data["characteristics"].items()])
-        else:
-            characteristics_text = product_data.get("description", "")
+    if not is_valid_product_image(image_url):
+        logger.error(f"❌ Изображение не прошло финальную проверку: {image_url}")
+        return None
 
-        # Если нет ни характеристик, ни описания, используем базовое описание для генерации
-        if not characteristics_text.strip():
-            characteristics_text = "Качественный товар"
-            logger.info("⚠️ Используем базовое описание для генерации, так как данных нет")
+    if product_data.get("characteristics"):
+        characteristics_text = "\n".join([f"{k}: {v}" for k, v in product_data["characteristics"].items()])
+    else:
+        characteristics_text = product_data.get("description", "")
 
-        # Генерация описания с безопасным фоллбэком
-        try:
-            logger.info("🤖 Генерируем AI описание товара...")
-            generated_description = generate_product_description_sync(
-                product_data["title"],
-                characteristics_text
-            )
-            if not generated_description or generated_description.startswith("❌"):
-                raise RuntimeError("AI generation failed")
-            logger.info("✅ AI описание успешно сгенерировано")
-        except Exception as e:
-            logger.warning(f"⚠️ AI генерация не удалась: {e}, используем fallback")
-            generated_description = f"{product_data['title']}. Отличное качество по выгодной цене."
+    # Если нет ни характеристик, ни описания, используем базовое описание для генерации
+    if not characteristics_text.strip():
+        characteristics_text = "Качественный товар"
+        logger.info("⚠️ Используем базовое описание для генерации, так как данных нет")
 
-        # Очищаем цену для Ozon товаров
-        if product_data.get("source") == "ozon":
-            formatted_price = clean_ozon_price(product_data.get("price", ""))
+    # Генерация описания с безопасным фоллбэком
+    try:
+        logger.info("🤖 Генерируем AI описание товара...")
+        if batcher is not None:
+            generated_description = await batcher.generate(product_data["title"], characteristics_text)
         else:
-            formatted_price = product_data.get("price", "")
+            generated_description = await generate_product_description(
+                product_data["title"], characteristics_text, priority=PRIORITY_BACKGROUND
+            )
+        if not generated_description or generated_description.startswith("❌"):
+            raise RuntimeError("AI generation failed")
+        logger.info("✅ AI описание успешно сгенерировано")
+    except Exception as e:
+        logger.warning(f"⚠️ AI генерация не удалась: {e}, используем fallback")
+        generated_description = f"{product_data['title']}. Отличное качество по выгодной цене."
 
-        full_description = (
-            f"✨ {generated_description} ✨\n\n"
-            f"💰 Цена: {formatted_price}\n"
-            f"📦 Заказывайте уже сейчас по ссылке: {product_data['url']}"
-        )
+    # Очищаем цену для Ozon товаров
+    if product_data.get("source") == "ozon":
+        formatted_price = clean_ozon_price(product_data.get("price", ""))
+    else:
+        formatted_price = product_data.get("price", "")
+
+    full_description = (
+        f"✨ {generated_description} ✨\n\n"
+        f"💰 Цена: {formatted_price}\n"
+        f"📦 Заказывайте уже сейчас по ссылке: {product_data['url']}"
+    )
+
+    return {
+        "title": product_data["title"],
+        "description": full_description,
+        "price": formatted_price,
+        "image_url": product_data["image_url"],
+        "url": product_data["url"],
+        "source": product_data.get("source", "unknown"),
+    }
+
+
+async def publish_prepared_post(post_data: dict) -> bool:
+    """Сохраняет подготовленный пост (см. prepare_post) в БД, публикует в канал и ставит реакции."""
+    logger.info("💾 Сохраняем товар в базу данных...")
+
+    async with async_session() as session:
+        async with session.begin():
+            post = Post(
+                user_id=None,
+                content=post_data["title"],
+                description=post_data["description"],
+                price=post_data["price"].replace("₽", "").replace("руб", "").strip() if post_data["price"] else "Не указана",
+                image_url=post_data["image_url"],
+                link=post_data["url"],
+                status="scheduled",
+                published_at=datetime.now(MOSCOW_TZ)
+            )
+            session.add(post)
 
-        if not publish:
-            # DRY RUN: ничего не публикуем, только логируем
-            logger.info("🧪 [DRY RUN] Пост сформирован (без публикации):")
-            logger.info(f"Заголовок: {product_data['title']}")
-            logger.info(f"Цена: {formatted_price}")
-            logger.info(f"Ссылка: {product_data['url']}")
-            logger.info(f"Изображение: {product_data['image_url'][:120]}")
-            logger.debug(f"Текст:\n{full_description}")
-            return True
+        await session.flush()
+        post_id = post.id
+        logger.info(f"✅ Товар сохранён в БД с ID: {post_id}")
+
+    logger.info(f"📤 Публикуем товар в канал...")
+    publish_result = await publish_to_channel(post_id)
+
+    if "✅" in publish_result:
+        source_name = post_data.get('source', 'unknown')
+        logger.info(f"✅ Успешно опубликован товар из {source_name}: {publish_result}")
 
-        # --- Реальная публикация ниже ---
-        logger.info("💾 Сохраняем товар в базу данных...")
+        try:
+            await record_published(post_data["url"], post_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось отметить товар опубликованным: {e}")
 
         async with async_session() as session:
-            async with session.begin():
-                post = Post(
-                    user_id=None,
-                    content=product_data["title"],
-                    description=full_description,
-                    price=formatted_price.replace("₽", "").replace("руб",
-                                                                   "").strip() if formatted_price else "Не указана",
-                    image_url=product_data["image_url"],
-                    link=product_data["url"],
-                    status="scheduled",
-                    published_at=datetime.now(MOSCOW_TZ)
-                )
-                session.add(post)
-
-            await session.flush()
-            post_id = post.id
-            logger.info(f"✅ Товар сохранён в БД с ID: {post_id}")
-
-        logger.info(f"📤 Публикуем товар в канал...")
-        publish_result = await publish_to_channel(post_id)
-
-        if "✅" in publish_result:
-            source_name = product_data.get('source', 'unknown')
-            logger.info(f"✅ Успешно опубликован товар из {source_name}: {publish_result}")
-
-            async with async_session() as session:
-                result = await session.execute(select(Post).where(Post.id == post_id))
-                post_obj = result.scalar_one_or_none()
-
-            if post_obj and post_obj.telegram_message_id:
-                try:
-                    logger.info(f"🎭 Добавляем реакции к сообщению {post_obj.telegram_message_id}...")
-                    await send_reactions(channel_username=CHANNEL_USERNAME, message_id=post_obj.telegram_message_id)
-                    logger.info(f"🎉 Реакции успешно добавлены к сообщению {post_obj.telegram_message_id}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Реакции НЕ были применены к сообщению {post_obj.telegram_message_id}: {e}")
+            result = await session.execute(select(Post).where(Post.id == post_id))
+            post_obj = result.scalar_one_or_none()
 
-            return True
-        else:
-            logger.error(f"❌ Ошибка публикации товара: {publish_result}")
-            return False
+        if post_obj and post_obj.telegram_message_id:
+            try:
+                logger.info(f"🎭 Добавляем реакции к сообщению {post_obj.telegram_message_id}...")
+                await send_reactions(channel_username=CHANNEL_USERNAME, message_id=post_obj.telegram_message_id)
+                logger.info(f"🎉 Реакции успешно добавлены к сообщению {post_obj.telegram_message_id}")
+            except Exception as e:
+                logger.warning(f"⚠️ Реакции НЕ были применены к сообщению {post_obj.telegram_message_id}: {e}")
 
-    except Exception as e:
-        logger.error(f"❌ Ошибка обработки товара: {repr(e)}")
-        logger.error(f"Traceback:\n{traceback.format_exc()}")
+        return True
+    else:
+        logger.error(f"❌ Ошибка публикации товара: {publish_result}")
         return False
 
 
@@ -387,7 +460,7 @@ async def local_parsing():
         print(f"🔥 Получаем товары с Ozon: {category_url}")
 
         try:
-            products = parse_ozon_category_products(category_url, limit=10)
+            products = await parse_ozon_category_products_async(category_url, limit=10)
         except Exception as e:
             print(f"❌ Ошибка парсинга категории Ozon: {e}")
             from services.parser_ozon import get_fallback_ozon_urls
@@ -400,7 +473,7 @@ async def local_parsing():
         for product_url in products[:3]:
             try:
                 print(f"\n📦 Парсим Ozon товар: {product_url}")
-                product_data = parse_ozon_with_zenrows_bs4(product_url, ZENROWS_API_KEY)
+                product_data = await parse_ozon_with_zenrows_bs4_async(product_url, ZENROWS_API_KEY)
 
                 print("🔍 ДИАГНОСТИКА - ВСЕ ДАННЫЕ ТОВАРА:")
                 if product_data:
@@ -443,13 +516,13 @@ async def local_parsing():
         print("🔍 Пытаемся получить товар с Wildberries...")
         promo_url = random.choice(WILDBERRIES_PROMO_URLS)
         print(f"🔥 Получаем товары с Wildberries: {promo_url}")
-        products = parse_promo_products(promo_url, limit=10)
+        products = await parse_promo_products_async(promo_url, limit=10)
         random.shuffle(products)
 
         for product_url in products[:3]:
             try:
                 print(f"\n📦 Парсим WB товар: {product_url}")
-                product_data = parse_product(product_url)
+                product_data = await parse_product_async(product_url)
 
                 if not product_data or not product_data.get("description") or not product_data.get("image_url"):
                     print("❌ Товар неполный или недоступен")
@@ -14,6 +14,7 @@ from services.metrics import (
     PUBLISH_LATENCY,
     CHECK_REFUNDS_LATENCY,
 )
+from services.candidate_pool import candidate_pool_loop, publish_from_pool
 from services.payments import get_payment_status
 from services.publisher import publish_to_channel
 from services.random_post_publisher import publish_random_product
@@ -128,7 +129,10 @@ async def scheduled_post_loop():
                         if abs((slot_time - now).total_seconds()) <= TOLERANCE.total_seconds():
                             slot_matched = True
                             logger.info("🟢 Слот пуст — публикуем случайный товар.")
-                            await publish_random_product("products.txt")
+                            # Готовый пост из пула уходит сразу; поиск товара с нуля — только если пул пуст
+                            if not await publish_from_pool():
+                                logger.info("ℹ️ Пул кандидатов пуст — ищем товар сейчас.")
+                                await publish_random_product("products.txt")
                             break
 
                     if not slot_matched:
@@ -158,5 +162,6 @@ async def scheduled_post_loop():
 async def scheduler():
     await asyncio.gather(
         check_for_refunds_loop(),
-        scheduled_post_loop()
+        scheduled_post_loop(),
+        candidate_pool_loop()
     )
@@ -0,0 +1,106 @@
+# services/single_flight.py
+import asyncio
+import time
+import uuid
+
+from config import SINGLE_FLIGHT_LOCK_TTL, SINGLE_FLIGHT_WAIT_TIMEOUT
+from services import redis_client
+from services.metrics import SINGLE_FLIGHT_COALESCED
+from logs import get_logger
+
+logger = get_logger("single_flight")
+
+# Снимаем блокировку, только если она всё ещё наша
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Схлопывает одновременные вызовы с одинаковым ключом в один.
+
+    Внутри процесса ожидающие получают результат общей задачи, между репликами
+    лидерство определяется блокировкой в Redis: остальные реплики ждут, пока
+    результат появится через fetch_remote (например, в кэше).
+    """
+
+    def __init__(self, name: str, lock_ttl: float = SINGLE_FLIGHT_LOCK_TTL,
+                 wait_timeout: float = SINGLE_FLIGHT_WAIT_TIMEOUT, poll_interval: float = 1.0):
+        self.name = name
+        self._lock_ttl = lock_ttl
+        self._wait_timeout = wait_timeout
+        self._poll_interval = poll_interval
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, func, fetch_remote=None):
+        """
+        :param func: корутинная функция без аргументов, выполняющая работу.
+        :param fetch_remote: корутинная функция, возвращающая (найден, результат) — результат другой реплики.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._lead(key, func, fetch_remote))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            SINGLE_FLIGHT_COALESCED.labels(flight=self.name, scope="local").inc()
+            logger.info(f"🔗 Запрос {self.name}:{key} присоединён к уже идущему")
+        # shield: отмена одного из ожидающих не отменяет общую задачу
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # помечаем исключение как полученное
+
+    async def _lead(self, key: str, func, fetch_remote):
+        redis = redis_client.redis
+        if redis is None:
+            return await func()
+
+        lock_key = f"singleflight:{self.name}:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self._wait_timeout
+        waiting = False
+
+        while True:
+            try:
+                acquired = await redis.set(lock_key, token, nx=True, px=int(self._lock_ttl * 1000))
+            except Exception as e:
+                logger.warning(f"⚠️ Redis-блокировка {lock_key} недоступна: {e}")
+                return await func()
+
+            if acquired:
+                try:
+                    if waiting and fetch_remote is not None:
+                        # Другая реплика могла успеть сохранить результат перед снятием блокировки
+                        found, result = await fetch_remote()
+                        if found:
+                            return result
+                    return await func()
+                finally:
+                    try:
+                        await redis.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Не удалось снять блокировку {lock_key}: {e}")
+
+            if not waiting:
+                waiting = True
+                SINGLE_FLIGHT_COALESCED.labels(flight=self.name, scope="remote").inc()
+                logger.info(f"🔗 {self.name}:{key} уже обрабатывается другой репликой, ждём результат")
+
+            if fetch_remote is not None:
+                found, result = await fetch_remote()
+                if found:
+                    return result
+
+            if time.monotonic() >= deadline:
+                logger.warning(f"⏰ Не дождались результата {self.name}:{key}, выполняем сами")
+                return await func()
+
+            await asyncio.sleep(self._poll_interval)
@@ -0,0 +1,132 @@
+# services/wb_network.py
+import json
+import re
+
+from logs import get_logger
+
+logger = get_logger("wb_network")
+
+# JSON, которые фронтенд WB загружает для карточки товара
+WB_DETAIL_URL_PATTERN = re.compile(r"https?://card\.wb\.ru/cards/(v\d+/)?detail\?.*?\bnm=([\d;]+)")
+WB_CARD_URL_PATTERN = re.compile(r"https?://basket-\d+\.wbbasket\.ru/vol\d+/part\d+/(\d+)/info/ru/card\.json")
+
+
+def format_price(kopecks: int) -> str:
+    """Цена в копейках -> строка как на странице WB: «1 234 ₽»."""
+    return f"{kopecks // 100:,} ₽".replace(",", " ")
+
+
+def build_image_urls(card_url: str, photo_count: int) -> list[str]:
+    """Ссылки на фото товара по адресу card.json: фото лежат в той же «корзине» basket-NN."""
+    base = card_url.split("/info/", 1)[0]
+    return [f"{base}/images/big/{i}.webp" for i in range(1, max(photo_count, 1) + 1)]
+
+
+def build_wb_product(
+    url: str, detail: dict | None, card: dict | None, card_url: str | None = None, product_id: str | None = None
+) -> dict | None:
+    """
+    Собирает товар в формате parse_product из перехваченных JSON.
+
+    :param detail: ответ card.wb.ru/cards/.../detail (название, бренд, цена).
+    :param card: card.json из basket-NN.wbbasket.ru (описание, характеристики, число фото).
+    :param card_url: адрес card.json — по нему строятся ссылки на фото.
+    :param product_id: артикул товара; в ответе detail бывает несколько товаров.
+    :return: словарь товара или None, если данных недостаточно (нужен DOM-парсинг).
+    """
+    products = ((detail or {}).get("data") or {}).get("products") or []
+    info = next((p for p in products if product_id is None or str(p.get("id")) == product_id), {})
+    card = card or {}
+
+    name = info.get("name") or card.get("imt_name")
+    price_kopecks = None
+    for size in info.get("sizes") or []:
+        price_kopecks = (size.get("price") or {}).get("product")
+        if price_kopecks:
+            break
+    price_kopecks = price_kopecks or info.get("salePriceU")
+
+    if not name or not price_kopecks:
+        return None
+
+    characteristics = {
+        option["name"]: option["value"]
+        for option in card.get("options") or []
+        if option.get("name") and option.get("value")
+    }
+    images = build_image_urls(card_url, (card.get("media") or {}).get("photo_count", 1)) if card_url else []
+
+    return {
+        "name": name,
+        "brand": info.get("brand") or (card.get("selling") or {}).get("brand_name", ""),
+        "price": format_price(price_kopecks),
+        "description": card.get("description") or "Описание отсутствует",
+        "characteristics": characteristics,
+        "url": url,
+        "image_url": images[0] if images else "Изображение отсутствует",
+        "all_images": images,
+    }
+
+
+class WbResponseCollector:
+    """
+    Собирает JSON карточки товара из performance-логов Chrome (goog:loggingPrefs).
+
+    Тело ответа запрашивается через CDP Network.getResponseBody после Network.loadingFinished.
+    Экземпляр можно передавать как условие PageReadiness.step: вызов возвращает True,
+    когда получены оба ответа (detail и card.json).
+    """
+
+    def __init__(self, product_id: str):
+        self.product_id = product_id
+        self._pending: dict[str, str] = {}  # requestId -> url
+        self.detail: dict | None = None
+        self.card: dict | None = None
+        self.card_url: str | None = None
+
+    @staticmethod
+    def reset(driver):
+        """Сбрасывает накопленные логи (например, с предыдущей страницы «тёплого» драйвера)."""
+        driver.get_log("performance")
+
+    def _is_own_response(self, response_url: str) -> bool:
+        """JSON именно этого товара, а не рекомендаций на той же странице."""
+        detail = WB_DETAIL_URL_PATTERN.match(response_url)
+        if detail:
+            return self.product_id in detail.group(2).split(";")
+        card = WB_CARD_URL_PATTERN.match(response_url)
+        return bool(card) and card.group(1) == self.product_id
+
+    def _fetch_body(self, driver, request_id: str) -> dict | None:
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            return json.loads(body["body"])
+        except Exception as e:
+            logger.debug(f"Не удалось получить тело ответа {request_id}: {e}")
+            return None
+
+    def poll(self, driver) -> bool:
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method, params = message.get("method"), message.get("params", {})
+
+            if method == "Network.responseReceived":
+                response_url = params["response"]["url"]
+                if self._is_own_response(response_url):
+                    self._pending[params["requestId"]] = response_url
+            elif method == "Network.loadingFinished" and params.get("requestId") in self._pending:
+                response_url = self._pending.pop(params["requestId"])
+                data = self._fetch_body(driver, params["requestId"])
+                if data is None:
+                    continue
+                if WB_DETAIL_URL_PATTERN.match(response_url):
+                    self.detail = data
+                else:
+                    self.card, self.card_url = data, response_url
+
+        return self.detail is not None and self.card is not None
+
+    __call__ = poll
+
+    def build(self, url: str) -> dict | None:
+        return build_wb_product(url, self.detail, self.card, self.card_url, self.product_id)
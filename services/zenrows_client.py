@@ -0,0 +1,158 @@
+# services/zenrows_client.py
+import asyncio
+import random
+import time
+
+import aiohttp
+
+from config import (
+    ZENROWS_API_KEY,
+    ZENROWS_CONCURRENCY,
+    ZENROWS_MAX_RETRIES,
+    ZENROWS_RETRY_BUDGET,
+)
+from services.metrics import record_api_call
+from logs import get_logger
+
+logger = get_logger("zenrows_client")
+
+ZENROWS_ENDPOINT = "https://api.zenrows.com/v1/"
+
+# Ответы, после которых имеет смысл повторить запрос (rate limit, сбой рендеринга, ошибки сервера)
+RETRYABLE_STATUSES = {422, 429, 500, 502, 503, 504}
+# Сайт не отдал страницу этому режиму (блокировка, не удалось получить контент):
+# повтор тем же режимом обычно бесполезен, ступенчатая загрузка сразу повышает режим
+ESCALATE_STATUSES = frozenset({403, 422})
+
+
+class ZenRowsError(Exception):
+    """Запрос к ZenRows не удался после всех попыток."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class RetryBudget:
+    """
+    Общий запас повторов на одну задачу (товар, категорию).
+    Несколько запросов одной задачи не могут в сумме повторяться больше retries раз.
+    """
+
+    def __init__(self, retries: int = ZENROWS_RETRY_BUDGET):
+        self.remaining = retries
+
+    def take(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Экспоненциальная задержка с «полным» джиттером: повторы разных задач не совпадают по времени."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class ZenRowsClient:
+    """
+    Асинхронный клиент ZenRows с общим keep-alive пулом соединений.
+
+    Число одновременных запросов ограничено concurrency (лимит тарифа ZenRows).
+    Ожидание между повторами не блокирует event loop.
+    """
+
+    def __init__(self, api_key: str, concurrency: int, max_retries: int = ZENROWS_MAX_RETRIES):
+        self.api_key = api_key
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop = None
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # Сессия и семафор привязаны к event loop, поэтому создаются при первом запросе
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._session
+
+    async def get(
+        self,
+        params: dict,
+        timeout: float = 60,
+        budget: RetryBudget | None = None,
+        endpoint: str = "page",
+        fail_fast: frozenset[int] = frozenset(),
+    ) -> str:
+        """
+        Запрашивает страницу через ZenRows и возвращает HTML.
+
+        :param params: параметры ZenRows (url, js_render, ...); apikey подставляется автоматически.
+        :param timeout: таймаут одной попытки в секундах.
+        :param budget: общий запас повторов задачи; без него — max_retries повторов.
+        :param endpoint: метка запроса в метриках (product, category, ...).
+        :param fail_fast: статусы, после которых запрос не повторяется (вызывающий сменит режим).
+        :raises ZenRowsError: если все попытки неудачны.
+        """
+        session = self._ensure_session()
+        budget = budget or RetryBudget(self.max_retries)
+        request_params = {"apikey": self.api_key, **params}
+        attempt = 0
+
+        while True:
+            attempt += 1
+            start = time.monotonic()
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    async with session.get(
+                        ZENROWS_ENDPOINT, params=request_params, timeout=aiohttp.ClientTimeout(total=timeout)
+                    ) as response:
+                        status = response.status
+                        if status == 200:
+                            html = await response.text()
+                            record_api_call("zenrows", endpoint, "200", time.monotonic() - start)
+                            logger.info(f"✅ ZenRows ответил с попытки {attempt} за {time.monotonic() - start:.1f} сек.")
+                            return html
+                        retry_after = response.headers.get("Retry-After")
+                record_api_call("zenrows", endpoint, str(status), time.monotonic() - start)
+                if status not in RETRYABLE_STATUSES or status in fail_fast:
+                    raise ZenRowsError(f"ZenRows вернул HTTP {status}", status)
+                error = ZenRowsError(f"ZenRows вернул HTTP {status}", status)
+                logger.warning(f"⚠️ HTTP {status} от ZenRows на попытке {attempt}")
+            except asyncio.TimeoutError:
+                record_api_call("zenrows", endpoint, "timeout", time.monotonic() - start)
+                error = ZenRowsError(f"Таймаут запроса к ZenRows ({timeout} сек.)")
+                logger.warning(f"⏰ Таймаут ZenRows на попытке {attempt}")
+            except aiohttp.ClientError as e:
+                record_api_call("zenrows", endpoint, "connection_error", time.monotonic() - start)
+                error = ZenRowsError(f"Ошибка соединения с ZenRows: {e}")
+                logger.warning(f"🔌 Ошибка соединения с ZenRows на попытке {attempt}: {e}")
+
+            if not budget.take():
+                logger.error(f"❌ ZenRows: запас повторов исчерпан после {attempt} попыток")
+                raise error
+
+            delay = backoff_delay(attempt, base=5.0 if error.status == 429 else 1.0)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            logger.info(f"⏳ Ждем {delay:.1f} сек. перед следующей попыткой...")
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Общий клиент: все парсеры Ozon делят пул соединений и лимит тарифа
+zenrows_client = ZenRowsClient(ZENROWS_API_KEY, ZENROWS_CONCURRENCY)
+
+
+async def close_zenrows_client():
+    await zenrows_client.close()
+    logger.info("🛑 Клиент ZenRows закрыт")
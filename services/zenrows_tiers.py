@@ -0,0 +1,145 @@
+# services/zenrows_tiers.py
+"""
+Ступенчатая загрузка страниц через ZenRows: от дешёвого режима к дорогому.
+
+Страница сначала запрашивается самым дешёвым режимом. Если ZenRows вернул ошибку или
+в разобранном результате не хватает обязательных полей, запрос повторяется следующим
+режимом (JS-рендеринг, затем премиум-прокси). Режим, которого хватило, запоминается
+для шаблона URL, и следующие страницы того же шаблона сразу начинаются с него.
+"""
+import asyncio
+import time
+from typing import Callable, NamedTuple
+from urllib.parse import urlsplit
+
+from config import ZENROWS_TIER_MEMORY_TTL
+from services.html_cache import HtmlCache, html_cache
+from services.metrics import record_zenrows_fetch
+from services.parse_executor import run_parser_job
+from services.zenrows_client import ESCALATE_STATUSES, RetryBudget, ZenRowsClient, ZenRowsError
+from logs import get_logger
+
+logger = get_logger("zenrows_tiers")
+
+
+class FetchTier(NamedTuple):
+    name: str
+    params: dict
+    credits: int  # стоимость успешного запроса в кредитах ZenRows
+
+
+def build_tiers(wait_for: str, wait: int) -> list[FetchTier]:
+    """Режимы по возрастанию стоимости; wait и wait_for нужны только при JS-рендеринге."""
+    render = {"js_render": "true", "wait": wait, "wait_for": wait_for}
+    return [
+        FetchTier("basic", {}, 1),
+        FetchTier("js", render, 5),
+        FetchTier("premium", {**render, "premium_proxy": "true"}, 25),
+    ]
+
+
+def url_pattern(url: str) -> str:
+    """Шаблон URL для запоминания режима: хост и первый сегмент пути (www.ozon.ru/product)."""
+    parts = urlsplit(url)
+    segment = parts.path.strip("/").split("/", 1)[0]
+    return f"{parts.netloc}/{segment}"
+
+
+class TierMemory:
+    """
+    Какой режим понадобился для шаблона URL в последний раз.
+    Запись живёт ttl секунд, после чего снова пробуется самый дешёвый режим:
+    так экономия вернётся, если сайт перестанет требовать рендеринг.
+    """
+
+    def __init__(self, ttl: float = ZENROWS_TIER_MEMORY_TTL):
+        self.ttl = ttl
+        self._tiers: dict[str, tuple[str, float]] = {}
+
+    def start_index(self, url: str, tiers: list[FetchTier]) -> int:
+        remembered = self._tiers.get(url_pattern(url))
+        if not remembered or remembered[1] < time.monotonic():
+            return 0
+        names = [tier.name for tier in tiers]
+        return names.index(remembered[0]) if remembered[0] in names else 0
+
+    def remember(self, url: str, tier: FetchTier):
+        self._tiers[url_pattern(url)] = (tier.name, time.monotonic() + self.ttl)
+
+    def clear(self):
+        self._tiers.clear()
+
+
+tier_memory = TierMemory()
+
+
+async def fetch_tiered(
+    client: ZenRowsClient,
+    url: str,
+    tiers: list[FetchTier],
+    extract: Callable,
+    is_complete: Callable,
+    *,
+    endpoint: str,
+    timeout: float = 60,
+    budget: RetryBudget | None = None,
+    memory: TierMemory = tier_memory,
+    cache: HtmlCache = html_cache,
+):
+    """
+    Загружает url, начиная с запомненного (или самого дешёвого) режима, и разбирает HTML
+    функцией extract(html) в пуле парсеров.
+
+    Возвращает первый результат, прошедший is_complete, иначе результат последнего режима.
+    Все режимы делят один запас повторов budget, но на 403/422 (ESCALATE_STATUSES) промежуточные
+    режимы не повторяются, а сразу уступают следующему: запас остаётся последнему режиму.
+    Ответы сохраняются в дисковый кэш HTML и берутся из него, пока не устарели; в режиме
+    replay сеть не используется, а режимы без страницы в кэше пропускаются.
+    :raises ZenRowsError: если ошибкой завершился и последний режим.
+    """
+    budget = budget or RetryBudget()
+    result = None
+    first = 0 if cache.replay else memory.start_index(url, tiers)
+
+    for index in range(first, len(tiers)):
+        tier = tiers[index]
+        is_last = index == len(tiers) - 1
+        mode = f"zenrows-{tier.name}"
+
+        html = await asyncio.to_thread(cache.get, url, mode)
+        if html is not None:
+            result = await run_parser_job(extract, html, kind="http")
+            if is_complete(result):
+                logger.info(f"💾 {endpoint}: страница режима [{tier.name}] взята из кэша HTML")
+                return result
+            continue
+        if cache.replay:
+            if is_last and result is None:
+                raise ZenRowsError(f"Страницы нет в кэше HTML (replay): {url}")
+            continue
+
+        start = time.monotonic()
+        try:
+            html = await client.get({"url": url, **tier.params}, timeout=timeout, budget=budget, endpoint=endpoint,
+                                    fail_fast=frozenset() if is_last else ESCALATE_STATUSES)
+        except ZenRowsError as e:
+            record_zenrows_fetch(endpoint, tier.name, "error", 0, time.monotonic() - start)
+            if is_last:
+                raise
+            logger.warning(f"⚠️ ZenRows [{tier.name}] не отдал страницу ({e}), повышаем режим")
+            continue
+        duration = time.monotonic() - start
+        await asyncio.to_thread(cache.put, url, mode, html)
+
+        result = await run_parser_job(extract, html, kind="http")
+        if is_complete(result):
+            record_zenrows_fetch(endpoint, tier.name, "complete", tier.credits, duration)
+            memory.remember(url, tier)
+            logger.info(f"💰 {endpoint}: хватило режима ZenRows [{tier.name}] ({tier.credits} кр.)")
+            return result
+
+        record_zenrows_fetch(endpoint, tier.name, "incomplete", tier.credits, duration)
+        if not is_last:
+            logger.info(f"🔼 {endpoint}: в режиме [{tier.name}] не хватает данных, повышаем режим")
+
+    return result
@@ -194,4 +194,83 @@ async def test_user(db_session):
     user = User(id=123456, username="testuser", is_premium=False)
     db_session.add(user)
     await db_session.flush()  # без commit — останемся в текущей транзакции/сейвпоинте
-    return user
\ No newline at end of file
+    return user
+
+
+class FakeRedis:
+    """Минимальная замена redis.asyncio.Redis для тестов (без учёта TTL)."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttl = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        self.ttl[key] = ex if ex is not None else px
+        return True
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def rpush(self, key, *values):
+        self.data.setdefault(key, []).extend(values)
+        return len(self.data[key])
+
+    async def lpop(self, key):
+        items = self.data.get(key)
+        return items.pop(0) if items else None
+
+    async def lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return items[start:None if end == -1 else end + 1]
+
+    async def zadd(self, key, mapping):
+        zset = self.data.setdefault(key, {})
+        added = sum(member not in zset for member in mapping)
+        zset.update(mapping)
+        return added
+
+    async def zscore(self, key, member):
+        return self.data.get(key, {}).get(member)
+
+    async def zremrangebyscore(self, key, low, high):
+        zset = self.data.get(key, {})
+        low, high = float(low), float(high)
+        removed = [member for member, score in zset.items() if low <= score <= high]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+
+    async def eval(self, script, numkeys, *args):
+        # Единственный используемый скрипт — «удалить ключ, если значение совпадает»
+        key, token = args[0], args[1]
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Подменяет глобальное подключение services.redis_client.redis на FakeRedis."""
+    import services.redis_client as redis_client
+
+    redis = FakeRedis()
+    monkeypatch.setattr(redis_client, "redis", redis)
+    return redis
+
+
+@pytest.fixture(autouse=True)
+def isolated_html_cache(monkeypatch, tmp_path):
+    """Дисковый кэш HTML пишет во временный каталог теста, а не в cache/html проекта."""
+    from services.html_cache import html_cache
+
+    monkeypatch.setattr(html_cache, "directory", tmp_path / "html_cache")
+    monkeypatch.setattr(html_cache, "replay", False)
+    monkeypatch.setattr(html_cache, "_size", None)
+    return html_cache
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+import services.candidate_pool as pool
+
+
+def _post(n):
+    return {"title": f"Товар {n}", "description": "…", "price": "100 ₽", "image_url": f"https://img/{n}.jpg",
+            "url": f"https://www.ozon.ru/product/item-{n}/", "source": "ozon"}
+
+
+@pytest.mark.asyncio
+async def test_push_pop_fifo_and_dedup(fake_redis):
+    assert await pool.push_post(_post(1))
+    assert await pool.push_post(_post(2))
+    assert not await pool.push_post(_post(1))  # товар уже в пуле
+
+    assert await pool.update_pool_metrics() == 2
+    assert (await pool.pop_post())["title"] == "Товар 1"
+    assert (await pool.pop_post())["title"] == "Товар 2"
+    assert await pool.pop_post() is None
+
+
+@pytest.mark.asyncio
+async def test_stale_posts_are_dropped(fake_redis, monkeypatch):
+    await pool.push_post(_post(1))
+    later = time.time() + pool.CANDIDATE_POOL_TTL + 1
+    monkeypatch.setattr(pool.time, "time", lambda: later)
+
+    assert await pool.update_pool_metrics() == 0
+    assert await pool.pop_post() is None
+
+
+@pytest.mark.asyncio
+async def test_publish_from_pool_skips_failed_post(fake_redis, monkeypatch):
+    published = []
+
+    async def publish(post_data):
+        published.append(post_data["title"])
+        return post_data["title"] == "Товар 2"
+
+    monkeypatch.setattr(pool, "publish_prepared_post", publish)
+    for n in (1, 2, 3):
+        await pool.push_post(_post(n))
+
+    assert await pool.publish_from_pool()
+    assert published == ["Товар 1", "Товар 2"]
+    assert await pool.update_pool_metrics() == 1
+
+
+@pytest.mark.asyncio
+async def test_refill_prepares_until_full(fake_redis, monkeypatch):
+    products = iter(range(10))
+
+    wants = []
+
+    async def find_random_product(sink, want=1):
+        wants.append(want)
+        # Источник выдал меньше постов, чем просили: пул дозаполняется следующим прогоном
+        return any([await sink(_post(next(products))) for _ in range(min(want, 2))])
+
+    monkeypatch.setattr(pool, "find_random_product", find_random_product)
+
+    assert await pool.refill_pool(size=3) == 3
+    assert [entry["post"]["title"] for entry in await pool.pool_entries()] == ["Товар 0", "Товар 1", "Товар 2"]
+    assert wants == [3, 1]
+
+
+@pytest.mark.asyncio
+async def test_pool_disabled_without_redis(monkeypatch):
+    import services.redis_client as redis_client
+
+    monkeypatch.setattr(redis_client, "redis", None)
+
+    assert not await pool.push_post(_post(1))
+    assert not await pool.publish_from_pool()
@@ -54,9 +54,206 @@ async def test_generate_description_long_values():
 @pytest.mark.asyncio
 async def test_generate_description_unexpected_response(mocker):
     """Проверяем обработку неожиданных ответов от OpenAI"""
-    mocker.patch("services.content_generator.openai.ChatCompletion.acreate", return_value={})
+    mocker.patch("openai.ChatCompletion.acreate", return_value={})
 
     result = await generate_product_description("Test", "Some description")
 
     assert isinstance(result, str), "Должен возвращаться строковый результат"
     assert "ошибка" in result.lower() or len(result) > 0, "Должно быть fallback сообщение"
+
+
+@pytest.fixture
+def description_db(monkeypatch, db_session):
+    """Кэш описаний работает с тестовой сессией через async with database.async_session()."""
+    from contextlib import asynccontextmanager
+    from services import database
+
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    monkeypatch.setattr(database, "async_session", session_factory)
+    return db_session
+
+
+def _counting_acreate(calls):
+    async def acreate(**kwargs):
+        calls.append(kwargs)
+        response = AsyncMock()
+        response.choices = [AsyncMock(message=AsyncMock(content=f"Описание №{len(calls)}"))]
+        return response
+    return acreate
+
+
+@pytest.mark.asyncio
+async def test_description_cache_hit_and_regenerate_bypass(fake_redis, description_db):
+    calls = []
+    with patch("openai.ChatCompletion.acreate", side_effect=_counting_acreate(calls)):
+        first = await generate_product_description("Платье", "Хлопок, размер M")
+        # Та же карточка с другими пробелами и регистром — тот же ключ
+        second = await generate_product_description(" платье ", "хлопок,  размер M")
+        regenerated = await generate_product_description("Платье", "Хлопок, размер M", bypass_cache=True)
+        after = await generate_product_description("Платье", "Хлопок, размер M")
+
+    assert first == second == "Описание №1"
+    assert regenerated == after == "Описание №2"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_description_cache_falls_back_to_db(fake_redis, description_db):
+    calls = []
+    with patch("openai.ChatCompletion.acreate", side_effect=_counting_acreate(calls)):
+        first = await generate_product_description("Юбка миди", "Шерсть")
+        fake_redis.data.clear()  # Redis перезапущен
+        second = await generate_product_description("Юбка миди", "Шерсть")
+
+    assert first == second
+    assert len(calls) == 1
+    assert len(fake_redis.data) == 1  # найденное в БД вернулось в Redis
+
+
+@pytest.mark.asyncio
+async def test_generation_error_is_not_cached(fake_redis, description_db):
+    with patch("openai.ChatCompletion.acreate", side_effect=Exception("API Error")):
+        assert await generate_product_description("Блузка", "Шёлк") == "❌ Ошибка при генерации описания."
+    assert fake_redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_variants_come_from_one_request(fake_redis, description_db):
+    from services.content_generator import generate_description_variants
+
+    calls = []
+
+    async def acreate(**kwargs):
+        calls.append(kwargs)
+        response = AsyncMock()
+        response.choices = [AsyncMock(message=AsyncMock(content=f" Вариант {i} ")) for i in range(kwargs["n"])]
+        return response
+
+    with patch("openai.ChatCompletion.acreate", side_effect=acreate):
+        variants = await generate_description_variants("Кардиган", "Шерсть", n=3)
+        cached = await generate_description_variants("Кардиган", "Шерсть", n=3)
+
+    assert variants == ["Вариант 0", "Вариант 1", "Вариант 2"]
+    assert cached == ["Вариант 0"]
+    assert len(calls) == 1
+
+
+def _batch_acreate(calls, payload):
+    async def acreate(**kwargs):
+        calls.append(kwargs)
+        response = AsyncMock()
+        content = payload(kwargs) if callable(payload) else payload
+        response.choices = [AsyncMock(message=AsyncMock(content=content))]
+        return response
+    return acreate
+
+
+@pytest.mark.asyncio
+async def test_batch_generation_splits_and_validates(fake_redis, description_db):
+    import json
+    from services.content_generator import generate_product_descriptions
+
+    batch = json.dumps({"descriptions": [
+        {"id": 0, "text": "Лёгкое платье на лето"},
+        {"id": 1, "text": "Д" * 181},  # длиннее лимита — генерируется отдельно
+        {"id": 2, "text": "Строгий жакет"},
+    ]}, ensure_ascii=False)
+    calls = []
+
+    def payload(kwargs):
+        return f"```json\n{batch}\n```" if len(calls) == 1 else "Блузка для офиса"
+
+    with patch("openai.ChatCompletion.acreate", side_effect=_batch_acreate(calls, payload)):
+        texts = await generate_product_descriptions([("Платье", "Лён"), ("Блузка", "Шёлк"), ("Жакет", "Твид")])
+        cached = await generate_product_descriptions([("Платье", "Лён"), ("Жакет", "Твид")])
+
+    assert texts == ["Лёгкое платье на лето", "Блузка для офиса", "Строгий жакет"]
+    assert cached == ["Лёгкое платье на лето", "Строгий жакет"]
+    assert len(calls) == 2  # один пакетный запрос и один повтор для невалидного описания
+
+
+@pytest.mark.asyncio
+async def test_batcher_packs_concurrent_requests(fake_redis, description_db):
+    import asyncio
+    import json
+    from services.content_generator import DescriptionBatcher
+
+    calls = []
+
+    def payload(kwargs):
+        products = json.loads(kwargs["messages"][1]["content"].split("Товары: ", 1)[1])
+        return json.dumps({"descriptions": [{"id": p["id"], "text": f"Про {p['name']}"} for p in products]},
+                          ensure_ascii=False)
+
+    batcher = DescriptionBatcher(max_size=3, window=0.05)
+    with patch("openai.ChatCompletion.acreate", side_effect=_batch_acreate(calls, payload)):
+        texts = await asyncio.gather(*(batcher.generate(f"Товар {i}", "Хлопок") for i in range(3)))
+
+    assert texts == ["Про Товар 0", "Про Товар 1", "Про Товар 2"]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_batcher_flush_sends_partial_batch_without_waiting_for_window(fake_redis, description_db):
+    import asyncio
+    import json
+    from services.content_generator import DescriptionBatcher
+
+    calls = []
+
+    def payload(kwargs):
+        products = json.loads(kwargs["messages"][1]["content"].split("Товары: ", 1)[1])
+        return json.dumps({"descriptions": [{"id": p["id"], "text": f"Про {p['name']}"} for p in products]},
+                          ensure_ascii=False)
+
+    batcher = DescriptionBatcher(max_size=5, window=30)
+    with patch("openai.ChatCompletion.acreate", side_effect=_batch_acreate(calls, payload)):
+        pending = [asyncio.create_task(batcher.generate(f"Куртка {i}", "Пух")) for i in range(2)]
+        await asyncio.sleep(0)
+        batcher.flush()  # предыдущий этап закончился — больше товаров не будет
+        texts = await asyncio.wait_for(asyncio.gather(*pending), 1)
+
+    assert texts == ["Про Куртка 0", "Про Куртка 1"]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_fallback_enforces_length_limit(fake_redis, description_db):
+    from services.content_generator import MAX_DESCRIPTION_LENGTH, generate_product_descriptions
+
+    calls = []
+
+    def payload(kwargs):
+        return "не JSON" if len(calls) == 1 else "Тёплое пальто " * 20
+
+    with patch("openai.ChatCompletion.acreate", side_effect=_batch_acreate(calls, payload)):
+        texts = await generate_product_descriptions([("Пальто", "Шерсть"), ("Шарф", "Кашемир")])
+
+    assert all(len(text) <= MAX_DESCRIPTION_LENGTH for text in texts)
+    assert texts[0].endswith("…") and texts[0][:-1].split()[-1] in ("Тёплое", "пальто")  # по границе слова
+
+
+@pytest.mark.asyncio
+async def test_streamed_description_is_cached(fake_redis, description_db):
+    from services.content_generator import stream_description_variants
+
+    async def chunks():
+        for text in ["Мягкий ", "свитер"]:
+            yield {"choices": [{"index": 0, "delta": {"content": text}}]}
+
+    calls = []
+
+    async def acreate(**kwargs):
+        calls.append(kwargs)
+        return chunks()
+
+    with patch("openai.ChatCompletion.acreate", side_effect=acreate):
+        streamed = [part async for part in stream_description_variants("Свитер", "Кашемир", n=1)]
+        cached = [part async for part in stream_description_variants("Свитер", "Кашемир", n=1)]
+
+    assert streamed == [(0, "Мягкий "), (0, "свитер")]
+    assert cached == [(0, "Мягкий свитер")]
+    assert len(calls) == 1
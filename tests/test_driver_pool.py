@@ -0,0 +1,193 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.driver_pool import DriverPool
+
+
+def _fake_driver():
+    driver = MagicMock()
+    driver.execute_script.return_value = 1
+    return driver
+
+
+def _make_pool(size=1, max_pages=10, max_age_seconds=600):
+    factory = MagicMock(side_effect=lambda profile: _fake_driver())
+    return DriverPool(factory, size=size, max_pages=max_pages, max_age_seconds=max_age_seconds, name="test"), factory
+
+
+def test_checkout_reuses_warm_driver():
+    """Повторная выдача возвращает тот же драйвер без запуска нового."""
+    pool, factory = _make_pool()
+
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        pass
+
+    assert first is second
+    assert factory.call_count == 1
+    first.quit.assert_not_called()
+
+
+def test_driver_recycled_after_max_pages():
+    """После max_pages страниц драйвер закрывается и создаётся новый."""
+    pool, factory = _make_pool(max_pages=2)
+
+    with pool.driver() as first:
+        pass
+    with pool.driver():
+        pass
+    with pool.driver() as third:
+        pass
+
+    assert third is not first
+    assert factory.call_count == 2
+    first.quit.assert_called_once()
+
+
+def test_driver_recycled_after_max_age():
+    """Устаревший драйвер пересоздаётся при следующей выдаче."""
+    pool, factory = _make_pool(max_age_seconds=60)
+
+    item = pool.checkout()
+    item.created_at = time.monotonic() - 120
+    pool.checkin(item)
+
+    with pool.driver() as driver:
+        assert driver is not item.driver
+    item.driver.quit.assert_called_once()
+
+
+def test_unhealthy_driver_replaced():
+    """Драйвер, не прошедший health-check, заменяется новым."""
+    pool, factory = _make_pool()
+
+    with pool.driver() as first:
+        first.execute_script.side_effect = Exception("session deleted")
+
+    with pool.driver() as second:
+        assert second is not first
+    assert factory.call_count == 2
+
+
+def test_checkout_timeout_when_pool_exhausted():
+    """При исчерпании пула checkout ждёт не дольше timeout."""
+    pool, _ = _make_pool(size=1)
+    item = pool.checkout()
+
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.05)
+
+    pool.checkin(item)
+
+
+def test_factory_error_releases_slot():
+    """Ошибка запуска драйвера не «съедает» место в пуле."""
+    factory = MagicMock(side_effect=[RuntimeError("chrome crashed"), _fake_driver()])
+    pool = DriverPool(factory, size=1, max_pages=10, max_age_seconds=600, name="test")
+
+    with pytest.raises(RuntimeError):
+        pool.checkout(timeout=0.1)
+
+    item = pool.checkout(timeout=0.1)
+    assert item.driver is not None
+
+
+@pytest.mark.asyncio
+async def test_async_acquire_shares_capacity():
+    """Асинхронные потребители делят ёмкость пула и получают драйверы по очереди."""
+    pool, factory = _make_pool(size=1)
+    in_use = []
+
+    async def worker():
+        async with pool.acquire() as driver:
+            in_use.append(driver)
+            assert len(in_use) == 1
+            await asyncio.sleep(0.01)
+            in_use.remove(driver)
+
+    await asyncio.gather(worker(), worker(), worker())
+
+    assert factory.call_count == 1
+    pool.close()
+
+
+def test_profiles_share_pool_capacity():
+    """Драйверы разных профилей делят лимит: свободный драйвер чужого профиля заменяется."""
+    pool, factory = _make_pool(size=1)
+
+    with pool.driver() as default_driver:
+        pass
+    with pool.driver(profile="fast") as fast_driver:
+        pass
+
+    assert fast_driver is not default_driver
+    default_driver.quit.assert_called_once()
+    assert [call.args[0] for call in factory.call_args_list] == ["default", "fast"]
+
+
+def test_async_waiters_do_not_exhaust_executor():
+    """Ожидающие acquire не занимают потоки executor'а: больше ожидающих, чем потоков, — без зависания."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    pool, factory = _make_pool(size=1)
+    executor = ThreadPoolExecutor(max_workers=4)
+    done = []
+
+    async def job(n):
+        async with pool.acquire():
+            await asyncio.sleep(0.01)
+            done.append(n)
+
+    async def main():
+        await asyncio.wait_for(asyncio.gather(*(job(n) for n in range(6))), timeout=5)
+
+    # Свой event loop: маленький executor по умолчанию не достаётся другим тестам
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(executor)
+    try:
+        loop.run_until_complete(main())
+    finally:
+        pool.close()
+        loop.close()
+        executor.shutdown(wait=True)
+
+    assert sorted(done) == list(range(6))
+    assert factory.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_async_acquire_times_out():
+    pool, _ = _make_pool(size=1)
+    item = pool.checkout()
+
+    with pytest.raises(TimeoutError):
+        async with pool.acquire(timeout=0.05):
+            pass
+
+    pool.checkin(item)
+    async with pool.acquire(timeout=0.5) as driver:
+        assert driver is item.driver
+
+
+@pytest.mark.asyncio
+async def test_failed_acquire_body_retires_driver():
+    """Драйвер, с которым тело упало или вышло по таймауту, не возвращается в пул."""
+    pool, factory = _make_pool(size=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        async with pool.acquire() as first:
+            await asyncio.wait_for(asyncio.sleep(1), timeout=0.01)
+
+    async with pool.acquire(timeout=1) as second:
+        assert second is not first
+    for _ in range(100):  # quit выполняется в executor
+        if first.quit.called:
+            break
+        await asyncio.sleep(0.01)
+    first.quit.assert_called_once()
+    assert factory.call_count == 2
+    pool.close()
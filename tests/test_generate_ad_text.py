@@ -0,0 +1,140 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.types import CallbackQuery, Message
+
+
+class FakeState:
+    """FSMContext с данными в словаре."""
+
+    def __init__(self, **data):
+        self.data = data
+
+    async def get_data(self):
+        return dict(self.data)
+
+    async def update_data(self, **kwargs):
+        self.data.update(kwargs)
+
+
+class FakeSessionContext:
+    def __init__(self, session):
+        self._session = session
+
+    async def __aenter__(self):
+        return self._session
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+def _callback():
+    callback = AsyncMock(spec=CallbackQuery)
+    callback.from_user = MagicMock(id=1, username="tester")
+    callback.message = AsyncMock(spec=Message)
+    callback.message.answer = AsyncMock()
+    callback.message.answer_photo = AsyncMock()
+    return callback
+
+
+def _session():
+    session = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = None
+    session.execute = AsyncMock(return_value=result)
+    session.flush = AsyncMock()
+    session.begin = MagicMock(return_value=FakeSessionContext(None))
+    return session
+
+
+@pytest.mark.asyncio
+async def test_regenerate_serves_stored_variants_before_calling_llm(monkeypatch):
+    import handlers.callback_handlers as callback_handlers
+    from handlers.callback_handlers import generate_ad_text
+
+    monkeypatch.setattr(callback_handlers, "DESCRIPTION_STREAMING", False)
+
+    product = {"title": "Платье", "description": "Хлопок", "price": "1000 ₽", "url": "https://x", "image_url": "https://i"}
+    state = FakeState(product_data=product, description_variants=[])
+    generate = AsyncMock(side_effect=[["Вариант 1", "Вариант 2", "Вариант 3"], ["Вариант 4", "Вариант 5"]])
+    session = _session()
+
+    with patch("handlers.callback_handlers.generate_description_variants", generate), \
+            patch("handlers.callback_handlers.async_session", lambda: FakeSessionContext(session)):
+        captions = []
+        for regenerate in (False, True, True, True):
+            callback = _callback()
+            await generate_ad_text(callback, state, regenerate=regenerate)
+            captions.append(callback.message.answer_photo.call_args.kwargs["caption"])
+
+    assert [caption.split(" ✨")[0].lstrip("✨ ") for caption in captions] == [
+        "Вариант 1", "Вариант 2", "Вариант 3", "Вариант 4"
+    ]
+    assert generate.await_count == 2
+    assert generate.await_args_list[0].kwargs["bypass_cache"] is False
+    assert generate.await_args_list[1].kwargs["bypass_cache"] is True
+    assert state.data["description_variants"] == ["Вариант 5"]
+
+
+@pytest.mark.asyncio
+async def test_streaming_edits_preview_and_finishes_with_keyboard(monkeypatch):
+    import handlers.callback_handlers as callback_handlers
+    from handlers.callback_handlers import generate_ad_text
+
+    monkeypatch.setattr(callback_handlers, "DESCRIPTION_STREAMING", True)
+    monkeypatch.setattr(callback_handlers, "DESCRIPTION_STREAM_EDIT_INTERVAL", 0)
+
+    async def stream(name, description, bypass_cache):
+        for index, text in [(0, "Лёгкое "), (1, "Второй"), (0, "платье"), (1, " вариант")]:
+            yield index, text
+
+    product = {"title": "Платье", "description": "Лён", "price": "1000 ₽", "url": "https://x", "image_url": "https://i"}
+    state = FakeState(product_data=product, description_variants=[])
+    callback = _callback()
+    preview = AsyncMock()
+    callback.message.answer_photo = AsyncMock(return_value=preview)
+    session = _session()
+
+    with patch("handlers.callback_handlers.stream_description_variants", stream), \
+            patch("handlers.callback_handlers.async_session", lambda: FakeSessionContext(session)):
+        await generate_ad_text(callback, state)
+
+    # Превью с фото отправлено один раз, сразу, без клавиатуры
+    callback.message.answer_photo.assert_awaited_once()
+    assert "reply_markup" not in callback.message.answer_photo.await_args.kwargs
+
+    captions = [call.kwargs["caption"] for call in preview.edit_caption.await_args_list]
+    assert captions[0].startswith("✨ Лёгкое ▌")
+    assert captions[-1].startswith("✨ Лёгкое платье ✨")
+    assert preview.edit_caption.await_args_list[-1].kwargs["reply_markup"] is not None
+    assert state.data["description_variants"] == ["Второй вариант"]
+
+
+@pytest.mark.asyncio
+async def test_streaming_first_chunk_is_shown_without_waiting_for_interval(monkeypatch):
+    import handlers.callback_handlers as callback_handlers
+    from handlers.callback_handlers import generate_ad_text
+
+    monkeypatch.setattr(callback_handlers, "DESCRIPTION_STREAMING", True)
+    monkeypatch.setattr(callback_handlers, "DESCRIPTION_STREAM_EDIT_INTERVAL", 10)
+
+    async def stream(name, description, bypass_cache):
+        for index, text in [(0, "Лёгкое "), (0, "платье")]:
+            yield index, text
+
+    product = {"title": "Платье", "description": "Лён", "price": "1000 ₽", "url": "https://x", "image_url": "https://i"}
+    state = FakeState(product_data=product, description_variants=[])
+    callback = _callback()
+    preview = AsyncMock()
+    callback.message.answer_photo = AsyncMock(return_value=preview)
+    session = _session()
+
+    with patch("handlers.callback_handlers.stream_description_variants", stream), \
+            patch("handlers.callback_handlers.async_session", lambda: FakeSessionContext(session)):
+        await generate_ad_text(callback, state)
+
+    # Первый фрагмент — сразу, второй — в пределах интервала пропущен, затем итоговая подпись
+    captions = [call.kwargs["caption"] for call in preview.edit_caption.await_args_list]
+    assert len(captions) == 2
+    assert captions[0].startswith("✨ Лёгкое ▌")
+    assert captions[1].startswith("✨ Лёгкое платье ✨")
@@ -0,0 +1,62 @@
+import pytest
+
+from services.html_backend import HtmlNode, available_backends, parse_html
+from services.ozon_page import OzonPage
+from services.parser_ozon import extract_all_characteristics, extract_brand, find_product_images
+
+PRODUCT_HTML = """
+<html><head>
+<meta property="og:image" content="https://ir.ozone.ru/s3/multimedia-1-a/wc200/100.jpg">
+<script type="application/ld+json">
+{"image": "https://ir.ozone.ru/s3/multimedia-1-b/wc1000/200.jpg",
+ "additionalProperty": [{"name": "Материал", "value": "лён"}]}
+</script>
+</head><body>
+<a class="tsCompactControl500Medium" href="/brand/zarina-123/"> Zarina </a>
+<div data-widget="webShortCharacteristics">
+  <div class="q6l_27"><span class="tsBodyM">Цвет</span><span class="tsBody400Small">белый</span></div>
+</div>
+<div data-widget="webGallery"><img src="https://ir.ozone.ru/s3/multimedia-1-c/wc100/300.jpg"></div>
+<div data-widget="webGallery"><img src="https://ir.ozone.ru/s3/multimedia-video/cover.jpg"></div>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_extractors_work_with_every_backend(backend):
+    """Экстракторы дают одинаковый результат на любом доступном движке."""
+    page = OzonPage(PRODUCT_HTML, backend)
+
+    assert extract_brand(page) == "Zarina"
+    assert extract_all_characteristics(page) == {"Цвет": "белый", "Материал": "лён"}
+    images = find_product_images(page)
+    assert any("multimedia-1-b" in url for url in images)
+    assert not any("cover" in url for url in images)
+
+
+def test_unknown_backend_falls_back_to_html_parser():
+    """Недоступный движок заменяется встроенным html.parser."""
+    doc = parse_html("<p> text </p>", "no-such-backend")
+
+    assert doc.select_one("p").text() == "text"
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_page_indexes_meta_json_ld_and_widgets_once(backend):
+    """OzonPage собирает meta, JSON-LD и блоки data-widget при разборе."""
+    page = OzonPage(PRODUCT_HTML, backend)
+
+    assert page.meta["og:image"] == ["https://ir.ozone.ru/s3/multimedia-1-a/wc200/100.jpg"]
+    assert page.json_ld[0]["additionalProperty"][0]["value"] == "лён"
+    assert len(page.widgets["webGallery"]) == 2
+    assert page.widget("webShortCharacteristics") is not None
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_backend_nodes_implement_interface(backend):
+    """Узлы движков реализуют весь интерфейс HtmlNode; сам интерфейс не создаётся."""
+    doc = parse_html("<p> text </p>", backend)
+
+    assert isinstance(doc, HtmlNode) and isinstance(doc.select_one("p"), HtmlNode)
+    with pytest.raises(TypeError):
+        HtmlNode()
@@ -0,0 +1,86 @@
+import os
+import time
+
+import pytest
+
+from services.html_cache import HtmlCache, normalize_url
+from services.zenrows_client import ZenRowsClient, ZenRowsError
+from services.zenrows_tiers import TierMemory, build_tiers, fetch_tiered
+
+URL = "https://www.ozon.ru/product/palto-dreamwhite-1567177548/?at=abc"
+
+
+def test_normalize_url_drops_tracking_params():
+    assert normalize_url(URL) == "https://www.ozon.ru/product/palto-dreamwhite-1567177548"
+    assert normalize_url("https://WWW.ozon.ru/search/?text=x&utm_source=tg#top") == \
+        "https://www.ozon.ru/search?text=x"
+
+
+def test_roundtrip_is_keyed_by_url_and_mode(tmp_path):
+    cache = HtmlCache(tmp_path, ttl=60, max_bytes=10 ** 6)
+    cache.put(URL, "zenrows-basic", "<html>привет</html>")
+
+    assert cache.get("https://www.ozon.ru/product/palto-dreamwhite-1567177548", "zenrows-basic") == \
+        "<html>привет</html>"
+    assert cache.get(URL, "zenrows-premium") is None
+
+
+def test_expired_entries_are_served_only_in_replay(tmp_path):
+    cache = HtmlCache(tmp_path, ttl=0.01, max_bytes=10 ** 6)
+    cache.put(URL, "selenium", "<html>old</html>")
+    time.sleep(0.02)
+
+    assert cache.get(URL, "selenium") is None
+    assert HtmlCache(tmp_path, ttl=0, max_bytes=10 ** 6, replay=True).get(URL, "selenium") == "<html>old</html>"
+
+
+def test_evicts_least_recently_read(tmp_path):
+    page = os.urandom(4000).hex()
+    cache = HtmlCache(tmp_path, ttl=60, max_bytes=10 ** 6)
+    cache.put("https://a.ru/1", "m", page)
+    cache.put("https://a.ru/2", "m", page)
+    first, second = (next(tmp_path.glob(f"{cache.key(f'https://a.ru/{i}', 'm')}*")) for i in (1, 2))
+    cache.max_bytes = int(first.stat().st_size * 2.5)  # помещаются две страницы из трёх
+    old = time.time() - 100
+    os.utime(first, (old, old))
+    os.utime(second, (old + 1, old + 1))
+    cache.get("https://a.ru/1", "m")  # чтение продлевает жизнь первой страницы
+
+    cache.put("https://a.ru/3", "m", page)
+
+    assert cache.get("https://a.ru/1", "m") == page
+    assert cache.get("https://a.ru/2", "m") is None
+    assert cache.get("https://a.ru/3", "m") == page
+
+
+def test_replay_copies_count_toward_limit_and_are_evicted_first(tmp_path):
+    page = os.urandom(4000).hex()
+    HtmlCache(tmp_path, ttl=60, max_bytes=10 ** 6).put("https://a.ru/1", "m", page)
+    HtmlCache(tmp_path, ttl=60, max_bytes=10 ** 6).put("https://a.ru/2", "m", page)
+    stored = sum(path.stat().st_size for path in tmp_path.glob("*.*"))
+    replay = HtmlCache(tmp_path, ttl=60, max_bytes=stored + len(page) * 3 // 2, replay=True)
+
+    first_copy = replay.replay_uri("https://a.ru/1", "m")
+    replay_path = replay.replay_uri("https://a.ru/2", "m")  # вторая копия не помещается в лимит
+
+    copies = list((tmp_path / "replay").glob("*.html"))
+    assert [copy.as_uri() for copy in copies] == [replay_path] and first_copy != replay_path
+    assert replay.get("https://a.ru/1", "m") == page  # страницы кэша не тронуты
+    assert replay.get("https://a.ru/2", "m") == page
+
+
+@pytest.mark.asyncio
+async def test_replay_extracts_without_network(tmp_path):
+    """В режиме replay fetch_tiered берёт страницу из кэша и не обращается к ZenRows."""
+    tiers = build_tiers(wait_for="img", wait=1000)
+    HtmlCache(tmp_path, ttl=60, max_bytes=10 ** 6).put(URL, "zenrows-js", "<b>full</b>")
+    replay = HtmlCache(tmp_path, ttl=60, max_bytes=10 ** 6, replay=True)
+    client = ZenRowsClient("key", concurrency=1)  # без сессии: любой запрос упал бы
+
+    result = await fetch_tiered(client, URL, tiers, str.upper, lambda html: "FULL" in html,
+                                endpoint="product", memory=TierMemory(), cache=replay)
+    assert result == "<B>FULL</B>"
+
+    with pytest.raises(ZenRowsError):
+        await fetch_tiered(client, "https://www.ozon.ru/product/other-1/", tiers, str.upper, bool,
+                           endpoint="product", memory=TierMemory(), cache=replay)
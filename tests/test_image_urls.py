@@ -0,0 +1,69 @@
+from services.image_urls import TIER_LARGE, TIER_MEDIUM, TIER_SMALL, classify_image_url, classify_image_urls
+from services.parser_ozon import improve_image_quality, is_good_image_url, is_valid_product_image
+
+
+def test_ozon_thumbnail_rewritten_to_best_size():
+    """Миниатюра Ozon переписывается на максимальное разрешение и годится для публикации."""
+    info = classify_image_url("https://ir.ozone.ru/s3/multimedia-1-a/wc250/6921212203.jpg")
+
+    assert info.best == "https://ir.ozone.ru/s3/multimedia-1-a/wc1000/6921212203.jpg"
+    assert info.is_image and info.is_product
+    assert info.tier == TIER_LARGE
+
+
+def test_best_size_is_not_rewritten_again():
+    """Ссылка уже в максимальном разрешении не портится (wc1000 не превращается в wc10000)."""
+    url = "https://ir.ozone.ru/s3/multimedia-1-b/wc1000/7021212203.jpg"
+
+    assert improve_image_quality(url) == url
+
+
+def test_rejects_video_covers_and_icons():
+    """Видео, обложки и иконки отклоняются всеми обёртками одинаково."""
+    for url in [
+        "https://ir.ozone.ru/s3/multimedia-video-1/cover.jpg",
+        "https://cdn1.ozone.ru/s3/video-3/wc1000/clip.mp4",
+        "https://st.ozone.ru/assets/touch-icon-ipad-retina.png",
+    ]:
+        assert not is_good_image_url(url)
+        assert not is_valid_product_image(url)
+
+
+def test_tiers_for_non_rewritable_hosts():
+    """Размер в пути чужого CDN не меняется, но определяет качество."""
+    small, medium, original = classify_image_urls([
+        "https://cdn1.ozonusercontent.com/s3/meta-media/wc100/a.jpg",
+        "https://example.com/img/w500/b.png",
+        "https://basket-20.wbbasket.ru/vol3336/part333634/333634669/images/big/1.webp",
+    ])
+
+    assert small.tier == TIER_SMALL and not small.is_product and small.best == small.url
+    assert medium.tier == TIER_MEDIUM and medium.is_product
+    assert original.tier == TIER_LARGE and original.is_product
+
+
+def test_empty_and_relative_urls_are_invalid():
+    assert not is_valid_product_image("")
+    assert not is_good_image_url("/s3/multimedia/1.jpg")
+    assert not is_valid_product_image("Изображение отсутствует")
+
+
+def test_small_ozon_thumbnails_are_rejected_before_rewrite():
+    """Миниатюры wc50–wc200 отклоняются, как и раньше, хотя ссылка на большой размер строится."""
+    for url in [
+        "https://ir.ozone.ru/s3/multimedia-1-c/wc100/6921212204.jpg",
+        "https://ir.ozone.ru/s3/multimedia-1-c/w50/6921212205.jpg",
+        "https://ir.ozone.ru/s3/multimedia-1-c/wc200/6921212206.jpg",
+    ]:
+        info = classify_image_url(url)
+        assert info.tier == TIER_SMALL
+        assert not is_good_image_url(url)
+        assert not is_valid_product_image(url)
+        assert "1000/" in improve_image_quality(url)
+
+
+def test_urls_without_scheme_are_rejected():
+    """Ссылку без схемы Telegram не скачает: нужна http(s):// или протокол-относительная //."""
+    assert not is_valid_product_image("ir.ozone.ru/s3/multimedia-1-d/wc1000/6921212207.jpg")
+    assert not is_good_image_url("ir.ozone.ru/s3/multimedia-1-d/wc1000/6921212207.jpg")
+    assert is_valid_product_image("//ir.ozone.ru/s3/multimedia-1-d/wc1000/6921212207.jpg")
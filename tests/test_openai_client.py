@@ -0,0 +1,163 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import openai
+import pytest
+
+import services.openai_client as openai_client_module
+from services.openai_client import OpenAIClient, OpenAIRequestError
+
+MESSAGES = [{"role": "user", "content": "Привет"}]
+
+
+def _response(text):
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content=f"  {text}  "))]
+    return response
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(openai_client_module, "backoff_delay", lambda attempt, base=1.0: 0)
+
+
+@pytest.mark.asyncio
+async def test_transient_error_is_retried(monkeypatch):
+    calls = []
+
+    async def acreate(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise openai.error.RateLimitError("slow down")
+        return _response("Готово")
+
+    monkeypatch.setattr(openai.ChatCompletion, "acreate", acreate)
+    client = OpenAIClient("key", "test-model", timeout=1, max_retries=2)
+
+    assert await client.chat(MESSAGES, max_tokens=10) == "Готово"
+    assert len(calls) == 2
+    assert calls[0]["model"] == "test-model"
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_timeout_does_not_block_loop_and_gives_up(monkeypatch):
+    async def acreate(**kwargs):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(openai.ChatCompletion, "acreate", acreate)
+    client = OpenAIClient("key", "test-model", timeout=0.05, max_retries=1)
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticking = asyncio.create_task(ticker())
+    with pytest.raises(OpenAIRequestError):
+        await client.chat(MESSAGES, max_tokens=10)
+    ticking.cancel()
+
+    assert ticks >= 5  # пока ждали OpenAI, другие корутины выполнялись
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_is_raised_immediately(monkeypatch):
+    calls = 0
+
+    async def acreate(**kwargs):
+        nonlocal calls
+        calls += 1
+        raise openai.error.AuthenticationError("bad key")
+
+    monkeypatch.setattr(openai.ChatCompletion, "acreate", acreate)
+    client = OpenAIClient("key", "test-model", timeout=1, max_retries=3)
+
+    with pytest.raises(openai.error.AuthenticationError):
+        await client.chat(MESSAGES, max_tokens=10)
+    assert calls == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_limiter_serves_user_requests_before_background():
+    from services.openai_client import PRIORITY_BACKGROUND, PRIORITY_USER, RateLimiter
+
+    limiter = RateLimiter(rpm=6000, tpm=1_000_000, concurrency=1)
+    order = []
+
+    async def request(name, priority):
+        reserved = await limiter.acquire(10, priority)
+        order.append(name)
+        await asyncio.sleep(0.01)
+        limiter.release(reserved)
+
+    holder = await limiter.acquire(10, PRIORITY_BACKGROUND)  # единственное место занято
+    tasks = [asyncio.create_task(request("bg-1", PRIORITY_BACKGROUND)),
+             asyncio.create_task(request("bg-2", PRIORITY_BACKGROUND))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(request("user", PRIORITY_USER)))
+    await asyncio.sleep(0)
+    limiter.release(holder)
+    await asyncio.gather(*tasks)
+
+    assert order == ["user", "bg-1", "bg-2"]
+
+
+@pytest.mark.asyncio
+async def test_limiter_paces_requests_per_minute():
+    from services.openai_client import RateLimiter
+
+    limiter = RateLimiter(rpm=600, tpm=1_000_000, concurrency=10)  # 10 запросов в секунду
+    limiter._reset(asyncio.get_running_loop())
+    limiter._requests = 1.0  # ведро почти пустое
+
+    start = asyncio.get_running_loop().time()
+    for _ in range(3):
+        limiter.release(await limiter.acquire(10))
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert 0.15 <= elapsed < 1  # два запроса ждали пополнения по ~0.1 сек.
+
+
+@pytest.mark.asyncio
+async def test_token_reservation_is_corrected_by_usage(monkeypatch):
+    async def acreate(**kwargs):
+        response = _response("Готово")
+        response.usage = MagicMock(prompt_tokens=20, completion_tokens=5)
+        return response
+
+    monkeypatch.setattr(openai.ChatCompletion, "acreate", acreate)
+    from services.openai_client import RateLimiter
+
+    limiter = RateLimiter(rpm=600, tpm=1000, concurrency=2)
+    client = OpenAIClient("key", "test-model", timeout=1, limiter=limiter)
+
+    assert await client.chat(MESSAGES, max_tokens=500) == "Готово"
+    assert limiter._active == 0
+    assert 970 < limiter._tokens < 990  # зарезервировали ~500, фактически потратили 25
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_chunks_per_variant(monkeypatch):
+    async def chunks():
+        for index, text in [(0, "При"), (1, "Вто"), (0, "вет"), (0, None)]:
+            yield {"choices": [{"index": index, "delta": {"content": text} if text else {}}]}
+
+    async def acreate(**kwargs):
+        assert kwargs["stream"] is True
+        return chunks()
+
+    monkeypatch.setattr(openai.ChatCompletion, "acreate", acreate)
+    client = OpenAIClient("key", "test-model", timeout=1)
+
+    parts = [part async for part in client.chat_stream_variants(MESSAGES, n=2, max_tokens=10)]
+
+    assert parts == [(0, "При"), (1, "Вто"), (0, "вет")]
+    assert client.limiter._active == 0
+    await client.close()
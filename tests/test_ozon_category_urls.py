@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from services.parser_ozon import extract_ozon_category_urls
+
+FIXTURE = Path(__file__).resolve().parent.parent / "services" / "debug_ozon_category.html"
+
+
+def test_dedups_by_product_id_and_strips_query():
+    html = """
+        <a href="/product/palto-dreamwhite-1567177548/?at=abc">1</a>
+        <a href="https://www.ozon.ru/product/palto-dreamwhite-1567177548/">1 again</a>
+        <script>{"link":"/product/palto-dreamwhite-1567177548"}</script>
+        <a href="/product/tunika-spectrom-2309617965/?at=x&asb=1">2</a>
+    """
+
+    assert extract_ozon_category_urls(html) == [
+        "https://www.ozon.ru/product/palto-dreamwhite-1567177548/",
+        "https://www.ozon.ru/product/tunika-spectrom-2309617965/",
+    ]
+
+
+def test_stops_at_limit():
+    html = "".join(f'<a href="/product/item-{i}/">{i}</a>' for i in range(100))
+
+    assert extract_ozon_category_urls(html, limit=3) == [
+        "https://www.ozon.ru/product/item-0/",
+        "https://www.ozon.ru/product/item-1/",
+        "https://www.ozon.ru/product/item-2/",
+    ]
+
+
+def test_falls_back_to_parsed_hrefs():
+    """Ссылки, закодированные HTML-сущностями, находятся через разобранный документ."""
+    html = '<a href="&#47;product&#47;dozhdevik-2317593015&#47;">raincoat</a>'
+
+    assert extract_ozon_category_urls(html) == ["https://www.ozon.ru/product/dozhdevik-2317593015/"]
+
+
+def test_saved_category_page():
+    urls = extract_ozon_category_urls(FIXTURE.read_text(encoding="utf-8"), limit=5)
+
+    assert len(urls) == 5
+    assert urls[0] == "https://www.ozon.ru/product/palto-dreamwhite-1567177548/"
+    assert all("?" not in url for url in urls)
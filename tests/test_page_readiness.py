@@ -0,0 +1,113 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+import services.page_readiness as page_readiness
+from services.page_readiness import PageReadiness, any_element_present, network_idle
+
+
+@pytest.fixture
+def step_metric(monkeypatch):
+    metric = MagicMock()
+    monkeypatch.setattr(page_readiness, "record_page_step", metric)
+    return metric
+
+
+def test_step_returns_as_soon_as_condition_is_met(step_metric):
+    """Шаг завершается сразу после выполнения условия, а не по истечении бюджета."""
+    driver = MagicMock()
+    driver.find_elements.side_effect = [[], [], ["title"]]
+    readiness = PageReadiness(driver, "test", poll_frequency=0.01)
+
+    result = readiness.step("title", any_element_present(["h1"]), budget=5)
+
+    assert result == "title"
+    page, step, outcome, duration = step_metric.call_args.args
+    assert (page, step, outcome) == ("test", "title", "ready")
+    assert duration < 1
+
+
+def test_step_timeout_returns_none(step_metric):
+    """Исчерпанный бюджет не прерывает парсинг: шаг возвращает None."""
+    driver = MagicMock()
+    driver.find_elements.return_value = []
+    readiness = PageReadiness(driver, "test", poll_frequency=0.01)
+
+    assert readiness.step("title", any_element_present(["h1"]), budget=0.05) is None
+    assert step_metric.call_args.args[2] == "timeout"
+
+
+def test_network_idle_waits_for_stable_resource_count(step_metric):
+    """Сеть считается простаивающей, когда число ресурсов перестало расти."""
+    driver = MagicMock()
+    counts = iter([10, 12, 15])
+    driver.execute_script.side_effect = lambda script: next(counts, 15)
+    readiness = PageReadiness(driver, "test", poll_frequency=0.01)
+
+    assert readiness.step("scroll", network_idle(idle_seconds=0.05), budget=2) is True
+    assert driver.execute_script.call_count > 3
+
+
+class _FakeWbProductPage:
+    """Отрисованная карточка WB: есть название, цена и фото, но не первым селектором изображения."""
+
+    page_source = "<html></html>"
+
+    def __init__(self, present: dict):
+        self.present = present
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script, *args):
+        return "complete" if "readyState" in script else 0
+
+    def find_element(self, by, selector):
+        from selenium.common.exceptions import NoSuchElementException
+
+        if selector not in self.present:
+            raise NoSuchElementException(selector)
+        return self.present[selector]
+
+    def find_elements(self, by, selector):
+        return [self.present[selector]] if selector in self.present else []
+
+    def save_screenshot(self, path):
+        pass
+
+
+def test_missing_image_selector_does_not_wait_full_timeout(step_metric, monkeypatch):
+    """После готовности карточки промах селектора фото стоит секунду, а не 20."""
+    import time
+
+    import services.parser as parser
+
+    monkeypatch.setattr(parser, "WB_CAPTURE_JSON", False)
+    for budget in ("READY_CONTENT_BUDGET", "READY_SCROLL_BUDGET", "READY_EXPAND_BUDGET"):
+        monkeypatch.setattr(parser, budget, 0.05)
+    image_url = "https://images.wbstatic.net/big/new/1.jpg"
+    driver = _FakeWbProductPage({
+        parser.NAME_SELECTORS[0]: MagicMock(text="Льняное платье"),
+        parser.PRICE_SELECTORS[0]: MagicMock(get_attribute=lambda name: "1 990 ₽"),
+        "body": MagicMock(text="Платье из льна. " * 10),
+        ".swiper-slide img": MagicMock(get_attribute=lambda name: image_url),  # второй селектор из шести
+    })
+
+    start = time.monotonic()
+    result = parser.parse_product("https://www.wildberries.ru/catalog/1/detail.aspx", driver=driver)
+
+    assert result["image_url"] == image_url
+    assert time.monotonic() - start < 10  # баннер cookie (3 с) + один промах селектора фото
+
+
+def test_cancelled_product_parse_is_not_swallowed(step_metric, monkeypatch):
+    """Отмена задачи (таймаут) пробрасывается из parse_product, а не превращается в None."""
+    import services.parser as parser
+    from services.parse_executor import ParserJobCancelled
+
+    monkeypatch.setattr(parser, "WB_CAPTURE_JSON", False)
+    driver = _FakeWbProductPage({})
+    driver.get = MagicMock(side_effect=ParserJobCancelled("Задача парсинга отменена"))
+
+    with pytest.raises(ParserJobCancelled):
+        parser.parse_product("https://www.wildberries.ru/catalog/2/detail.aspx", driver=driver)
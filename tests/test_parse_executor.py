@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.parse_executor import run_parser_job, iter_parser_job, job_sleep, check_cancelled, ParserJobCancelled
+
+
+@pytest.mark.asyncio
+async def test_run_parser_job_runs_off_event_loop():
+    """Синхронная функция выполняется в отдельном потоке и возвращает результат."""
+    loop_thread = threading.get_ident()
+
+    def work(x, y=0):
+        return x + y, threading.get_ident()
+
+    result, worker_thread = await run_parser_job(work, 1, y=2, kind="http")
+
+    assert result == 3
+    assert worker_thread != loop_thread
+
+
+@pytest.mark.asyncio
+async def test_event_loop_not_blocked_by_job():
+    """Пока задача «спит», другие корутины продолжают работать."""
+    ticks = []
+
+    async def ticker():
+        for _ in range(3):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(run_parser_job(time.sleep, 0.1, kind="http"), ticker())
+
+    assert len(ticks) == 3
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_job_and_calls_on_cancel():
+    """По таймауту задача получает сигнал отмены, а on_cancel вызывается."""
+    finished = threading.Event()
+    cancelled = threading.Event()
+    on_cancel = MagicMock()
+
+    def slow_job():
+        try:
+            job_sleep(5)
+        except ParserJobCancelled:
+            cancelled.set()
+            raise
+        finally:
+            finished.set()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await run_parser_job(slow_job, kind="http", timeout=0.05, on_cancel=on_cancel)
+
+    assert await asyncio.to_thread(finished.wait, 2)
+    assert cancelled.is_set()
+    await asyncio.sleep(0.01)
+    on_cancel.assert_called_once()
+
+
+def test_check_cancelled_outside_job_is_noop():
+    """Вне задачи парсинга проверки отмены ничего не делают."""
+    check_cancelled()
+    job_sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_iter_parser_job_streams_items():
+    """Элементы генератора приходят по мере появления, ошибка генератора доходит до потребителя."""
+
+    def produce():
+        yield "a"
+        yield "b"
+        raise RuntimeError("page crashed")
+
+    received = []
+    with pytest.raises(RuntimeError):
+        async for item in iter_parser_job(produce, kind="http"):
+            received.append(item)
+
+    assert received == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_iter_parser_job_stops_generator_when_consumer_leaves():
+    """Выход потребителя из цикла останавливает и закрывает генератор в потоке."""
+    closed = threading.Event()
+    produced = []
+
+    def produce():
+        try:
+            for i in range(100):
+                produced.append(i)
+                yield i
+                job_sleep(0.01)
+        finally:
+            closed.set()
+
+    items = iter_parser_job(produce, kind="http")
+    async for item in items:
+        if item == 1:
+            break
+    await items.aclose()
+
+    assert await asyncio.to_thread(closed.wait, 2)
+    assert len(produced) < 100
+
+
+@pytest.mark.asyncio
+async def test_iter_parser_job_timeout_does_not_drop_buffered_items():
+    """Медленный потребитель дочитывает всё, что генератор успел выдать до таймаута."""
+
+    def produce():
+        yield from range(5)
+
+    received = []
+    async for item in iter_parser_job(produce, kind="http", timeout=0.05):
+        await asyncio.sleep(0.03)  # потребитель суммарно дольше таймаута
+        received.append(item)
+
+    assert received == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_iter_parser_job_timeout_stops_slow_producer():
+    """Генератор, работающий дольше таймаута, останавливается; выданное до этого доходит."""
+
+    def produce():
+        yield "first"
+        job_sleep(5)
+        yield "never"
+
+    received = []
+    with pytest.raises(asyncio.TimeoutError):
+        async for item in iter_parser_job(produce, kind="http", timeout=0.1):
+            received.append(item)
+
+    assert received == ["first"]
+
+
+@pytest.mark.asyncio
+async def test_catalog_jobs_waiting_for_driver_do_not_block_chrome_jobs():
+    """Каталоги, ждущие драйвер в своих потоках, не занимают потоки Selenium-задач."""
+    from services.parse_executor import CATALOG_EXECUTOR
+
+    release = threading.Event()
+
+    def waiting_catalog():
+        release.wait(5)  # как driver_pool.driver(), пока драйверы заняты
+        yield "href"
+
+    catalogs = [iter_parser_job(waiting_catalog, kind="catalog") for _ in range(CATALOG_EXECUTOR._max_workers)]
+    pending = [asyncio.ensure_future(catalog.__anext__()) for catalog in catalogs]
+    try:
+        assert await asyncio.wait_for(run_parser_job(lambda: "parsed", kind="chrome"), 1) == "parsed"
+    finally:
+        release.set()
+        await asyncio.gather(*pending)
+        for catalog in catalogs:
+            await catalog.aclose()
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from contextlib import aclosing
+
+import pytest
+
+from services.pipeline import Stage, run_pipeline
+
+
+async def _identity(item):
+    return item
+
+
+@pytest.mark.asyncio
+async def test_first_accepted_item_stops_pipeline_and_cancels_rest():
+    """Годный кандидат проходит раньше медленных; после приёма они отменяются."""
+    delays = {"slow-1": 5, "bad": 0.01, "good": 0.05, "slow-2": 5}
+    cancelled = []
+    sunk = []
+
+    async def parse(candidate):
+        try:
+            await asyncio.sleep(delays[candidate])
+        except asyncio.CancelledError:
+            cancelled.append(candidate)
+            raise
+        return None if candidate == "bad" else candidate
+
+    async def sink(item):
+        sunk.append(item)
+        return True
+
+    start = time.monotonic()
+    result = await run_pipeline(list(delays), [Stage("parse", parse, 4), Stage("sink", sink)], want=1)
+
+    assert sunk == ["good"]
+    assert result.delivered == 1 and result.fed == 4
+    assert time.monotonic() - start < 1
+    assert sorted(cancelled) == ["slow-1", "slow-2"]
+
+
+@pytest.mark.asyncio
+async def test_stage_concurrency_is_bounded_and_errors_drop_item():
+    active = {"parse": 0, "generate": 0}
+    peak = {"parse": 0, "generate": 0}
+
+    def tracked(name, fail=lambda item: False):
+        async def func(item):
+            active[name] += 1
+            peak[name] = max(peak[name], active[name])
+            await asyncio.sleep(0.01)
+            active[name] -= 1
+            if fail(item):
+                raise RuntimeError("stage failed")
+            return item
+        return func
+
+    sunk = []
+
+    async def sink(item):
+        sunk.append(item)
+        return True
+
+    stages = [
+        Stage("parse", tracked("parse", fail=lambda item: item % 3 == 0), 3),
+        Stage("generate", tracked("generate"), 1),
+        Stage("sink", sink),
+    ]
+    result = await run_pipeline(range(10), stages, want=None, queue_size=1)
+
+    assert peak == {"parse": 3, "generate": 1}
+    assert sorted(sunk) == [1, 2, 4, 5, 7, 8]
+    assert result.delivered == 6
+
+
+@pytest.mark.asyncio
+async def test_rejected_by_sink_falls_through_to_next_item():
+    async def sink(item):
+        return item != "first"
+
+    result = await run_pipeline(["first", "second"], [Stage("parse", _identity), Stage("sink", sink)], want=1)
+
+    assert result.delivered == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_source_does_not_delay_ready_items():
+    """Пока источник медленно выдаёт следующего кандидата, готовый уже принимается."""
+
+    async def catalog():
+        yield "fast"
+        await asyncio.sleep(5)  # каталог долго прокручивается дальше
+        yield "late"
+
+    async def sink(item):
+        return True
+
+    async with aclosing(catalog()) as source:
+        result = await asyncio.wait_for(
+            run_pipeline(source, [Stage("parse", _identity, 3), Stage("sink", sink)], want=1), timeout=1
+        )
+
+    assert result.delivered == 1
+
+
+@pytest.mark.asyncio
+async def test_backpressure_limits_items_taken_from_source():
+    """Медленный приёмник не даёт источнику убежать вперёд: очереди ограничены."""
+    pulled = []
+
+    def source():
+        for item in range(100):
+            pulled.append(item)
+            yield item
+
+    async def sink(item):
+        await asyncio.sleep(10)
+
+    task = asyncio.create_task(run_pipeline(source(), [Stage("parse", _identity), Stage("sink", sink)],
+                                            want=1, queue_size=1))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert len(pulled) < 6
+
+
+@pytest.mark.asyncio
+async def test_sink_stops_taking_items_once_want_is_reached():
+    """После приёма want элементов приёмник не берёт следующий, даже если он уже в очереди."""
+    sunk = []
+
+    async def sink(item):
+        sunk.append(item)
+        return True
+
+    result = await run_pipeline(range(5), [Stage("parse", _identity, 5), Stage("sink", sink)], want=1)
+
+    assert sunk == [0]
+    assert result.delivered == 1
+
+
+@pytest.mark.asyncio
+async def test_running_sink_call_is_not_cancelled():
+    """Начатая публикация дорабатывает, когда другой воркер приёмника уже набрал want."""
+    finished = []
+
+    async def sink(item):
+        await asyncio.sleep(0.01 if item == 0 else 0.05)
+        finished.append(item)
+        return True
+
+    result = await run_pipeline([0, 1], [Stage("sink", sink, 2)], want=1)
+
+    assert sorted(finished) == [0, 1]
+    assert result.delivered == 2
+
+
+@pytest.mark.asyncio
+async def test_on_drain_is_called_when_stage_finishes():
+    events = []
+
+    async def sink(item):
+        events.append(item)
+        return True
+
+    def drained():
+        events.append("drained")
+
+    await run_pipeline(range(2), [Stage("parse", _identity, on_drain=drained), Stage("sink", sink)], want=None)
+
+    assert events.count("drained") == 1
+    assert sorted(e for e in events if e != "drained") == [0, 1]
@@ -0,0 +1,73 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+import services.product_cache as product_cache
+from services.product_cache import extract_product_id, cached_product
+
+
+@pytest.fixture
+def cache_metric(monkeypatch):
+    metric = MagicMock()
+    monkeypatch.setattr(product_cache, "record_cache_access", metric)
+    return metric
+
+
+def test_extract_product_id():
+    """ID товара извлекается из ссылок WB и Ozon."""
+    assert extract_product_id("https://www.wildberries.ru/catalog/333634669/detail.aspx") == ("wildberries", "333634669")
+    assert extract_product_id("https://www.ozon.ru/product/rubashka-len-2241994907/?at=abc") == ("ozon", "2241994907")
+    assert extract_product_id("https://example.com/product/1") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_product_hit_skips_parse(fake_redis, cache_metric):
+    """Повторный запрос того же товара берётся из кэша без парсинга."""
+    url = "https://www.wildberries.ru/catalog/123/detail.aspx"
+    parse = AsyncMock(return_value={"title": "Платье", "url": url})
+
+    first = await cached_product(url, parse)
+    second = await cached_product("https://www.wildberries.ru/catalog/123/detail.aspx?size=1", parse)
+
+    parse.assert_awaited_once()
+    assert first["title"] == second["title"] == "Платье"
+    assert second["url"].endswith("?size=1")
+    assert fake_redis.ttl["product:wildberries:123"] == product_cache.PRODUCT_CACHE_TTL
+    cache_metric.assert_any_call("product_wildberries", hit=False)
+    cache_metric.assert_any_call("product_wildberries", hit=True)
+
+
+@pytest.mark.asyncio
+async def test_failed_parse_is_negatively_cached(fake_redis, cache_metric):
+    """Неудачный парсинг кэшируется на короткий срок и не повторяется."""
+    url = "https://www.ozon.ru/product/palto-dreamwhite-1567177548/"
+    parse = AsyncMock(return_value=None)
+
+    assert await cached_product(url, parse) is None
+    assert await cached_product(url, parse) is None
+
+    parse.assert_awaited_once()
+    assert fake_redis.ttl["product:ozon:1567177548"] == product_cache.PRODUCT_CACHE_NEGATIVE_TTL
+
+
+@pytest.mark.asyncio
+async def test_parse_errors_are_not_cached(fake_redis, cache_metric):
+    """Исключения (например, таймаут) не попадают в кэш."""
+    url = "https://www.ozon.ru/product/palto-dreamwhite-1567177548/"
+    parse = AsyncMock(side_effect=TimeoutError())
+
+    with pytest.raises(TimeoutError):
+        await cached_product(url, parse)
+
+    assert fake_redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_cache_disabled_without_redis(monkeypatch):
+    """Без подключения к Redis товар просто парсится."""
+    monkeypatch.setattr(product_cache.redis_client, "redis", None)
+    parse = AsyncMock(return_value={"title": "Юбка"})
+
+    result = await cached_product("https://www.wildberries.ru/catalog/5/detail.aspx", parse)
+
+    assert result["title"] == "Юбка"
+    parse.assert_awaited_once()
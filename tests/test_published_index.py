@@ -0,0 +1,95 @@
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import services.published_index as published_index
+from models.models import PublishedProduct
+from services import database
+
+WB_URL = "https://www.wildberries.ru/catalog/123456/detail.aspx"
+COLD_URL = "https://www.wildberries.ru/catalog/234567/detail.aspx"
+WARM_URL = "https://www.wildberries.ru/catalog/345678/detail.aspx"
+
+
+@pytest.fixture
+def index_db(monkeypatch, db_session):
+    """Индекс работает с тестовой сессией через async with database.async_session()."""
+
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    monkeypatch.setattr(database, "async_session", session_factory)
+    return db_session
+
+
+@pytest.mark.asyncio
+async def test_recorded_product_is_skipped_until_cooldown_expires(fake_redis, index_db, monkeypatch):
+    assert not await published_index.is_recently_published(WB_URL)
+
+    await published_index.record_published(WB_URL)
+
+    assert await published_index.is_recently_published(WB_URL)
+    # Та же карточка по другой ссылке — тот же товар
+    assert await published_index.is_recently_published(WB_URL + "?utm_source=tg")
+
+    later = time.time() + (published_index.REPOST_COOLDOWN_DAYS + 1) * 86400
+    monkeypatch.setattr(published_index.time, "time", lambda: later)
+    assert not await published_index.is_recently_published(WB_URL)
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_db_when_redis_is_cold(fake_redis, index_db):
+    index_db.add(PublishedProduct(source="wildberries", product_id="234567", url=COLD_URL,
+                                  published_at=datetime.now(timezone.utc) - timedelta(days=1)))
+    await index_db.commit()
+
+    assert await published_index.is_recently_published(COLD_URL)
+
+
+@pytest.mark.asyncio
+async def test_warm_index_is_trusted_without_db(fake_redis, index_db, monkeypatch):
+    index_db.add(PublishedProduct(source="wildberries", product_id="345678", url=WARM_URL,
+                                  published_at=datetime.now(timezone.utc) - timedelta(days=1)))
+    index_db.add(PublishedProduct(source="wildberries", product_id="999", url="https://www.wildberries.ru/catalog/999/detail.aspx",
+                                  published_at=datetime.now(timezone.utc) - timedelta(days=400)))
+    await index_db.commit()
+
+    assert await published_index.warm_published_index() >= 1
+
+    async def no_db(*args):
+        raise AssertionError("при загруженном индексе БД не запрашивается")
+
+    monkeypatch.setattr(published_index, "_published_at_from_db", no_db)
+    assert await published_index.is_recently_published(WARM_URL)
+    assert not await published_index.is_recently_published("https://www.wildberries.ru/catalog/777/detail.aspx")
+
+
+@pytest.mark.asyncio
+async def test_failed_redis_write_makes_index_cold(fake_redis, index_db, monkeypatch):
+    """Товар, не попавший в Redis, всё равно находится: индекс больше не считается полным."""
+    url = "https://www.wildberries.ru/catalog/456789/detail.aspx"
+    await published_index.warm_published_index()
+
+    async def broken_zadd(*args, **kwargs):
+        raise ConnectionError("redis недоступен")
+
+    monkeypatch.setattr(fake_redis, "zadd", broken_zadd)
+    await published_index.record_published(url)
+
+    assert await fake_redis.get(published_index.WARM_KEY) is None
+    assert await published_index.is_recently_published(url)
+
+
+@pytest.mark.asyncio
+async def test_cold_index_is_rewarmed_and_warm_flag_has_no_ttl(fake_redis, index_db):
+    url = "https://www.wildberries.ru/catalog/567890/detail.aspx"
+    await published_index.record_published(url)
+    await fake_redis.delete(published_index.WARM_KEY)
+
+    assert await published_index.ensure_published_index_warm()
+    assert not await published_index.ensure_published_index_warm()  # уже загружен
+    assert fake_redis.ttl[published_index.WARM_KEY] is None
+    assert await fake_redis.zscore(published_index.INDEX_KEY, "wildberries:567890") is not None
@@ -158,6 +158,39 @@ async def test_scheduled_post_loop_empty_slot_publishes_random(monkeypatch):
 
     publish_random_product.assert_called_once_with("products.txt")
 
+@pytest.mark.asyncio
+async def test_scheduled_post_loop_empty_slot_uses_candidate_pool(monkeypatch):
+    import services.scheduler as sch
+
+    slot_hour, slot_minute = sch.SLOTS[0]
+    fixed_now = datetime(2025, 1, 1, slot_hour, slot_minute, tzinfo=sch.MOSCOW_TZ)
+    class FixedDateTime(datetime):
+        @classmethod
+        def now(cls, tz=None): return fixed_now
+    monkeypatch.setattr(sch, "datetime", FixedDateTime)
+
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    session.execute.side_effect = [
+        _exec_result_all([]),
+        _exec_result_first(None),
+    ]
+    async_session_mock = AsyncMock()
+    async_session_mock.__aenter__.return_value = session
+    monkeypatch.setattr(sch, "async_session", lambda: async_session_mock)
+
+    publish_from_pool = AsyncMock(return_value=True)
+    publish_random_product = AsyncMock()
+    monkeypatch.setattr(sch, "publish_from_pool", publish_from_pool)
+    monkeypatch.setattr(sch, "publish_random_product", publish_random_product)
+
+    with patch("services.scheduler.asyncio.sleep", side_effect=Exception("stop")):
+        with pytest.raises(Exception, match="stop"):
+            await sch.scheduled_post_loop()
+
+    publish_from_pool.assert_called_once()
+    publish_random_product.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_scheduled_post_loop_no_action_outside_slot(monkeypatch):
     import services.scheduler as sch
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+import services.redis_client as redis_client
+from services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution(fake_redis):
+    """Одновременные вызовы с одним ключом выполняют работу один раз."""
+    flight = SingleFlight("test", poll_interval=0.01)
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"title": "Платье"}
+
+    results = await asyncio.gather(*(flight.do("wb:1", work) for _ in range(5)))
+
+    assert calls == 1
+    assert all(result == {"title": "Платье"} for result in results)
+    assert fake_redis.data == {}  # блокировка снята
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_independently(monkeypatch):
+    """Разные ключи не схлопываются."""
+    monkeypatch.setattr(redis_client, "redis", None)
+    flight = SingleFlight("test")
+    work = AsyncMock(side_effect=["a", "b"])
+
+    results = await asyncio.gather(flight.do("1", work), flight.do("2", work))
+
+    assert sorted(results) == ["a", "b"]
+    assert work.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_waits_for_other_replica_result(fake_redis):
+    """Если блокировку держит другая реплика, ждём её результат вместо своего вызова."""
+    flight = SingleFlight("test", poll_interval=0.01)
+    fake_redis.data["singleflight:test:ozon:42"] = "other-replica-token"
+    work = AsyncMock(return_value="own")
+    fetch_remote = AsyncMock(side_effect=[(False, None), (True, "remote")])
+
+    result = await flight.do("ozon:42", work, fetch_remote)
+
+    assert result == "remote"
+    work.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_runs_itself_after_wait_timeout(fake_redis):
+    """Если другая реплика так и не дала результат, выполняем работу сами."""
+    flight = SingleFlight("test", wait_timeout=0.03, poll_interval=0.01)
+    fake_redis.data["singleflight:test:wb:7"] = "stale-token"
+    work = AsyncMock(return_value="own")
+
+    result = await flight.do("wb:7", work, AsyncMock(return_value=(False, None)))
+
+    assert result == "own"
+
+
+@pytest.mark.asyncio
+async def test_error_propagates_to_all_waiters(fake_redis):
+    """Ошибка общей задачи получают все ожидающие, ключ освобождается."""
+    flight = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("parse failed")
+
+    results = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert await flight.do("k", AsyncMock(return_value="ok")) == "ok"
@@ -0,0 +1,59 @@
+import json
+from unittest.mock import MagicMock
+
+from services.wb_network import WbResponseCollector, build_wb_product
+
+PRODUCT_URL = "https://www.wildberries.ru/catalog/333634669/detail.aspx"
+DETAIL_URL = "https://card.wb.ru/cards/v2/detail?appType=1&curr=rub&dest=-1257786&nm=333634669"
+CARD_URL = "https://basket-20.wbbasket.ru/vol3336/part333634/333634669/info/ru/card.json"
+
+DETAIL = {"data": {"products": [
+    {"id": 333634669, "name": "Платье летнее", "brand": "Zarina", "sizes": [{"price": {"basic": 500000, "product": 249900}}]},
+]}}
+CARD = {
+    "imt_name": "Платье летнее",
+    "description": "Лёгкое платье из хлопка",
+    "options": [{"name": "Состав", "value": "хлопок 100%"}, {"name": "Цвет", "value": "белый"}],
+    "media": {"photo_count": 2},
+}
+
+
+def _log(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+def test_build_wb_product_from_json():
+    """Товар собирается из detail и card.json в формате parse_product."""
+    product = build_wb_product(PRODUCT_URL, DETAIL, CARD, CARD_URL, "333634669")
+
+    assert product["name"] == "Платье летнее"
+    assert product["brand"] == "Zarina"
+    assert product["price"] == "2 499 ₽"
+    assert product["characteristics"] == {"Состав": "хлопок 100%", "Цвет": "белый"}
+    assert product["image_url"] == "https://basket-20.wbbasket.ru/vol3336/part333634/333634669/images/big/1.webp"
+    assert len(product["all_images"]) == 2
+
+
+def test_build_wb_product_without_price_falls_back():
+    """Без цены JSON не годится — нужен DOM-парсинг."""
+    assert build_wb_product(PRODUCT_URL, {"data": {"products": []}}, CARD, CARD_URL, "333634669") is None
+
+
+def test_collector_reads_bodies_of_own_product_only():
+    """Коллектор берёт тела ответов только своего товара, а не рекомендаций."""
+    driver = MagicMock()
+    driver.get_log.return_value = [
+        _log("Network.responseReceived", requestId="1", response={"url": DETAIL_URL}),
+        _log("Network.responseReceived", requestId="2", response={"url": CARD_URL.replace("333634669", "111")}),
+        _log("Network.responseReceived", requestId="3", response={"url": CARD_URL}),
+        _log("Network.loadingFinished", requestId="1"),
+        _log("Network.loadingFinished", requestId="2"),
+        _log("Network.loadingFinished", requestId="3"),
+    ]
+    bodies = {"1": DETAIL, "3": CARD}
+    driver.execute_cdp_cmd.side_effect = lambda cmd, params: {"body": json.dumps(bodies[params["requestId"]])}
+    collector = WbResponseCollector("333634669")
+
+    assert collector(driver) is True
+    assert driver.execute_cdp_cmd.call_count == 2
+    assert collector.build(PRODUCT_URL)["description"] == "Лёгкое платье из хлопка"
@@ -0,0 +1,78 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import services.zenrows_client as zenrows
+from services.zenrows_client import RetryBudget, ZenRowsClient, ZenRowsError
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(zenrows, "backoff_delay", lambda attempt, base=1.0, cap=30.0: 0)
+
+
+async def _start_server(monkeypatch, statuses):
+    """Локальный сервер вместо api.zenrows.com: отвечает статусами из списка по очереди."""
+    requests = []
+
+    async def handler(request):
+        requests.append(dict(request.query))
+        status = statuses[min(len(requests), len(statuses)) - 1]
+        return web.Response(status=status, text="<html>ok</html>" if status == 200 else "error")
+
+    app = web.Application()
+    app.router.add_get("/v1/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    monkeypatch.setattr(zenrows, "ZENROWS_ENDPOINT", str(server.make_url("/v1/")))
+    return server, requests
+
+
+@pytest.mark.asyncio
+async def test_retries_retryable_status(monkeypatch, no_backoff):
+    """429 и 5xx повторяются, apikey подставляется в каждый запрос."""
+    server, requests = await _start_server(monkeypatch, [429, 503, 200])
+    client = ZenRowsClient("key", concurrency=2)
+    try:
+        html = await client.get({"url": "https://www.ozon.ru/product/x-1/"}, timeout=5)
+    finally:
+        await client.close()
+        await server.close()
+
+    assert html == "<html>ok</html>"
+    assert len(requests) == 3
+    assert all(query["apikey"] == "key" for query in requests)
+
+
+@pytest.mark.asyncio
+async def test_client_error_is_not_retried(monkeypatch, no_backoff):
+    """Ошибка авторизации (401) не повторяется."""
+    server, requests = await _start_server(monkeypatch, [401])
+    client = ZenRowsClient("bad-key", concurrency=1)
+    try:
+        with pytest.raises(ZenRowsError) as error:
+            await client.get({"url": "https://www.ozon.ru/"}, timeout=5)
+    finally:
+        await client.close()
+        await server.close()
+
+    assert error.value.status == 401
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_shared_by_job(monkeypatch, no_backoff):
+    """Запросы одной задачи делят общий запас повторов."""
+    server, requests = await _start_server(monkeypatch, [500])
+    client = ZenRowsClient("key", concurrency=1, max_retries=10)
+    budget = RetryBudget(retries=2)
+    try:
+        for _ in range(2):
+            with pytest.raises(ZenRowsError):
+                await client.get({"url": "https://www.ozon.ru/"}, timeout=5, budget=budget)
+    finally:
+        await client.close()
+        await server.close()
+
+    # 3 попытки первого запроса (1 + 2 повтора) и 1 попытка второго — запас уже исчерпан
+    assert len(requests) == 4
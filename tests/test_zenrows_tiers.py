@@ -0,0 +1,115 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import services.zenrows_client as zenrows
+from services.zenrows_client import RetryBudget, ZenRowsClient, ZenRowsError
+from services.zenrows_tiers import TierMemory, build_tiers, fetch_tiered, url_pattern
+
+TIERS = build_tiers(wait_for="img", wait=1000)
+
+
+def _tier_of(query) -> str:
+    if query.get("premium_proxy"):
+        return "premium"
+    return "js" if query.get("js_render") else "basic"
+
+
+async def _start_server(monkeypatch, responses):
+    """Локальный ZenRows: отвечает (статус, html) по режиму запроса."""
+    requested = []
+
+    async def handler(request):
+        tier = _tier_of(request.query)
+        requested.append(tier)
+        status, text = responses[tier]
+        return web.Response(status=status, text=text)
+
+    app = web.Application()
+    app.router.add_get("/v1/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    monkeypatch.setattr(zenrows, "ZENROWS_ENDPOINT", str(server.make_url("/v1/")))
+    return server, requested
+
+
+async def _fetch(monkeypatch, responses, memory, url="https://www.ozon.ru/product/x-1/", budget=None):
+    server, requested = await _start_server(monkeypatch, responses)
+    client = ZenRowsClient("key", concurrency=1, max_retries=0)
+    try:
+        result = await fetch_tiered(client, url, TIERS, str.strip, lambda html: html == "full",
+                                    endpoint="product", timeout=5, memory=memory, budget=budget)
+    finally:
+        await client.close()
+        await server.close()
+    return result, requested
+
+
+@pytest.mark.asyncio
+async def test_escalates_until_complete_and_remembers_tier(monkeypatch):
+    """Неполная страница и ошибка поднимают режим; следующий товар сразу начинается с нужного."""
+    responses = {"basic": (200, "partial"), "js": (403, ""), "premium": (200, "full")}
+    memory = TierMemory(ttl=60)
+
+    result, requested = await _fetch(monkeypatch, responses, memory)
+    assert result == "full"
+    assert requested == ["basic", "js", "premium"]
+
+    _, requested = await _fetch(monkeypatch, responses, memory, url="https://www.ozon.ru/product/y-2/")
+    assert requested == ["premium"]
+
+
+@pytest.mark.asyncio
+async def test_cheapest_tier_is_enough(monkeypatch):
+    result, requested = await _fetch(monkeypatch, {"basic": (200, "full")}, TierMemory(ttl=60))
+
+    assert result == "full"
+    assert requested == ["basic"]
+
+
+@pytest.mark.asyncio
+async def test_expired_memory_starts_from_cheapest(monkeypatch):
+    memory = TierMemory(ttl=-1)
+    memory.remember("https://www.ozon.ru/product/x-1/", TIERS[2])
+
+    _, requested = await _fetch(monkeypatch, {"basic": (200, "full")}, memory)
+    assert requested == ["basic"]
+
+
+@pytest.mark.asyncio
+async def test_unprocessable_page_escalates_without_spending_retries(monkeypatch):
+    """422 на дешёвом режиме — сразу следующий режим; запас повторов остаётся последнему."""
+    monkeypatch.setattr(zenrows, "backoff_delay", lambda *args, **kwargs: 0)
+    budget = RetryBudget(3)
+    responses = {"basic": (422, ""), "js": (200, "full")}
+
+    result, requested = await _fetch(monkeypatch, responses, TierMemory(ttl=60), budget=budget)
+
+    assert result == "full"
+    assert requested == ["basic", "js"]
+    assert budget.remaining == 3
+
+
+@pytest.mark.asyncio
+async def test_last_tier_still_retries_unprocessable_page(monkeypatch):
+    monkeypatch.setattr(zenrows, "backoff_delay", lambda *args, **kwargs: 0)
+    responses = {"basic": (422, ""), "js": (422, ""), "premium": (422, "")}
+
+    budget = RetryBudget(2)
+
+    with pytest.raises(ZenRowsError):
+        await _fetch(monkeypatch, responses, TierMemory(ttl=60), budget=budget)
+    assert budget.remaining == 0  # оба повтора достались премиум-режиму
+
+
+@pytest.mark.asyncio
+async def test_error_on_last_tier_is_raised(monkeypatch):
+    responses = {"basic": (401, ""), "js": (401, ""), "premium": (401, "")}
+
+    with pytest.raises(ZenRowsError):
+        await _fetch(monkeypatch, responses, TierMemory(ttl=60))
+
+
+def test_url_pattern():
+    assert url_pattern("https://www.ozon.ru/product/palto-1567177548/?at=x") == "www.ozon.ru/product"
+    assert url_pattern("https://www.ozon.ru/category/platya-7502/") == "www.ozon.ru/category"